@@ -1,10 +1,17 @@
-from app.core.initialize_db import init_db
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
+# init_db is imported on first access, so importing a light module such as
+# app.core.startup does not pull in the database layer
+def __getattr__(name):
+    if name == 'init_db':
+        from .initialize_db import init_db
+        return init_db
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
+    from app.core.initialize_db import init_db
     init_db()
-    print("Database initialized.")
\ No newline at end of file
+    print("Database initialized.")
@@ -0,0 +1,167 @@
+from datetime import date, datetime
+from .db_manager import DBManager
+from .kpi_manager import expected_fee_sql
+from .config import TERM_STARTS
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+AGING_BUCKETS = ['0-30', '31-60', '61-90', '90+']
+
+# A student's fees are charged in equal parts on each term start of the
+# academic year, which runs from the first term start to the next one (so early
+# January still belongs to last year). Terms not yet started are not owed.
+# Payments settle the oldest charges first, so what is left outstanding is the
+# newest part of the bill, aged from its term start date; a charge from a
+# previous calendar year is always in the oldest bucket.
+
+def _as_date(value):
+    if value is None:
+        return date.today()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+def _charge_dates(as_of):
+    """Term start dates of the academic year as_of falls in, including those still ahead of it."""
+    terms = sorted(tuple(int(part) for part in mm_dd.split('-')) for mm_dd in TERM_STARTS) or [(1, 1)]
+    year = as_of.year if date(as_of.year, *terms[0]) <= as_of else as_of.year - 1
+    return [date(year, month, day) for month, day in terms]
+
+def age_balance(expected, paid, as_of):
+    """Split expected - paid, on the terms charged by as_of, into [0-30, 31-60, 61-90, 90+] day buckets."""
+    buckets = [0.0, 0.0, 0.0, 0.0]
+    charges = _charge_dates(as_of)
+    per_charge = (expected or 0.0) / len(charges)
+    remaining_paid = paid or 0.0
+    for charged_on in charges:
+        if charged_on > as_of:
+            break
+        covered = min(per_charge, remaining_paid)
+        remaining_paid -= covered
+        outstanding = per_charge - covered
+        if outstanding <= 0:
+            continue
+        age = (as_of - charged_on).days
+        if charged_on.year < as_of.year or age > 90:
+            buckets[3] += outstanding
+        elif age <= 30:
+            buckets[0] += outstanding
+        elif age <= 60:
+            buckets[1] += outstanding
+        else:
+            buckets[2] += outstanding
+    return buckets
+
+def _balances_query(db, student_ids=None):
+    query = f"""
+        SELECT s.id, s.class_id, {expected_fee_sql()} AS expected,
+               COALESCE((SELECT SUM(p.amount) FROM payments p WHERE p.student_id = s.id AND p.date <= ?), 0) AS paid
+        FROM students s
+        LEFT JOIN fees f ON f.student_id = s.id
+    """
+    if student_ids:
+        query += f" WHERE s.id IN ({', '.join('?' for _ in student_ids)})"
+    return query
+
+def _aging_rows(balances, as_of):
+    rows = []
+    for student_id, class_id, expected, paid in balances:
+        buckets = age_balance(expected, paid, as_of)
+        rows.append((student_id, class_id, expected, paid, *buckets, sum(buckets), as_of.isoformat()))
+    return rows
+
+_UPSERT = """
+    INSERT OR REPLACE INTO arrears_aging
+        (student_id, class_id, expected, paid, bucket_0_30, bucket_31_60, bucket_61_90, bucket_90_plus, arrears, as_of)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def refresh_arrears_aging(as_of=None):
+    """Recompute the aging table for every student in one pass. Returns the number of rows written."""
+    as_of = _as_date(as_of)
+    with DBManager() as db:
+        try:
+            balances = db.fetch_all(_balances_query(db), (as_of.isoformat(),))
+            rows = _aging_rows(balances, as_of)
+            db.cursor.execute("DELETE FROM arrears_aging")
+            db.cursor.executemany(_UPSERT, rows)
+            db.conn.commit()
+            logging.info(f"Refreshed arrears aging as of {as_of} ({len(rows)} students)")
+            return len(rows)
+        except Exception as e:
+            logging.error(f"Error refreshing arrears aging: {e}")
+            raise
+
+def update_student_aging(db, student_id):
+    """Re-age one student after a payment or fee change, if the table is current. Commits with the caller."""
+    current = db.fetch_one("SELECT as_of FROM arrears_aging LIMIT 1")
+    if not current:
+        return
+    as_of = _as_date(current[0])
+    balances = db.fetch_all(_balances_query(db, [student_id]), (as_of.isoformat(), student_id))
+    if balances:
+        db.cursor.execute(_UPSERT, _aging_rows(balances, as_of)[0])
+    else:
+        db.cursor.execute("DELETE FROM arrears_aging WHERE student_id = ?", (student_id,))
+
+def ensure_current(as_of=None):
+    """Refresh the aging table if it was computed for a different day."""
+    as_of = _as_date(as_of)
+    with DBManager() as db:
+        row = db.fetch_one("SELECT as_of FROM arrears_aging LIMIT 1")
+    if not row or row[0] != as_of.isoformat():
+        refresh_arrears_aging(as_of)
+
+def aging_query(class_id=None, outstanding_only=True):
+    """SQL and params for the per-student aging rows, shared by the viewer and exports."""
+    query = """
+        SELECT s.admission_number, s.name, COALESCE(c.name, 'No Class') AS class_name,
+               a.bucket_0_30, a.bucket_31_60, a.bucket_61_90, a.bucket_90_plus, a.arrears
+        FROM arrears_aging a
+        JOIN students s ON s.id = a.student_id
+        LEFT JOIN classes c ON c.id = a.class_id
+        WHERE 1=1
+    """
+    params = []
+    if class_id:
+        query += " AND a.class_id = ?"
+        params.append(class_id)
+    if outstanding_only:
+        query += " AND a.arrears > 0"
+    query += " ORDER BY a.bucket_90_plus DESC, a.arrears DESC"
+    return query, params
+
+def get_arrears_aging(class_id=None, outstanding_only=True, as_of=None):
+    ensure_current(as_of)
+    with DBManager() as db:
+        try:
+            query, params = aging_query(class_id, outstanding_only)
+            return db.fetch_all(query, params)
+        except Exception as e:
+            logging.error(f"Error fetching arrears aging: {e}")
+            raise
+
+def get_aging_summary(class_id=None, as_of=None):
+    """Bucket totals for the whole school or one class."""
+    ensure_current(as_of)
+    with DBManager() as db:
+        try:
+            query = """
+                SELECT COALESCE(SUM(bucket_0_30), 0), COALESCE(SUM(bucket_31_60), 0),
+                       COALESCE(SUM(bucket_61_90), 0), COALESCE(SUM(bucket_90_plus), 0),
+                       COALESCE(SUM(arrears), 0), COUNT(CASE WHEN arrears > 0 THEN 1 END)
+                FROM arrears_aging
+            """
+            params = ()
+            if class_id:
+                query += " WHERE class_id = ?"
+                params = (class_id,)
+            row = db.fetch_one(query, params)
+            summary = dict(zip(AGING_BUCKETS, row[:4]))
+            summary['total'] = row[4]
+            summary['students'] = row[5]
+            return summary
+        except Exception as e:
+            logging.error(f"Error fetching arrears aging summary: {e}")
+            raise
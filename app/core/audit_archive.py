@@ -0,0 +1,146 @@
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from .db_manager import DBManager
+from .audit_log import search_terms
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Old audit rows are moved out of the live table into one gzip file per month
+# (audit-YYYY-MM.jsonl.gz). Each archive run appends a new gzip member, so a
+# segment is never rewritten. index.json records per segment the row count,
+# id range and timestamp range, so a search only opens months it overlaps.
+# A crash between writing a segment and deleting the rows can leave the same
+# row archived twice; searches drop repeated ids.
+
+ARCHIVE_BATCH_SIZE = 5000
+INDEX_FILE = 'index.json'
+
+def archive_dir():
+    """AUDIT_ARCHIVE_DIR, or an audit_archive folder next to the database."""
+    configured = os.getenv('AUDIT_ARCHIVE_DIR')
+    if configured:
+        return Path(configured)
+    return Path(os.getenv('SQLITE_PATH', 'app/data/school_fees.db')).parent / 'audit_archive'
+
+def load_index(directory=None):
+    path = Path(directory or archive_dir()) / INDEX_FILE
+    if not path.exists():
+        return {'segments': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _save_index(directory, index):
+    path = Path(directory) / INDEX_FILE
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _append_segment(directory, month, entries):
+    path = Path(directory) / f"audit-{month}.jsonl.gz"
+    payload = ''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries).encode('utf-8')
+    with open(path, 'ab') as f:
+        f.write(gzip.compress(payload))
+        f.flush()
+        os.fsync(f.fileno())
+    return path
+
+def _update_segment(index, month, path, entries):
+    segment = index['segments'].setdefault(month, {
+        'file': path.name, 'rows': 0, 'members': 0,
+        'first_id': None, 'last_id': None, 'first_timestamp': None, 'last_timestamp': None,
+    })
+    ids = [e['id'] for e in entries]
+    stamps = [e['timestamp'] for e in entries]
+    segment['rows'] += len(entries)
+    segment['members'] += 1
+    segment['bytes'] = path.stat().st_size
+    segment['first_id'] = min(ids + ([segment['first_id']] if segment['first_id'] is not None else []))
+    segment['last_id'] = max(ids + ([segment['last_id']] if segment['last_id'] is not None else []))
+    segment['first_timestamp'] = min(stamps + ([segment['first_timestamp']] if segment['first_timestamp'] else []))
+    segment['last_timestamp'] = max(stamps + ([segment['last_timestamp']] if segment['last_timestamp'] else []))
+
+def archive_audit_logs(before_date, directory=None):
+    """Move audit rows logged before before_date into the monthly segments. Returns rows archived."""
+    directory = Path(directory or archive_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    index = load_index(directory)
+    archived = 0
+    with DBManager() as db:
+        try:
+            while True:
+                rows = db.fetch_all("""
+                    SELECT al.*, u.username
+                    FROM audit_logs al
+                    LEFT JOIN users u ON al.user_id = u.id
+                    WHERE al.timestamp < ?
+                    ORDER BY al.timestamp, al.id
+                    LIMIT ?
+                """, (before_date, ARCHIVE_BATCH_SIZE))
+                if not rows:
+                    break
+                by_month = {}
+                for row in rows:
+                    entry = dict(row)
+                    by_month.setdefault(str(entry['timestamp'])[:7], []).append(entry)
+                for month, entries in sorted(by_month.items()):
+                    path = _append_segment(directory, month, entries)
+                    _update_segment(index, month, path, entries)
+                _save_index(directory, index)
+                # Only delete once the segments and index are on disk
+                db.cursor.executemany("DELETE FROM audit_logs WHERE id = ?", [(row['id'],) for row in rows])
+                db.conn.commit()
+                archived += len(rows)
+            logging.info(f"Archived {archived} audit log entries older than {before_date} to {directory}")
+            return archived
+        except Exception as e:
+            logging.error(f"Error archiving audit logs before {before_date}: {e}")
+            raise
+
+def _read_segment(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def search_archive(from_date, to_date, user_id=None, text=None, limit=1000, directory=None):
+    """Archived entries logged on from_date..to_date (inclusive), newest first.
+
+    Rows have the same shape as get_audit_page(): (timestamp, username, action, ip_address, user_agent, id).
+    """
+    directory = Path(directory or archive_dir())
+    index = load_index(directory)
+    # Any timestamp on to_date sorts below this
+    upper = to_date + '\uffff'
+    terms = [term.lower() for term in search_terms(text)]
+    matches, seen = [], set()
+    for month, segment in sorted(index['segments'].items(), reverse=True):
+        if segment['last_timestamp'] < from_date or segment['first_timestamp'] > upper:
+            continue
+        path = directory / segment['file']
+        if not path.exists():
+            logging.error(f"Audit archive segment missing: {path}")
+            continue
+        for entry in _read_segment(path):
+            stamp = str(entry.get('timestamp') or '')
+            if not (from_date <= stamp <= upper) or entry['id'] in seen:
+                continue
+            if user_id and entry.get('user_id') != user_id:
+                continue
+            if terms:
+                action = (entry.get('action') or '').lower()
+                if not all(term in action for term in terms):
+                    continue
+            seen.add(entry['id'])
+            matches.append((stamp, entry.get('username'), entry.get('action'),
+                            entry.get('ip_address'), entry.get('user_agent'), entry['id']))
+        # Months are visited newest first, so once enough rows are in hand older months cannot displace them
+        if limit and len(matches) >= limit:
+            break
+    matches.sort(key=lambda m: (m[0], m[5]), reverse=True)
+    return matches[:limit] if limit else matches
@@ -0,0 +1,321 @@
+import atexit
+import json
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from .db_manager import DBManager
+from .config import AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_PAGE_SIZE
+
+# Audit events are queued in memory and written by one background thread in
+# batched transactions, so logging costs the caller a queue put rather than a
+# connection and a commit. Timestamps are taken when the event is queued, in
+# the same UTC format CURRENT_TIMESTAMP uses.
+#
+# Besides the readable action message, events carry an event type
+# ("payment.recorded"), the entity they touch ("payment", 42) and a JSON
+# payload, so they can be queried without parsing the message.
+#
+# A batch that hits a transient lock ("database is locked") is retried a few
+# times before it is dropped; flush() reports whether everything it waited for
+# reached the database.
+
+_INSERT = """
+    INSERT INTO audit_logs (user_id, action, ip_address, user_agent, timestamp, event_type, entity_type, entity_id, payload)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_STOP = object()
+_WRITE_ATTEMPTS = 4
+_RETRY_DELAY = 0.25  # seconds, doubled after each failed attempt
+_CURRENT_USER = object()
+_current_user_id = None
+
+class _FlushRequest:
+    """Queued by flush(); set once everything ahead of it is written, with ok False if any of it was dropped."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = True
+
+    def set(self, ok):
+        self.ok = ok
+        self.done.set()
+
+def _is_transient(error):
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+def _utc_now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def set_current_user(user_id):
+    """Who is signed in; events logged without an explicit user are attributed to them."""
+    global _current_user_id
+    _current_user_id = user_id
+
+def _encode(event):
+    user_id, action, ip_address, user_agent, timestamp, event_type, entity_type, entity_id, payload = event
+    if payload is not None:
+        payload = json.dumps(payload, default=str, separators=(',', ':'))
+    entity_id = str(entity_id) if entity_id is not None else None
+    return (user_id, action, ip_address, user_agent, timestamp, event_type, entity_type, entity_id, payload)
+
+class AuditLogSink:
+    def __init__(self, batch_size=AUDIT_BATCH_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def log(self, user_id, action, ip_address=None, user_agent=None, critical=False,
+            event_type=None, entity_type=None, entity_id=None, payload=None):
+        """Queue an audit event. Critical events block until they are on disk.
+
+        Returns False if a critical event could not be written (or timed out), True otherwise.
+        """
+        event = (user_id, action, ip_address, user_agent, _utc_now(), event_type, entity_type, entity_id, payload)
+        if self._closed:
+            return self._write([event]) or not critical
+        self._queue.put(event)
+        self._ensure_started()
+        if critical and not self.flush():
+            logging.error(f"Critical audit event may not be on disk: {action}")
+            return False
+        return True
+
+    def flush(self, timeout=10.0):
+        """Block until everything queued so far has been written.
+
+        Returns False on timeout, or if any of it was dropped after failed writes.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return self._drain_inline()
+        request = _FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout) and request.ok
+
+    def close(self, timeout=10.0):
+        """Write whatever is pending and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        self._drain_inline()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._closed or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        batch, waiters = [], []
+        deadline = None
+        ok = True  # False once a write since the last flush request was dropped
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._write(batch)
+                return
+            if isinstance(item, _FlushRequest):
+                waiters.append(item)
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if waiters or len(batch) >= self.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                ok = self._write(batch) and ok
+                if waiters:
+                    for waiter in waiters:
+                        waiter.set(ok)
+                    ok = True
+                batch, waiters = [], []
+                deadline = None
+
+    def _drain_inline(self):
+        batch, waiters = [], []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushRequest):
+                waiters.append(item)
+            elif item is not _STOP:
+                batch.append(item)
+        ok = self._write(batch)
+        for waiter in waiters:
+            waiter.set(ok)
+        return ok
+
+    def _write(self, batch):
+        """Insert batch in one transaction, retrying transient lock errors. Returns False if it was dropped."""
+        if not batch:
+            return True
+        delay = _RETRY_DELAY
+        for attempt in range(1, _WRITE_ATTEMPTS + 1):
+            try:
+                with DBManager() as db:
+                    db.cursor.executemany(_INSERT, [_encode(event) for event in batch])
+                return True
+            except Exception as e:
+                if attempt < _WRITE_ATTEMPTS and _is_transient(e):
+                    logging.warning(f"Audit log write failed ({e}); retrying in {delay:.2f}s")
+                    time.sleep(delay)
+                    delay *= 2
+                    continue
+                # Audit logging must never take down the caller
+                logging.error(f"Error writing {len(batch)} audit log entries, dropping them: {e}")
+                return False
+
+audit_sink = AuditLogSink()
+atexit.register(audit_sink.close)
+
+def audit(user_id, action, ip_address=None, user_agent=None, critical=False):
+    return audit_sink.log(user_id, action, ip_address, user_agent, critical)
+
+def audit_event(event_type, entity_type, entity_id, message, payload=None, user_id=_CURRENT_USER,
+                critical=False, ip_address=None, user_agent=None):
+    """Queue a structured event; message is what the activity log viewer shows.
+
+    user_id defaults to the signed-in user (set_current_user); pass None for no user.
+    Returns False if a critical event could not be written.
+    """
+    if user_id is _CURRENT_USER:
+        user_id = _current_user_id
+    return audit_sink.log(user_id, message, ip_address, user_agent, critical, event_type, entity_type, entity_id, payload)
+
+def get_audit_events(event_type=None, entity_type=None, entity_id=None, user_id=None,
+                     since=None, until=None, limit=AUDIT_PAGE_SIZE):
+    """Structured events, newest first; since/until are timestamps, until exclusive."""
+    query = "SELECT * FROM audit_events WHERE 1=1"
+    params = []
+    for column, value in (('event_type', event_type), ('entity_type', entity_type), ('user_id', user_id)):
+        if value is not None:
+            query += f" AND {column} = ?"
+            params.append(value)
+    if entity_id is not None:
+        query += " AND entity_id = ?"
+        params.append(str(entity_id))
+    if since:
+        query += " AND timestamp >= ?"
+        params.append(since)
+    if until:
+        query += " AND timestamp < ?"
+        params.append(until)
+    query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit)
+    with DBManager() as db:
+        try:
+            events = []
+            for row in db.fetch_all(query, params):
+                event = dict(row)
+                event['payload'] = json.loads(event['payload']) if event['payload'] else {}
+                events.append(event)
+            return events
+        except Exception as e:
+            logging.error(f"Error fetching audit events: {e}")
+            raise
+
+def _fts5_available():
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(x)")
+        conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+FTS5_AVAILABLE = _fts5_available()
+
+def search_terms(text):
+    """Words and codes in a search string (receipt numbers, M-Pesa codes, ids)."""
+    return re.findall(r"\w+", text or "")
+
+def _fts_match(terms):
+    # Every term must appear; each matches as a prefix so partial codes work
+    return " ".join(f'"{term}"*' for term in terms)
+
+# Reads filter on bare timestamp ranges so the (timestamp, id) and
+# (user_id, timestamp, id) indexes apply, and page by keyset on (timestamp, id)
+# so every page costs the same however far back the viewer has scrolled.
+
+def _day_after(day):
+    return (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
+def audit_log_query(from_date, to_date, user_id=None, before=None, after=None, text=None):
+    """SQL and params for entries logged on from_date..to_date (inclusive), newest first.
+
+    text keeps only entries whose action contains every word in it.
+
+    before/after are the (timestamp, id) key of a page edge; with after the rows come oldest first.
+    """
+    lower, upper, upper_op = from_date, _day_after(to_date), "<"
+    # Move the range bound to the page edge so the index seek starts there
+    if before and before[0] < upper:
+        upper, upper_op = before[0], "<="
+    if after and after[0] > lower:
+        lower = after[0]
+    query = f"""
+        SELECT al.timestamp, u.username, al.action, al.ip_address, al.user_agent, al.id
+        FROM audit_logs al
+        LEFT JOIN users u ON al.user_id = u.id
+        WHERE al.timestamp >= ? AND al.timestamp {upper_op} ?
+    """
+    params = [lower, upper]
+    if user_id:
+        query += " AND al.user_id = ?"
+        params.append(user_id)
+    terms = search_terms(text)
+    if terms and FTS5_AVAILABLE:
+        query += " AND al.id IN (SELECT rowid FROM audit_logs_fts WHERE audit_logs_fts MATCH ?)"
+        params.append(_fts_match(terms))
+    elif terms:
+        query += "".join(" AND al.action LIKE ?" for _ in terms)
+        params.extend(f"%{term}%" for term in terms)
+    if before:
+        query += " AND (al.timestamp, al.id) < (?, ?)"
+        params.extend(before)
+    if after:
+        query += " AND (al.timestamp, al.id) > (?, ?)"
+        params.extend(after)
+        query += " ORDER BY al.timestamp, al.id"
+    else:
+        query += " ORDER BY al.timestamp DESC, al.id DESC"
+    return query, params
+
+def get_audit_page(from_date, to_date, user_id=None, before=None, after=None, limit=AUDIT_PAGE_SIZE, text=None):
+    """One page of entries, newest first, older than before or newer than after."""
+    with DBManager() as db:
+        try:
+            query, params = audit_log_query(from_date, to_date, user_id, before, after, text)
+            rows = db.fetch_all(query + " LIMIT ?", params + [limit])
+            return rows[::-1] if after else rows
+        except Exception as e:
+            logging.error(f"Error fetching audit log page: {e}")
+            raise
+
+def purge_audit_logs(before_date):
+    """Delete entries logged before before_date. Returns the number deleted."""
+    with DBManager() as db:
+        try:
+            db.execute("DELETE FROM audit_logs WHERE timestamp < ?", (before_date,))
+            return db.cursor.rowcount
+        except Exception as e:
+            logging.error(f"Error purging audit logs before {before_date}: {e}")
+            raise
@@ -1,18 +1,30 @@
 from passlib.hash import bcrypt
 from ..core.db_manager import DBManager
+from .audit_log import audit_event
+from .events import publish, REFERENCE_CHANGED
+from .config import BCRYPT_ROUNDS
+from .login_throttle import throttle, LoginThrottled
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class Auth:
+    # Hashing is deliberately slow (about 0.25s at cost 12); call authenticate off the UI thread
+    hasher = bcrypt.using(rounds=BCRYPT_ROUNDS)
+
     @staticmethod
     def hash_password(password):
-        return bcrypt.hash(password)
+        return Auth.hasher.hash(password)
 
     @staticmethod
     def verify_password(password, hashed):
         return bcrypt.verify(password, hashed)
 
+    @staticmethod
+    def needs_rehash(hashed):
+        """True when a stored hash was made at a different cost than BCRYPT_ROUNDS."""
+        return Auth.hasher.needs_update(hashed)
+
     @staticmethod
     def create_user(username, email, password, role):
         hashed_password = Auth.hash_password(password)
@@ -21,19 +33,44 @@ class Auth:
                 db.execute("INSERT INTO users (username, email, password, role) VALUES (?, ?, ?, ?)",
                           (username, email, hashed_password, role))
                 logging.info(f"User created: {username} ({email}) - {role}")
+                audit_event('user.created', 'user', db.cursor.lastrowid, f"Created new user: {username} ({email}) with role {role}",
+                            {'username': username, 'email': email, 'role': role}, critical=True)
             except Exception as e:
                 logging.error(f"User creation failed: {e}")
                 raise
+        publish(REFERENCE_CHANGED, kind='users')
 
     @staticmethod
-    def authenticate(email_or_username, password):
+    def authenticate(email_or_username, password, workstation=None):
+        """Return the user dict, or None for a wrong password. Raises LoginThrottled when locked out."""
         with DBManager() as db:
             # Try to authenticate with email first, then username for backward compatibility
             user = db.fetch_one("SELECT * FROM users WHERE email = ? OR username = ?", (email_or_username, email_or_username))
+            # Failures count against the account whichever identifier was typed; unknown names count as typed
+            account = user['id'] if user else email_or_username
+            # Refuse throttled attempts before any bcrypt work
+            try:
+                throttle.check(account, workstation)
+            except LoginThrottled as e:
+                audit_event('auth.login_throttled', 'user', account if user else None, f"Login throttled for user: {email_or_username}",
+                            {'identifier': email_or_username, 'key': e.key, 'retry_after': round(e.retry_after)}, user_id=None)
+                raise
             if user and Auth.verify_password(password, user['password']):
                 user_dict = dict(user)
+                if Auth.needs_rehash(user['password']):
+                    # The plaintext is only available now, so upgrade the hash while we have it
+                    new_hash = Auth.hash_password(password)
+                    db.execute("UPDATE users SET password = ? WHERE id = ?", (new_hash, user['id']))
+                    user_dict['password'] = new_hash
+                    logging.info(f"Rehashed password for {user_dict['username']} at cost {BCRYPT_ROUNDS}")
+                throttle.record_success(account, (email_or_username, user_dict['username'], user_dict['email']))
                 logging.info(f"User logged in: {user_dict['username']} ({user_dict['email']})")
+                audit_event('auth.login', 'user', user_dict['id'], f"Login successful for user: {user_dict['username']}",
+                            {'identifier': email_or_username}, user_id=user_dict['id'])
                 return user_dict
+            throttle.record_failure(account, workstation)
+            audit_event('auth.login_failed', 'user', user['id'] if user else None, f"Login failed for user: {email_or_username}",
+                        {'identifier': email_or_username, 'known_user': bool(user)}, user_id=None, critical=True)
             return None
 
 # Convenience functions for backward compatibility
@@ -29,4 +29,34 @@ DEFAULT_RATES = {
 BUS_FEES = {
     'Location1': float(os.getenv('BUS_FEE_LOCATION1', '50.0')),
     'Location2': float(os.getenv('BUS_FEE_LOCATION2', '60.0'))
-}
\ No newline at end of file
+}
+
+# Term start dates (MM-DD) used to date fee charges when ageing arrears
+TERM_STARTS = [d.strip() for d in os.getenv('TERM_STARTS', '01-06,05-04,08-31').split(',') if d.strip()]
+
+# Audit log writes are queued and flushed in batches of AUDIT_BATCH_SIZE or
+# every AUDIT_FLUSH_INTERVAL seconds; the log viewer pages AUDIT_PAGE_SIZE rows
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '100'))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0'))
+AUDIT_PAGE_SIZE = int(os.getenv('AUDIT_PAGE_SIZE', '200'))
+
+# bcrypt cost factor for new hashes; stored hashes at another cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
+# Failed sign-ins allowed per account / per workstation within the window (seconds)
+LOGIN_MAX_FAILURES = int(os.getenv('LOGIN_MAX_FAILURES', '5'))
+LOGIN_WORKSTATION_MAX_FAILURES = int(os.getenv('LOGIN_WORKSTATION_MAX_FAILURES', '20'))
+LOGIN_WINDOW_SECONDS = int(os.getenv('LOGIN_WINDOW_SECONDS', '900'))
+
+# How long an opened student profile is reused (seconds); changes to the student drop it sooner
+PROFILE_CACHE_SECONDS = float(os.getenv('PROFILE_CACHE_SECONDS', '30'))
+
+# Payments per page in a student's payment history
+PAYMENT_PAGE_SIZE = int(os.getenv('PAYMENT_PAGE_SIZE', '50'))
+
+# Query profiling (enabled with QUERY_PROFILE=1): statements at or over SLOW_QUERY_MS are logged
+# with their query plan; the summary is saved to QUERY_PROFILE_PATH at exit
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '50'))
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', str(BASE_DIR / 'logs' / 'slow_queries.log'))
+SLOW_QUERY_KEEP = int(os.getenv('SLOW_QUERY_KEEP', '100'))
+QUERY_PROFILE_PATH = os.getenv('QUERY_PROFILE_PATH', str(BASE_DIR / 'logs' / 'query_profile.json'))
@@ -2,10 +2,16 @@ import sqlite3
 from dotenv import load_dotenv
 import os
 import logging
+import time
 from pathlib import Path
 
 load_dotenv()
 
+# Called with every new connection (the startup profiler traces queries through this)
+connection_hooks = []
+# The QueryProfiler while query profiling is on; see query_profiler
+profiler = None
+
 class DBManager:
     def __init__(self):
         """Initialize a new database connection for each instance"""
@@ -14,8 +20,13 @@ class DBManager:
             db_path = os.getenv('SQLITE_PATH', 'app/data/school_fees.db')
             # Ensure the directory exists
             Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            started = time.perf_counter()
             self.conn = sqlite3.connect(db_path)
             self.conn.row_factory = sqlite3.Row
+            for hook in connection_hooks:
+                hook(self.conn)
+            if profiler:
+                profiler.connection_opened(time.perf_counter() - started)
         else:
             raise ValueError("Only SQLite is supported with current configuration")
         self.cursor = self.conn.cursor()
@@ -32,26 +43,41 @@ class DBManager:
         self.cursor.close()
         self.conn.close()
 
+    def close(self):
+        self.cursor.close()
+        self.conn.close()
+
     def execute(self, query, params=None):
         try:
+            started = time.perf_counter()
             self.cursor.execute(query, params or ())
             self.conn.commit()
+            if profiler:
+                profiler.record(self.conn, query, params, time.perf_counter() - started, self.cursor.rowcount)
         except Exception as e:
             logging.error(f"Query execution failed: \n    {query}\n     - {str(e)}")
             raise
 
     def fetch_one(self, query, params=None):
         try:
+            started = time.perf_counter()
             self.cursor.execute(query, params or ())
-            return self.cursor.fetchone()
+            row = self.cursor.fetchone()
+            if profiler:
+                profiler.record(self.conn, query, params, time.perf_counter() - started, 0 if row is None else 1)
+            return row
         except Exception as e:
             logging.error(f"Fetch one failed: {query} - {str(e)}")
             raise
 
     def fetch_all(self, query, params=None):
         try:
+            started = time.perf_counter()
             self.cursor.execute(query, params or ())
-            return self.cursor.fetchall()
+            rows = self.cursor.fetchall()
+            if profiler:
+                profiler.record(self.conn, query, params, time.perf_counter() - started, len(rows))
+            return rows
         except Exception as e:
             logging.error(f"Fetch all failed: {query} - {str(e)}")
             raise
@@ -61,4 +87,8 @@ log_path = os.getenv('LOG_PATH', 'logs/school_fees.log')
 log_dir = os.path.dirname(log_path)
 if log_dir and not os.path.exists(log_dir):
     os.makedirs(log_dir)
-logging.basicConfig(filename=log_path, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
\ No newline at end of file
+logging.basicConfig(filename=log_path, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+if os.getenv('QUERY_PROFILE', '0') == '1':
+    from .query_profiler import query_profiler
+    query_profiler.enable()
@@ -0,0 +1,58 @@
+import logging
+import threading
+import weakref
+
+# In-process domain events. The managers publish after a change is committed,
+# with the changed rows in the payload, so open views can patch the rows they
+# show instead of re-querying whole tables.
+#
+# Subscribers are held weakly: a bound method stops receiving events once its
+# object is garbage collected, so closed windows do not need to unsubscribe.
+# (That also means a lambda passed here is dropped straight away; subscribe a
+# method or a function that something else keeps alive.) Callbacks run on the
+# publishing thread; the desktop UI hops to the UI thread in event_relay.
+
+# payment: dict with id, student_id, amount, method, date, clerk_id, receipt_no, ref_code
+PAYMENT_RECORDED = 'payment.recorded'
+# action: 'created', 'updated' or 'deleted'; student: the row as get_all_students
+# returns it (None once deleted); previous: the row before the change (None when created)
+STUDENT_CHANGED = 'student.changed'
+# student_ids: students whose expected fees changed; class_id: set for class-wide changes
+FEE_CHANGED = 'fee.changed'
+# kind: 'classes', 'bus_locations', 'food_requirements' or 'users' (see reference_data)
+REFERENCE_CHANGED = 'reference.changed'
+
+_subscribers = {}
+_lock = threading.Lock()
+
+def _ref(callback):
+    if hasattr(callback, '__self__'):
+        return weakref.WeakMethod(callback)
+    return weakref.ref(callback)
+
+def subscribe(event, callback):
+    """Call callback(**payload) each time event is published."""
+    with _lock:
+        _subscribers.setdefault(event, []).append(_ref(callback))
+
+def unsubscribe(event, callback):
+    with _lock:
+        _subscribers[event] = [ref for ref in _subscribers.get(event, []) if ref() not in (None, callback)]
+
+def publish(event, **payload):
+    """Deliver an event to every live subscriber. A failing subscriber is logged and does not stop the others."""
+    with _lock:
+        refs = list(_subscribers.get(event, []))
+    dead = False
+    for ref in refs:
+        callback = ref()
+        if callback is None:
+            dead = True
+            continue
+        try:
+            callback(**payload)
+        except Exception as e:
+            logging.error(f"Event subscriber {getattr(callback, '__qualname__', callback)} failed on {event}: {e}")
+    if dead:
+        with _lock:
+            _subscribers[event] = [ref for ref in _subscribers.get(event, []) if ref() is not None]
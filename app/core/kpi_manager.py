@@ -0,0 +1,166 @@
+from .db_manager import DBManager
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Rollups kept in step with every payment and fee change:
+#   daily_collections - collected amount per (day, method, class, clerk)
+#   student_balances  - expected/paid per student
+#   kpi_totals        - school-wide expected, paid and outstanding arrears (single row)
+# The dashboard reads these instead of scanning payments. The incremental
+# updates write through db.cursor without committing, so they commit (or roll
+# back) together with the caller's change to payments or fees.
+
+BREAKDOWN_COLUMNS = {'method': 'method', 'class': 'class_id', 'clerk': 'clerk_id'}
+
+def expected_fee_sql(alias='f'):
+    """Fee total expression for a fees row aliased as alias."""
+    return f"COALESCE({alias}.total_fees, 0) + COALESCE({alias}.bus_fee, 0) + COALESCE({alias}.boarding_fee, 0)"
+
+def _expected_for_student(db, student_id):
+    row = db.fetch_one(f"SELECT {expected_fee_sql()} FROM fees f WHERE f.student_id = ?", (student_id,))
+    return float(row[0]) if row and row[0] else 0.0
+
+def _bump_totals(db, expected=0.0, paid=0.0, arrears=0.0):
+    db.cursor.execute("INSERT OR IGNORE INTO kpi_totals (id, expected, paid, arrears) VALUES (1, 0, 0, 0)")
+    db.cursor.execute(
+        "UPDATE kpi_totals SET expected = expected + ?, paid = paid + ?, arrears = arrears + ?, updated_at = CURRENT_TIMESTAMP WHERE id = 1",
+        (expected, paid, arrears)
+    )
+
+def _load_balance(db, student_id):
+    """Return (expected, paid, created). A missing row is seeded from the source tables."""
+    row = db.fetch_one("SELECT expected, paid FROM student_balances WHERE student_id = ?", (student_id,))
+    if row:
+        return row[0], row[1], False
+    expected = _expected_for_student(db, student_id)
+    paid_row = db.fetch_one("SELECT SUM(amount) FROM payments WHERE student_id = ?", (student_id,))
+    paid = float(paid_row[0]) if paid_row and paid_row[0] else 0.0
+    db.cursor.execute("INSERT INTO student_balances (student_id, expected, paid) VALUES (?, ?, ?)", (student_id, expected, paid))
+    _bump_totals(db, expected, paid, max(0.0, expected - paid))
+    return expected, paid, True
+
+def _store_balance(db, student_id, old_expected, old_paid, expected, paid):
+    db.cursor.execute("UPDATE student_balances SET expected = ?, paid = ? WHERE student_id = ?", (expected, paid, student_id))
+    _bump_totals(
+        db,
+        expected - old_expected,
+        paid - old_paid,
+        max(0.0, expected - paid) - max(0.0, old_expected - old_paid)
+    )
+
+def record_collection(db, student_id, amount, method, date, clerk_id):
+    """Fold a newly inserted payment into the rollups. Call on the connection that inserted it, then commit."""
+    class_row = db.fetch_one("SELECT class_id FROM students WHERE id = ?", (student_id,))
+    class_id = class_row[0] if class_row and class_row[0] else 0
+    key = (str(date)[:10], method, class_id, clerk_id or 0)
+    db.cursor.execute(
+        "INSERT OR IGNORE INTO daily_collections (day, method, class_id, clerk_id, amount, payments) VALUES (?, ?, ?, ?, 0, 0)",
+        key
+    )
+    db.cursor.execute(
+        "UPDATE daily_collections SET amount = amount + ?, payments = payments + 1 WHERE day = ? AND method = ? AND class_id = ? AND clerk_id = ?",
+        (amount,) + key
+    )
+    expected, paid, created = _load_balance(db, student_id)
+    if not created:
+        _store_balance(db, student_id, expected, paid, expected, paid + amount)
+
+def refresh_student_expected(db, student_id):
+    """Re-read a student's fee row after it changed and adjust the totals."""
+    expected, paid, created = _load_balance(db, student_id)
+    if not created:
+        _store_balance(db, student_id, expected, paid, _expected_for_student(db, student_id), paid)
+
+def remove_student(db, student_id):
+    row = db.fetch_one("SELECT expected, paid FROM student_balances WHERE student_id = ?", (student_id,))
+    if row:
+        _bump_totals(db, -row[0], -row[1], -max(0.0, row[0] - row[1]))
+        db.cursor.execute("DELETE FROM student_balances WHERE student_id = ?", (student_id,))
+
+def rebuild_rollups(db=None):
+    """Recompute all rollups from payments and fees (first run, or after out-of-band edits)."""
+    if db is None:
+        with DBManager() as db:
+            return rebuild_rollups(db)
+    try:
+        db.execute("DELETE FROM daily_collections")
+        db.execute("""
+            INSERT INTO daily_collections (day, method, class_id, clerk_id, amount, payments)
+            SELECT SUBSTR(p.date, 1, 10), p.method, COALESCE(s.class_id, 0), COALESCE(p.clerk_id, 0), SUM(p.amount), COUNT(*)
+            FROM payments p
+            LEFT JOIN students s ON s.id = p.student_id
+            GROUP BY SUBSTR(p.date, 1, 10), p.method, COALESCE(s.class_id, 0), COALESCE(p.clerk_id, 0)
+        """)
+        db.execute("DELETE FROM student_balances")
+        db.execute(f"""
+            INSERT INTO student_balances (student_id, expected, paid)
+            SELECT s.id, {expected_fee_sql()}, COALESCE(p.paid, 0)
+            FROM students s
+            LEFT JOIN fees f ON f.student_id = s.id
+            LEFT JOIN (SELECT student_id, SUM(amount) AS paid FROM payments GROUP BY student_id) p ON p.student_id = s.id
+        """)
+        db.execute("DELETE FROM kpi_totals")
+        db.execute("""
+            INSERT INTO kpi_totals (id, expected, paid, arrears)
+            SELECT 1, COALESCE(SUM(expected), 0), COALESCE(SUM(paid), 0),
+                   COALESCE(SUM(CASE WHEN expected > paid THEN expected - paid ELSE 0 END), 0)
+            FROM student_balances
+        """)
+        logging.info("Rebuilt KPI rollups")
+    except Exception as e:
+        logging.error(f"Error rebuilding KPI rollups: {e}")
+        raise
+
+def get_collections(start_date, end_date):
+    """Total collected and payment count for start_date <= day < end_date."""
+    with DBManager() as db:
+        try:
+            row = db.fetch_one(
+                "SELECT COALESCE(SUM(amount), 0), COALESCE(SUM(payments), 0) FROM daily_collections WHERE day >= ? AND day < ?",
+                (start_date, end_date)
+            )
+            return {'amount': row[0], 'payments': row[1]}
+        except Exception as e:
+            logging.error(f"Error getting collections for {start_date} - {end_date}: {e}")
+            raise
+
+def get_collection_breakdown(start_date, end_date, by='method'):
+    """Collected amount per method, class or clerk for start_date <= day < end_date."""
+    column = BREAKDOWN_COLUMNS[by]
+    with DBManager() as db:
+        try:
+            return db.fetch_all(
+                f"SELECT {column}, SUM(amount), SUM(payments) FROM daily_collections "
+                f"WHERE day >= ? AND day < ? GROUP BY {column} ORDER BY SUM(amount) DESC",
+                (start_date, end_date)
+            )
+        except Exception as e:
+            logging.error(f"Error getting collection breakdown by {by}: {e}")
+            raise
+
+def get_dashboard_kpis(current_range, previous_range):
+    """Month-over-month collections, collection rate and outstanding arrears for the dashboard."""
+    with DBManager() as db:
+        try:
+            month_sql = "SELECT COALESCE(SUM(amount), 0), COALESCE(SUM(payments), 0) FROM daily_collections WHERE day >= ? AND day < ?"
+            current = db.fetch_one(month_sql, current_range)
+            previous = db.fetch_one(month_sql, previous_range)
+            totals = db.fetch_one("SELECT expected, paid, arrears FROM kpi_totals WHERE id = 1")
+            expected, paid, arrears = totals if totals else (0.0, 0.0, 0.0)
+            change_pct = None
+            if previous[0]:
+                change_pct = (current[0] - previous[0]) / previous[0] * 100
+            return {
+                'month_collected': current[0],
+                'month_payments': current[1],
+                'previous_month_collected': previous[0],
+                'change_pct': change_pct,
+                'expected': expected,
+                'paid': paid,
+                'collection_rate': (paid / expected * 100) if expected else 0.0,
+                'outstanding_arrears': arrears,
+            }
+        except Exception as e:
+            logging.error(f"Error getting dashboard KPIs: {e}")
+            raise
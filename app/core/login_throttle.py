@@ -0,0 +1,100 @@
+import socket
+import threading
+import time
+from collections import deque
+from .db_manager import DBManager
+from .config import LOGIN_MAX_FAILURES, LOGIN_WORKSTATION_MAX_FAILURES, LOGIN_WINDOW_SECONDS
+
+# Failed sign-ins are counted over a sliding window, per account and per
+# workstation. An account is the user's id, so typing the username or the
+# email draws on one count; identifiers that match no user are counted as
+# typed. Once either count reaches its limit, further attempts are
+# refused before any bcrypt work happens. Failures are stored in
+# login_failures so a restart does not reset the count. Each process keeps
+# the recent timestamps per key in memory and reads the table once per key.
+
+class LoginThrottled(Exception):
+    def __init__(self, key, retry_after):
+        self.key = key
+        self.retry_after = retry_after
+        minutes = max(1, int(retry_after // 60) + (1 if retry_after % 60 else 0))
+        super().__init__(f"Too many failed sign-in attempts. Try again in {minutes} minute{'s' if minutes != 1 else ''}.")
+
+def workstation_name():
+    try:
+        return socket.gethostname() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+class LoginThrottle:
+    def __init__(self, max_failures=LOGIN_MAX_FAILURES, workstation_max_failures=LOGIN_WORKSTATION_MAX_FAILURES,
+                 window=LOGIN_WINDOW_SECONDS, clock=time.time):
+        self.max_failures = max_failures
+        self.workstation_max_failures = workstation_max_failures
+        self.window = window
+        self.clock = clock
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def _account_key(self, account):
+        if isinstance(account, int):
+            return f"account:{account}"
+        return f"user:{(account or '').strip().lower()}"
+
+    def _keys(self, account, workstation):
+        return [
+            (self._account_key(account), self.max_failures),
+            (f"host:{workstation or workstation_name()}", self.workstation_max_failures),
+        ]
+
+    def _recent(self, key, now):
+        """Failure times for key inside the window, loading them from the table on first use."""
+        failures = self._failures.get(key)
+        if failures is None:
+            with DBManager() as db:
+                rows = db.fetch_all(
+                    "SELECT attempted_at FROM login_failures WHERE key = ? AND attempted_at > ? ORDER BY attempted_at",
+                    (key, now - self.window)
+                )
+            failures = self._failures[key] = deque(row[0] for row in rows)
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        return failures
+
+    def check(self, account, workstation=None):
+        """Raise LoginThrottled if this account (user id, or the identifier typed) or workstation is over its limit."""
+        now = self.clock()
+        with self._lock:
+            for key, limit in self._keys(account, workstation):
+                failures = self._recent(key, now)
+                if len(failures) >= limit:
+                    raise LoginThrottled(key, failures[len(failures) - limit] + self.window - now)
+
+    def record_failure(self, account, workstation=None):
+        now = self.clock()
+        keys = self._keys(account, workstation)
+        with self._lock:
+            for key, _ in keys:
+                self._recent(key, now).append(now)
+            with DBManager() as db:
+                db.cursor.executemany("INSERT INTO login_failures (key, attempted_at) VALUES (?, ?)", [(key, now) for key, _ in keys])
+                db.execute("DELETE FROM login_failures WHERE attempted_at <= ?", (now - self.window,))
+
+    def record_success(self, account, identifiers=()):
+        """A correct password clears the account's count and any counted against its identifiers as typed.
+
+        The workstation count keeps running.
+        """
+        keys = [self._account_key(account)] + [self._account_key(name) for name in identifiers if name]
+        with self._lock:
+            for key in keys:
+                self._failures[key] = deque()
+            with DBManager() as db:
+                db.execute(f"DELETE FROM login_failures WHERE key IN ({', '.join('?' * len(keys))})", keys)
+
+    def reset(self):
+        """Forget cached counts (tests, or after an admin clears login_failures)."""
+        with self._lock:
+            self._failures.clear()
+
+throttle = LoginThrottle()
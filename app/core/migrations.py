@@ -0,0 +1,425 @@
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# The schema version lives in PRAGMA user_version. Each migration below moves
+# the database up one version inside a single transaction, together with the
+# user_version bump, so a failed step leaves the database at the previous
+# version. Steps are written to be safe on databases that already have some
+# of their changes (everything created by init_db before versioning reports
+# version 0). Add new steps at the end; never edit or renumber old ones.
+#
+# The DDL each step runs is frozen below as it stood when the step was added.
+# models.py describes the current schema for the rest of the app; a schema
+# change is a new step here plus the matching edit there.
+
+# Step 1: every table, as of the first versioned schema
+_V1_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL CHECK (role IN ('admin', 'clerk')),
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS classes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS students (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        admission_number TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        class_id INTEGER,
+        guardian_contact TEXT,
+        profile_picture TEXT,
+        bus_location TEXT,
+        FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS fees (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER UNIQUE NOT NULL,
+        total_fees REAL NOT NULL DEFAULT 0.0,
+        bus_fee REAL NOT NULL DEFAULT 0.0,
+        boarding_fee REAL NOT NULL DEFAULT 0.0,
+        FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS class_fees (
+        class_id INTEGER NOT NULL,
+        term INTEGER NOT NULL,
+        amount REAL NOT NULL DEFAULT 0.0,
+        PRIMARY KEY (class_id, term),
+        FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS contributions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER NOT NULL,
+        item TEXT NOT NULL,
+        quantity REAL NOT NULL,
+        cash_equivalent REAL NOT NULL,
+        FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS food_requirements (
+        class_id INTEGER PRIMARY KEY,
+        maize_kg REAL NOT NULL DEFAULT 0.0,
+        beans_kg REAL NOT NULL DEFAULT 0.0,
+        millet_kg REAL NOT NULL DEFAULT 0.0,
+        FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS payments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        method TEXT NOT NULL,
+        date TEXT NOT NULL,
+        clerk_id INTEGER NOT NULL,
+        receipt_no TEXT UNIQUE NOT NULL,
+        transaction_code TEXT UNIQUE,
+        bank_reference TEXT,
+        mpesa_code TEXT,
+        verified BOOLEAN DEFAULT 0,
+        FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+        FOREIGN KEY (clerk_id) REFERENCES users(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS receipts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        payment_id INTEGER UNIQUE NOT NULL,
+        receipt_no TEXT UNIQUE NOT NULL,
+        filename TEXT NOT NULL,
+        FOREIGN KEY (payment_id) REFERENCES payments(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS bus_locations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        fee_per_term REAL NOT NULL DEFAULT 0.0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS audit_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        action TEXT NOT NULL,
+        ip_address TEXT,
+        user_agent TEXT,
+        timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+        event_type TEXT,
+        entity_type TEXT,
+        entity_id TEXT,
+        payload TEXT,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_collections (
+        day TEXT NOT NULL,
+        method TEXT NOT NULL,
+        class_id INTEGER NOT NULL DEFAULT 0,
+        clerk_id INTEGER NOT NULL DEFAULT 0,
+        amount REAL NOT NULL DEFAULT 0.0,
+        payments INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, method, class_id, clerk_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS student_balances (
+        student_id INTEGER PRIMARY KEY,
+        expected REAL NOT NULL DEFAULT 0.0,
+        paid REAL NOT NULL DEFAULT 0.0,
+        FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS kpi_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        expected REAL NOT NULL DEFAULT 0.0,
+        paid REAL NOT NULL DEFAULT 0.0,
+        arrears REAL NOT NULL DEFAULT 0.0,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS arrears_aging (
+        student_id INTEGER PRIMARY KEY,
+        class_id INTEGER,
+        expected REAL NOT NULL DEFAULT 0.0,
+        paid REAL NOT NULL DEFAULT 0.0,
+        bucket_0_30 REAL NOT NULL DEFAULT 0.0,
+        bucket_31_60 REAL NOT NULL DEFAULT 0.0,
+        bucket_61_90 REAL NOT NULL DEFAULT 0.0,
+        bucket_90_plus REAL NOT NULL DEFAULT 0.0,
+        arrears REAL NOT NULL DEFAULT 0.0,
+        as_of TEXT NOT NULL,
+        FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS login_failures (
+        key TEXT NOT NULL,
+        attempted_at REAL NOT NULL
+    )
+    """,
+]
+
+# Step 1: columns that databases from the older schemas lack
+_V1_ADDED_COLUMNS = [
+    ('users', [('created_at', 'TEXT DEFAULT CURRENT_TIMESTAMP')]),
+    ('fees', [('boarding_fee', 'REAL NOT NULL DEFAULT 0.0')]),
+    ('payments', [
+        ('transaction_code', 'TEXT'), ('bank_reference', 'TEXT'), ('mpesa_code', 'TEXT'), ('verified', 'BOOLEAN DEFAULT 0'),
+    ]),
+    ('audit_logs', [('ip_address', 'TEXT'), ('user_agent', 'TEXT')]),
+]
+
+# Step 2: structured audit event columns and the audit_events view
+_V2_AUDIT_EVENT_COLUMNS = [('event_type', 'TEXT'), ('entity_type', 'TEXT'), ('entity_id', 'TEXT'), ('payload', 'TEXT')]
+_V2_AUDIT_EVENTS_VIEW = """
+    CREATE VIEW IF NOT EXISTS audit_events AS
+    SELECT al.id, al.timestamp, al.user_id, u.username, al.event_type, al.entity_type, al.entity_id,
+           al.payload, al.action AS message, al.ip_address, al.user_agent
+    FROM audit_logs al
+    LEFT JOIN users u ON u.id = al.user_id
+    WHERE al.event_type IS NOT NULL
+"""
+
+# Step 3
+_V3_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_payments_student ON payments (student_id, date, id)",
+    "CREATE INDEX IF NOT EXISTS idx_arrears_aging_class ON arrears_aging (class_id, arrears)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_timestamp ON audit_logs (timestamp, id)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_user ON audit_logs (user_id, timestamp, id)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_entity ON audit_logs (entity_type, entity_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_event ON audit_logs (event_type, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_login_failures_key ON login_failures (key, attempted_at)",
+]
+
+# Step 4: fill the dashboard rollups from payments and fees
+_V4_ROLLUPS = [
+    "DELETE FROM daily_collections",
+    """
+    INSERT INTO daily_collections (day, method, class_id, clerk_id, amount, payments)
+    SELECT SUBSTR(p.date, 1, 10), p.method, COALESCE(s.class_id, 0), COALESCE(p.clerk_id, 0), SUM(p.amount), COUNT(*)
+    FROM payments p
+    LEFT JOIN students s ON s.id = p.student_id
+    GROUP BY SUBSTR(p.date, 1, 10), p.method, COALESCE(s.class_id, 0), COALESCE(p.clerk_id, 0)
+    """,
+    "DELETE FROM student_balances",
+    """
+    INSERT INTO student_balances (student_id, expected, paid)
+    SELECT s.id, COALESCE(f.total_fees, 0) + COALESCE(f.bus_fee, 0) + COALESCE(f.boarding_fee, 0), COALESCE(p.paid, 0)
+    FROM students s
+    LEFT JOIN fees f ON f.student_id = s.id
+    LEFT JOIN (SELECT student_id, SUM(amount) AS paid FROM payments GROUP BY student_id) p ON p.student_id = s.id
+    """,
+    "DELETE FROM kpi_totals",
+    """
+    INSERT INTO kpi_totals (id, expected, paid, arrears)
+    SELECT 1, COALESCE(SUM(expected), 0), COALESCE(SUM(paid), 0),
+           COALESCE(SUM(CASE WHEN expected > paid THEN expected - paid ELSE 0 END), 0)
+    FROM student_balances
+    """,
+]
+
+# Step 5: full-text index over audit_logs.action, when SQLite has FTS5
+_V5_AUDIT_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS audit_logs_fts USING fts5(action, content='audit_logs', content_rowid='id')",
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_logs_fts_insert AFTER INSERT ON audit_logs BEGIN
+        INSERT INTO audit_logs_fts (rowid, action) VALUES (new.id, new.action);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_logs_fts_delete AFTER DELETE ON audit_logs BEGIN
+        INSERT INTO audit_logs_fts (audit_logs_fts, rowid, action) VALUES ('delete', old.id, old.action);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_logs_fts_update AFTER UPDATE OF action ON audit_logs BEGIN
+        INSERT INTO audit_logs_fts (audit_logs_fts, rowid, action) VALUES ('delete', old.id, old.action);
+        INSERT INTO audit_logs_fts (rowid, action) VALUES (new.id, new.action);
+    END
+    """,
+]
+
+# Step 8
+_V8_CONTRIBUTIONS_INDEX = "CREATE INDEX IF NOT EXISTS idx_contributions_student ON contributions (student_id)"
+
+class _Transaction:
+    """DBManager look-alike whose execute does not commit, so helpers that take a db join the step's transaction."""
+    def __init__(self, db):
+        self.conn = db.conn
+        self.cursor = db.cursor
+
+    def execute(self, query, params=None):
+        self.cursor.execute(query, params or ())
+
+    def fetch_one(self, query, params=None):
+        self.cursor.execute(query, params or ())
+        return self.cursor.fetchone()
+
+    def fetch_all(self, query, params=None):
+        self.cursor.execute(query, params or ())
+        return self.cursor.fetchall()
+
+def _columns(db, table):
+    return {col[1] for col in db.fetch_all(f"PRAGMA table_info({table})")}
+
+def _add_columns(db, table, columns):
+    existing = _columns(db, table)
+    for name, definition in columns:
+        if name not in existing:
+            db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            logging.info(f"Added {table}.{name}")
+
+def _table_sql(name):
+    return next(sql for sql in _V1_TABLES if f"IF NOT EXISTS {name} (" in sql)
+
+def _rebuild_table(db, name, computed=None):
+    """Recreate a table with its current definition, copying the rows across.
+
+    For constraints ALTER TABLE cannot add. computed maps new columns to SQL
+    expressions over the old row. The copy is renamed onto the old name so
+    other tables' foreign keys still point at it.
+    """
+    computed = computed or {}
+    old = [col[1] for col in db.fetch_all(f"PRAGMA table_info({name})")]
+    db.execute(_table_sql(name).replace(f"IF NOT EXISTS {name}", f"{name}_new", 1))
+    new = [col[1] for col in db.fetch_all(f"PRAGMA table_info({name}_new)")]
+    targets = [col for col in new if col in computed or col in old]
+    sources = [computed.get(col, col) for col in targets]
+    db.execute(f"INSERT INTO {name}_new ({', '.join(targets)}) SELECT {', '.join(sources)} FROM {name}")
+    db.execute(f"DROP TABLE {name}")
+    db.execute(f"ALTER TABLE {name}_new RENAME TO {name}")
+    logging.info(f"Rebuilt {name} table")
+
+def _base_schema(db):
+    """The first versioned schema's tables, plus what databases from the older schemas (app/scripts, migrate_database.py) are missing."""
+    users = _columns(db, 'users')
+    if users and 'email' not in users:
+        # email is UNIQUE NOT NULL, which ALTER TABLE cannot add
+        _rebuild_table(db, 'users', {
+            'email': "username || '@barsiele.ac.ke'",
+            'created_at': 'created_at' if 'created_at' in users else 'CURRENT_TIMESTAMP',
+        })
+    audit_user = [col for col in db.fetch_all("PRAGMA table_info(audit_logs)") if col[1] == 'user_id']
+    if audit_user and audit_user[0][3]:
+        # Old audit_logs required a user, so failed sign-ins could not be recorded
+        _rebuild_table(db, 'audit_logs')
+    for table_sql in _V1_TABLES:
+        db.execute(table_sql)
+    for table, columns in _V1_ADDED_COLUMNS:
+        _add_columns(db, table, columns)
+
+def _audit_events(db):
+    _add_columns(db, 'audit_logs', _V2_AUDIT_EVENT_COLUMNS)
+    db.execute(_V2_AUDIT_EVENTS_VIEW)
+
+def _indexes(db):
+    for index_sql in _V3_INDEXES:
+        db.execute(index_sql)
+
+def _rollups(db):
+    """Fill the rollups once for databases that predate them."""
+    if db.fetch_one("SELECT 1 FROM kpi_totals WHERE id = 1"):
+        return
+    for sql in _V4_ROLLUPS:
+        db.execute(sql)
+    logging.info("Built KPI rollups")
+
+def _audit_search(db):
+    from .audit_log import FTS5_AVAILABLE
+    if not FTS5_AVAILABLE:
+        logging.warning("SQLite was built without FTS5; audit log search falls back to LIKE")
+        return
+    if db.fetch_one("SELECT 1 FROM sqlite_master WHERE name = 'audit_logs_fts'"):
+        return
+    for sql in _V5_AUDIT_FTS:
+        db.execute(sql)
+    db.execute("INSERT INTO audit_logs_fts (audit_logs_fts) VALUES ('rebuild')")
+    logging.info("Built audit log full-text index")
+
+def _hash_plaintext_passwords(db):
+    """The old app/scripts schema seeded admin with a plaintext password."""
+    from .auth import Auth
+    for user_id, password in db.fetch_all("SELECT id, password FROM users"):
+        if password and not Auth.hasher.identify(password):
+            db.execute("UPDATE users SET password = ? WHERE id = ?", (Auth.hasher.hash(password), user_id))
+            logging.info(f"Hashed plaintext password for user {user_id}")
+
+def _default_data(db):
+    """Default admin and classes for an empty database."""
+    from .auth import Auth
+    if db.fetch_one("SELECT COUNT(*) FROM users")[0] == 0:
+        db.execute("INSERT INTO users (username, email, password, role) VALUES (?, ?, ?, ?)",
+                   ("admin", "admin@barsiele.ac.ke", Auth.hasher.hash("admin123"), "admin"))
+        print("Default admin user created (admin/admin123)")
+    if db.fetch_one("SELECT COUNT(*) FROM classes")[0] == 0:
+        for class_name in ["Grade 1", "Grade 2", "Grade 3", "Grade 4", "Grade 5", "Grade 6", "Grade 7", "Grade 8"]:
+            db.execute("INSERT INTO classes (name) VALUES (?)", (class_name,))
+        print("Default classes created")
+
+def _contributions_index(db):
+    db.execute(_V8_CONTRIBUTIONS_INDEX)
+
+MIGRATIONS = [
+    (1, "base schema", _base_schema),
+    (2, "structured audit events", _audit_events),
+    (3, "indexes", _indexes),
+    (4, "dashboard rollups", _rollups),
+    (5, "audit log full-text search", _audit_search),
+    (6, "hash plaintext passwords", _hash_plaintext_passwords),
+    (7, "default admin and classes", _default_data),
+    (8, "contributions index", _contributions_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(db):
+    return db.fetch_one("PRAGMA user_version")[0]
+
+def pending_migrations(version):
+    return [(number, name) for number, name, _ in MIGRATIONS if number > version]
+
+def migrate(db, target=SCHEMA_VERSION):
+    """Apply every migration above the database's version, each in its own transaction. Returns the new version."""
+    version = schema_version(db)
+    if version == target:
+        return version
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema version {version} is newer than this application ({SCHEMA_VERSION})")
+    step_db = _Transaction(db)
+    for number, name, step in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        try:
+            db.conn.commit()
+            db.cursor.execute("BEGIN IMMEDIATE")
+            step(step_db)
+            # PRAGMA does not take parameters; number is our own integer
+            db.cursor.execute(f"PRAGMA user_version = {int(number)}")
+            db.conn.commit()
+            logging.info(f"Applied migration {number}: {name}")
+        except Exception as e:
+            db.conn.rollback()
+            logging.error(f"Migration {number} ({name}) failed; database left at version {schema_version(db)}: {e}")
+            raise
+    return schema_version(db)
@@ -1,3 +1,7 @@
+# The current schema. migrations.py keeps its own frozen copy of the DDL each
+# step ran; a schema change is a new migration plus the matching edit here
+# (test_migrations checks that a migrated database matches this file).
+
 tables = [
     """
     CREATE TABLE IF NOT EXISTS users (
@@ -106,7 +110,104 @@ tables = [
         ip_address TEXT,
         user_agent TEXT,
         timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+        event_type TEXT,
+        entity_type TEXT,
+        entity_id TEXT,
+        payload TEXT,
         FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
     )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_collections (
+        day TEXT NOT NULL,
+        method TEXT NOT NULL,
+        class_id INTEGER NOT NULL DEFAULT 0,
+        clerk_id INTEGER NOT NULL DEFAULT 0,
+        amount REAL NOT NULL DEFAULT 0.0,
+        payments INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, method, class_id, clerk_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS student_balances (
+        student_id INTEGER PRIMARY KEY,
+        expected REAL NOT NULL DEFAULT 0.0,
+        paid REAL NOT NULL DEFAULT 0.0,
+        FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS kpi_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        expected REAL NOT NULL DEFAULT 0.0,
+        paid REAL NOT NULL DEFAULT 0.0,
+        arrears REAL NOT NULL DEFAULT 0.0,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
     """
-]
\ No newline at end of file
+    CREATE TABLE IF NOT EXISTS arrears_aging (
+        student_id INTEGER PRIMARY KEY,
+        class_id INTEGER,
+        expected REAL NOT NULL DEFAULT 0.0,
+        paid REAL NOT NULL DEFAULT 0.0,
+        bucket_0_30 REAL NOT NULL DEFAULT 0.0,
+        bucket_31_60 REAL NOT NULL DEFAULT 0.0,
+        bucket_61_90 REAL NOT NULL DEFAULT 0.0,
+        bucket_90_plus REAL NOT NULL DEFAULT 0.0,
+        arrears REAL NOT NULL DEFAULT 0.0,
+        as_of TEXT NOT NULL,
+        FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS login_failures (
+        key TEXT NOT NULL,
+        attempted_at REAL NOT NULL
+    )
+    """,
+]
+
+indexes = [
+    "CREATE INDEX IF NOT EXISTS idx_payments_student ON payments (student_id, date, id)",
+    "CREATE INDEX IF NOT EXISTS idx_arrears_aging_class ON arrears_aging (class_id, arrears)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_timestamp ON audit_logs (timestamp, id)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_user ON audit_logs (user_id, timestamp, id)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_entity ON audit_logs (entity_type, entity_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_logs_event ON audit_logs (event_type, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_login_failures_key ON login_failures (key, attempted_at)",
+    "CREATE INDEX IF NOT EXISTS idx_contributions_student ON contributions (student_id)",
+]
+
+# Structured events only, with the acting user's name (free-text rows from
+# before the columns existed have no event_type)
+audit_events_view = """
+    CREATE VIEW IF NOT EXISTS audit_events AS
+    SELECT al.id, al.timestamp, al.user_id, u.username, al.event_type, al.entity_type, al.entity_id,
+           al.payload, al.action AS message, al.ip_address, al.user_agent
+    FROM audit_logs al
+    LEFT JOIN users u ON u.id = al.user_id
+    WHERE al.event_type IS NOT NULL
+"""
+
+# Full-text index over audit_logs.action (external content, kept in step by
+# triggers). Only created when the SQLite build includes FTS5.
+audit_fts = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS audit_logs_fts USING fts5(action, content='audit_logs', content_rowid='id')",
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_logs_fts_insert AFTER INSERT ON audit_logs BEGIN
+        INSERT INTO audit_logs_fts (rowid, action) VALUES (new.id, new.action);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_logs_fts_delete AFTER DELETE ON audit_logs BEGIN
+        INSERT INTO audit_logs_fts (audit_logs_fts, rowid, action) VALUES ('delete', old.id, old.action);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_logs_fts_update AFTER UPDATE OF action ON audit_logs BEGIN
+        INSERT INTO audit_logs_fts (audit_logs_fts, rowid, action) VALUES ('delete', old.id, old.action);
+        INSERT INTO audit_logs_fts (rowid, action) VALUES (new.id, new.action);
+    END
+    """,
+]
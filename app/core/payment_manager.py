@@ -1,6 +1,11 @@
 from datetime import datetime
 import uuid
 from .db_manager import DBManager
+from .kpi_manager import record_collection, expected_fee_sql
+from .aging_manager import update_student_aging
+from .audit_log import audit, audit_event
+from .events import publish, PAYMENT_RECORDED
+from .config import PAYMENT_PAGE_SIZE
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -26,11 +31,15 @@ def record_payment(student_id, amount, method, date, clerk_id, transaction_code=
                 if existing:
                     raise ValueError(f"Bank reference {bank_reference} already exists. Duplicate payment prevented.")
             
-            db.execute(
+            # The payment and its rollup and aging updates commit together, once
+            db.cursor.execute(
                 "INSERT INTO payments (student_id, amount, method, date, clerk_id, receipt_no, transaction_code, bank_reference, mpesa_code, verified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
                 (student_id, amount, method, date, clerk_id, receipt_no, transaction_code, bank_reference, mpesa_code, 1)
             )
             payment_id = db.cursor.lastrowid  # SQLite way to get last inserted ID
+            record_collection(db, student_id, amount, method, date, clerk_id)
+            update_student_aging(db, student_id)
+            db.conn.commit()
             
             # Enhanced logging with verification details
             verification_info = []
@@ -42,7 +51,18 @@ def record_payment(student_id, amount, method, date, clerk_id, transaction_code=
                 verification_info.append(f"Bank: {bank_reference}")
             
             verification_text = " | " + " | ".join(verification_info) if verification_info else ""
-            log_action(clerk_id, f"Recorded payment {receipt_no} for student {student_id} via {method}{verification_text}")
+            audit_event(
+                'payment.recorded', 'payment', payment_id,
+                f"Recorded payment {receipt_no} for student {student_id} via {method}{verification_text}",
+                {'student_id': student_id, 'amount': amount, 'method': method, 'date': date, 'receipt_no': receipt_no,
+                 'transaction_code': transaction_code, 'mpesa_code': mpesa_code, 'bank_reference': bank_reference},
+                user_id=clerk_id
+            )
+            ref_code = {'M-Pesa': mpesa_code, 'Bank Transfer': bank_reference, 'Cheque': transaction_code}.get(method)
+            publish(PAYMENT_RECORDED, payment={
+                'id': payment_id, 'student_id': student_id, 'amount': amount, 'method': method, 'date': date,
+                'clerk_id': clerk_id, 'receipt_no': receipt_no, 'ref_code': ref_code,
+            })
             
             return payment_id, receipt_no
         except Exception as e:
@@ -57,22 +77,45 @@ def get_payments_for_student(student_id):
             logging.error(f"Error fetching payments for student {student_id}: {e}")
             raise
 
+def payment_history_rows(db, student_id, before=None, limit=PAYMENT_PAGE_SIZE):
+    # A running sum only looks at earlier payments, so the keyset bound can
+    # go inside the window and the rows newer than the page are never read.
+    query = f"""
+        WITH history AS (
+            SELECT id, amount, method, date, clerk_id, receipt_no,
+                   SUM(amount) OVER (ORDER BY date, id ROWS UNBOUNDED PRECEDING) AS paid_to_date
+            FROM payments
+            WHERE student_id = ?{" AND (date, id) < (?, ?)" if before else ""}
+        )
+        SELECT h.*,
+               COALESCE((SELECT {expected_fee_sql()} FROM fees f WHERE f.student_id = ?), 0) - h.paid_to_date AS balance_after
+        FROM history h
+        ORDER BY h.date DESC, h.id DESC
+        LIMIT ?
+    """
+    params = [student_id, *(before or ()), student_id, limit]
+    return [dict(row) for row in db.fetch_all(query, params)]
+
+def get_payment_history(student_id, before=None, limit=PAYMENT_PAGE_SIZE):
+    """One page of a student's payments, newest first, older than before=(date, id).
+
+    Each row has paid_to_date and balance_after: the student's running totals
+    once that payment was counted.
+    """
+    with DBManager() as db:
+        try:
+            return payment_history_rows(db, student_id, before, limit)
+        except Exception as e:
+            logging.error(f"Error fetching payment history for student {student_id}: {e}")
+            raise
+
 def get_balance(student_id):
     with DBManager() as db:
         try:
-            # Detect if boarding_fee column exists (pre-migration DBs won't have it)
-            cols = db.fetch_all("PRAGMA table_info(fees)")
-            has_boarding = any(col[1] == 'boarding_fee' for col in cols)
-            if has_boarding:
-                fee = db.fetch_one("SELECT total_fees, bus_fee, COALESCE(boarding_fee, 0) FROM fees WHERE student_id = ?", (student_id,))
-                total_fees = fee[0] if fee else 0
-                bus_fee = fee[1] if fee else 0
-                boarding_fee = fee[2] if fee and len(fee) > 2 else 0
-            else:
-                fee = db.fetch_one("SELECT total_fees, bus_fee FROM fees WHERE student_id = ?", (student_id,))
-                total_fees = fee[0] if fee else 0
-                bus_fee = fee[1] if fee else 0
-                boarding_fee = 0
+            fee = db.fetch_one("SELECT total_fees, bus_fee, COALESCE(boarding_fee, 0) FROM fees WHERE student_id = ?", (student_id,))
+            total_fees = fee[0] if fee else 0
+            bus_fee = fee[1] if fee else 0
+            boarding_fee = fee[2] if fee else 0
             paid_result = db.fetch_one("SELECT SUM(amount) FROM payments WHERE student_id = ?", (student_id,))
             paid = paid_result[0] if paid_result and paid_result[0] else 0
             return total_fees + bus_fee + boarding_fee - paid
@@ -80,11 +123,57 @@ def get_balance(student_id):
             logging.error(f"Error getting balance for student {student_id}: {e}")
             raise
 
-def log_action(user_id, action):
-    """Helper function to log actions"""
+ARREARS_ORDERS = {
+    'class': "class_name, name",
+    'arrears': "arrears DESC, name",
+}
+
+def arrears_query(class_name=None, min_arrears=None, order_by='class', limit=None, student_ids=None):
+    """SQL and params for per-student arrears (fees incl. bus and boarding, minus payments).
+
+    Threshold, ordering and limit are applied in SQL so callers only receive the rows they show.
+    student_ids limits the query to those students (views refreshing the rows a change touched).
+    """
+    expected = expected_fee_sql()
+    filters, params = [], []
+    if class_name:
+        filters.append("c.name = ?")
+        params.append(class_name)
+    if student_ids is not None:
+        filters.append(f"s.id IN ({', '.join('?' * len(student_ids))})")
+        params.extend(student_ids)
+    query = f"""
+        SELECT * FROM (
+            SELECT s.id AS student_id, s.admission_number, s.name,
+                   COALESCE(c.name, 'No Class') AS class_name, s.guardian_contact,
+                   {expected} AS total_expected,
+                   COALESCE(p.paid, 0) AS paid,
+                   {expected} - COALESCE(p.paid, 0) AS arrears
+            FROM students s
+            LEFT JOIN classes c ON s.class_id = c.id
+            LEFT JOIN fees f ON s.id = f.student_id
+            LEFT JOIN (SELECT student_id, SUM(amount) AS paid FROM payments GROUP BY student_id) p ON p.student_id = s.id
+            {"WHERE " + " AND ".join(filters) if filters else ""}
+        )
+    """
+    if min_arrears is not None:
+        query += " WHERE arrears > ?"
+        params.append(min_arrears)
+    query += f" ORDER BY {ARREARS_ORDERS[order_by]}"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+def get_arrears(class_name=None, min_arrears=None, order_by='class', limit=None, student_ids=None):
     with DBManager() as db:
         try:
-            db.execute("INSERT INTO audit_logs (user_id, action) VALUES (?, ?)", (user_id, action))
+            query, params = arrears_query(class_name, min_arrears, order_by, limit, student_ids)
+            return db.fetch_all(query, params)
         except Exception as e:
-            logging.error(f"Error logging action: {e}")
-            # Don't raise here as it's not critical
\ No newline at end of file
+            logging.error(f"Error fetching arrears: {e}")
+            raise
+
+def log_action(user_id, action, critical=False):
+    """Helper function to log actions (queued; see audit_log)"""
+    return audit(user_id, action, critical=critical)
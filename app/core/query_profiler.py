@@ -0,0 +1,178 @@
+import atexit
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+from . import db_manager
+from .config import SLOW_QUERY_MS, SLOW_QUERY_LOG, SLOW_QUERY_KEEP, QUERY_PROFILE_PATH
+from .startup import normalize_sql
+
+# Opt-in statement profiling for DBManager. Set QUERY_PROFILE=1 (or call
+# query_profiler.enable()) and every execute/fetch_one/fetch_all is recorded
+# against its normalized text, with the calling function and the UI screen
+# (the nearest app/ui frame) that led to it; connection opens are timed too.
+# Statements slower than SLOW_QUERY_MS are written with their EXPLAIN QUERY
+# PLAN to the slow-query log. Statements run on db.cursor / db.conn directly
+# (bulk inserts, CSV streaming) are not seen.
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DB_MANAGER_FILE = os.path.abspath(db_manager.__file__)
+_UI_DIR = os.path.join(_APP_DIR, 'ui') + os.sep
+
+def _where(frame, line=True):
+    where = f"{os.path.relpath(frame.f_code.co_filename, _APP_DIR)}:{frame.f_code.co_name}"
+    return f"{where}:{frame.f_lineno}" if line else where
+
+def _origin():
+    """(caller, screen): the first frame outside db_manager (with its line), and the nearest app/ui function."""
+    frame = sys._getframe(2)
+    while frame and os.path.abspath(frame.f_code.co_filename) == _DB_MANAGER_FILE:
+        frame = frame.f_back
+    caller = _where(frame) if frame else None
+    while frame and not os.path.abspath(frame.f_code.co_filename).startswith(_UI_DIR):
+        frame = frame.f_back
+    return caller, _where(frame, line=False) if frame else None
+
+def _top(items, key, top):
+    return sorted(items, key=key, reverse=True)[:top]
+
+class QueryProfiler:
+    def __init__(self, slow_ms=SLOW_QUERY_MS, keep=SLOW_QUERY_KEEP, slow_log=SLOW_QUERY_LOG, save_path=QUERY_PROFILE_PATH):
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self.save_path = save_path
+        self._lock = threading.Lock()
+        self._save_registered = False
+        self.started = None
+        self.slow = deque(maxlen=keep)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statements = {}
+            self.screens = {}
+            self.connections = {'opened': 0, 'seconds': 0.0, 'max': 0.0, 'callers': {}}
+            self.slow.clear()
+            self.started = datetime.now().isoformat(timespec='seconds')
+
+    @property
+    def enabled(self):
+        return db_manager.profiler is self
+
+    def enable(self):
+        if self.save_path and not self._save_registered:
+            atexit.register(self.save)
+            self._save_registered = True
+        db_manager.profiler = self
+
+    def disable(self):
+        if self.enabled:
+            db_manager.profiler = None
+
+    def connection_opened(self, seconds):
+        caller, screen = _origin()
+        with self._lock:
+            stats = self.connections
+            stats['opened'] += 1
+            stats['seconds'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['callers'][caller] = stats['callers'].get(caller, 0) + 1
+
+    def record(self, conn, sql, params, seconds, rows):
+        """Called by DBManager after each statement it runs."""
+        caller, screen = _origin()
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = {'sql': key, 'calls': 0, 'seconds': 0.0, 'max': 0.0, 'rows': 0, 'callers': {}}
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['rows'] += max(rows, 0)
+            stats['callers'][caller] = stats['callers'].get(caller, 0) + 1
+            if screen:
+                per_screen = self.screens.setdefault(screen, {'screen': screen, 'calls': 0, 'seconds': 0.0})
+                per_screen['calls'] += 1
+                per_screen['seconds'] += seconds
+        if seconds * 1000 >= self.slow_ms:
+            self._log_slow(conn, sql, params, seconds, rows, caller, screen)
+
+    def _log_slow(self, conn, sql, params, seconds, rows, caller, screen):
+        try:
+            plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params or ())]
+        except sqlite3.Error:
+            plan = []
+        entry = {'at': datetime.now().isoformat(timespec='seconds'), 'ms': round(seconds * 1000, 2), 'rows': rows,
+                 'sql': " ".join(sql.split()), 'params': [str(p) for p in (params or ())],
+                 'caller': caller, 'screen': screen, 'plan': plan}
+        with self._lock:
+            self.slow.append(entry)
+            if self.slow_log:
+                os.makedirs(os.path.dirname(self.slow_log) or '.', exist_ok=True)
+                with open(self.slow_log, 'a', encoding='utf-8') as f:
+                    f.write(f"{entry['at']} - {entry['ms']} ms, {rows} rows, {caller} (screen {screen or '-'})\n"
+                            f"    {entry['sql']}\n    params: {entry['params']}\n    plan: {' | '.join(plan) or '-'}\n")
+
+    def summary(self, top=15):
+        """Top statements by total time and by calls, busiest screens, connection opens and recent slow statements."""
+        def statement(s):
+            return {'sql': s['sql'], 'calls': s['calls'], 'total_ms': round(s['seconds'] * 1000, 2),
+                    'avg_ms': round(s['seconds'] * 1000 / s['calls'], 3), 'max_ms': round(s['max'] * 1000, 2),
+                    'rows': s['rows'], 'callers': dict(_top(s['callers'].items(), lambda c: c[1], 3))}
+        with self._lock:
+            statements = list(self.statements.values())
+            screens = [dict(s) for s in self.screens.values()]
+            connections = dict(self.connections)
+            slow = list(self.slow)
+        return {
+            'started': self.started,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'slow_ms': self.slow_ms,
+            'statements': len(statements),
+            'by_total': [statement(s) for s in _top(statements, lambda s: s['seconds'], top)],
+            'by_calls': [statement(s) for s in _top(statements, lambda s: s['calls'], top)],
+            'screens': [{'screen': s['screen'], 'calls': s['calls'], 'total_ms': round(s['seconds'] * 1000, 2)}
+                        for s in _top(screens, lambda s: s['seconds'], top)],
+            'connections': {'opened': connections['opened'], 'total_ms': round(connections['seconds'] * 1000, 2),
+                            'max_ms': round(connections['max'] * 1000, 2),
+                            'callers': dict(_top(connections['callers'].items(), lambda c: c[1], top))},
+            'slow': slow[-top:],
+        }
+
+    def save(self, path=None, top=50):
+        """Write summary() as JSON to path or save_path (done at exit once enabled, for the query_profile script)."""
+        path = path or self.save_path
+        if not path or (not self.statements and not self.connections['opened']):
+            return None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(top), f, indent=2)
+        return path
+
+query_profiler = QueryProfiler()
+
+def format_summary(summary, top=15):
+    """Plain-text report of a summary() dict."""
+    lines = [f"Query profile from {summary['started']} to {summary['created']}: "
+             f"{summary['statements']} distinct statements, slow threshold {summary['slow_ms']} ms"]
+    for title, key in (("Top statements by total time", 'by_total'), ("Top statements by calls", 'by_calls')):
+        lines += ["", title, f"  {'calls':>7} {'total ms':>10} {'avg ms':>8} {'max ms':>8} {'rows':>8}  statement / top caller"]
+        for s in summary[key][:top]:
+            caller = next(iter(s['callers']), '')
+            lines.append(f"  {s['calls']:>7} {s['total_ms']:>10.1f} {s['avg_ms']:>8.2f} {s['max_ms']:>8.1f} {s['rows']:>8}  {s['sql'][:100]}")
+            lines.append(f"  {'':>45}{caller}")
+    lines += ["", "Screens by database time"]
+    lines += [f"  {s['calls']:>7} {s['total_ms']:>10.1f}  {s['screen']}" for s in summary['screens'][:top]]
+    conns = summary['connections']
+    lines += ["", f"Connections opened: {conns['opened']} ({conns['total_ms']:.1f} ms total, max {conns['max_ms']:.1f} ms)"]
+    lines += [f"  {count:>7}  {caller}" for caller, count in list(conns['callers'].items())[:top]]
+    if summary['slow']:
+        lines += ["", "Recent slow statements"]
+        for entry in summary['slow'][-top:]:
+            lines.append(f"  {entry['at']} {entry['ms']} ms {entry['caller']}: {entry['sql'][:100]}")
+            lines.append(f"      plan: {' | '.join(entry['plan']) or '-'}")
+    return lines
@@ -1,5 +1,5 @@
-from fpdf import FPDF
 from .db_manager import DBManager
+from .reference_data import reference_data
 import os
 from datetime import datetime
 import logging
@@ -18,12 +18,14 @@ class ReceiptGenerator:
                 
                 student_id = payment[1]  # student_id is at index 1
                 student = db.fetch_one("SELECT name, admission_number FROM students WHERE id = ?", (student_id,))
-                clerk = db.fetch_one("SELECT username FROM users WHERE id = ?", (payment[5],))  # clerk_id is at index 5
+                clerk = reference_data.username(payment[5])  # clerk_id is at index 5
                 
                 if not student:
                     logging.error(f"Student {student_id} not found")
                     return None
                 
+                # fpdf (and Pillow behind it) is only loaded once a receipt is printed
+                from fpdf import FPDF
                 pdf = FPDF()
                 pdf.add_page()
                 
@@ -72,7 +74,7 @@ class ReceiptGenerator:
                 if len(payment) > 9 and payment[9]:  # mpesa_code
                     pdf.cell(200, 8, txt=f"M-Pesa Code: {payment[9]}", ln=1)
                 
-                pdf.cell(200, 8, txt=f"Processed by: {clerk[0] if clerk else 'Unknown'}", ln=1)
+                pdf.cell(200, 8, txt=f"Processed by: {clerk or 'Unknown'}", ln=1)
                 pdf.ln(5)
                 
                 # Footer with school branding
@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+from typing import NamedTuple
+from .db_manager import DBManager
+from .events import publish, subscribe, REFERENCE_CHANGED
+
+# Read-through cache for the small tables every screen looks up: classes,
+# bus locations, per-class food requirements and users. Each kind is loaded
+# with one query the first time it is asked for and then served from memory,
+# with name -> id indexes, until a write publishes REFERENCE_CHANGED for it.
+# Writes made by another process are not seen until the next invalidation.
+
+class ClassInfo(NamedTuple):
+    id: int
+    name: str
+
+class BusLocation(NamedTuple):
+    id: int
+    name: str
+    fee_per_term: float
+
+class UserInfo(NamedTuple):
+    id: int
+    username: str
+    role: str
+
+NO_FOOD_REQUIREMENTS = {'maize_kg': 0.0, 'beans_kg': 0.0, 'millet_kg': 0.0}
+
+def _load_classes(db):
+    rows = [ClassInfo(*row) for row in db.fetch_all("SELECT id, name FROM classes ORDER BY name")]
+    return {'rows': rows, 'by_id': {c.id: c for c in rows}, 'by_name': {c.name: c for c in rows}}
+
+def _load_bus_locations(db):
+    rows = [BusLocation(*row) for row in db.fetch_all("SELECT id, name, fee_per_term FROM bus_locations ORDER BY name")]
+    return {'rows': rows, 'by_name': {b.name: b for b in rows}}
+
+def _load_food_requirements(db):
+    rows = db.fetch_all("SELECT class_id, maize_kg, beans_kg, millet_kg FROM food_requirements")
+    return {'by_class': {cid: {'maize_kg': maize, 'beans_kg': beans, 'millet_kg': millet}
+                         for cid, maize, beans, millet in rows}}
+
+def _load_users(db):
+    rows = [UserInfo(*row) for row in db.fetch_all("SELECT id, username, role FROM users ORDER BY username")]
+    return {'rows': rows, 'by_id': {u.id: u for u in rows}, 'by_name': {u.username: u for u in rows}}
+
+LOADERS = {
+    'classes': _load_classes,
+    'bus_locations': _load_bus_locations,
+    'food_requirements': _load_food_requirements,
+    'users': _load_users,
+}
+
+class ReferenceData:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._db_path = None
+
+    def _get(self, kind):
+        with self._lock:
+            # Tests and tools switch databases by changing SQLITE_PATH
+            db_path = os.getenv('SQLITE_PATH')
+            if db_path != self._db_path:
+                self._cache.clear()
+                self._db_path = db_path
+            if kind not in self._cache:
+                with DBManager() as db:
+                    try:
+                        self._cache[kind] = LOADERS[kind](db)
+                    except Exception as e:
+                        logging.error(f"Error loading {kind} reference data: {e}")
+                        raise
+            return self._cache[kind]
+
+    def invalidate(self, kind=None):
+        """Drop one kind (or everything); the next read reloads it."""
+        with self._lock:
+            if kind is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(kind, None)
+
+    def classes(self):
+        """Every class as ClassInfo, ordered by name."""
+        return list(self._get('classes')['rows'])
+
+    def class_id(self, name):
+        info = self._get('classes')['by_name'].get(name)
+        return info.id if info else None
+
+    def class_name(self, class_id):
+        info = self._get('classes')['by_id'].get(class_id)
+        return info.name if info else None
+
+    def bus_locations(self):
+        """Every bus location as BusLocation, ordered by name."""
+        return list(self._get('bus_locations')['rows'])
+
+    def bus_fee(self, name):
+        """Fee per term for a bus location, or None when there is no such location."""
+        location = self._get('bus_locations')['by_name'].get(name)
+        return float(location.fee_per_term) if location else None
+
+    def food_requirements(self, class_id):
+        """Per-student food quotas for a class (zeros when none are set)."""
+        return dict(self._get('food_requirements')['by_class'].get(class_id, NO_FOOD_REQUIREMENTS))
+
+    def all_food_requirements(self):
+        return {cid: dict(req) for cid, req in self._get('food_requirements')['by_class'].items()}
+
+    def users(self):
+        """Every user as UserInfo, ordered by username."""
+        return list(self._get('users')['rows'])
+
+    def user_id(self, username):
+        info = self._get('users')['by_name'].get(username)
+        return info.id if info else None
+
+    def username(self, user_id):
+        info = self._get('users')['by_id'].get(user_id)
+        return info.username if info else None
+
+reference_data = ReferenceData()
+
+def _reference_changed(kind):
+    reference_data.invalidate(kind)
+
+subscribe(REFERENCE_CHANGED, _reference_changed)
+
+def add_class(name):
+    with DBManager() as db:
+        try:
+            db.execute("INSERT OR IGNORE INTO classes (name) VALUES (?)", (name,))
+            logging.info(f"Added class {name}")
+        except Exception as e:
+            logging.error(f"Error adding class {name}: {e}")
+            raise
+    publish(REFERENCE_CHANGED, kind='classes')
+
+def delete_class(name):
+    with DBManager() as db:
+        try:
+            db.execute("DELETE FROM classes WHERE name = ?", (name,))
+            logging.info(f"Deleted class {name}")
+        except Exception as e:
+            logging.error(f"Error deleting class {name}: {e}")
+            raise
+    publish(REFERENCE_CHANGED, kind='classes')
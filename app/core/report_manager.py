@@ -1,11 +1,64 @@
 import csv
 import os
 from .db_manager import DBManager
+from .aging_manager import aging_query, ensure_current
+from .payment_manager import arrears_query
 import logging
 from datetime import datetime
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+SCHOOL_HEADER = ["Barsiele Sunrise Academy", "P.O Box 117 LONDIANI", "Together we Rise"]
+EXPORT_BATCH_SIZE = 500
+
+def export_query_csv(filename, headers, query, params=(), title=None, notes=(), columns=None):
+    """Stream a query straight to CSV in batches, writing raw typed values.
+
+    columns picks and orders fields by name from each row; by default every column is written.
+    Returns (filename, rows_written).
+    """
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    with DBManager() as db:
+        try:
+            cursor = db.conn.execute(query, params)
+            rows_written = 0
+            with open(filename, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if title:
+                    writer.writerow([f"{SCHOOL_HEADER[0]} - {title}"])
+                    for line in SCHOOL_HEADER[1:]:
+                        writer.writerow([line])
+                    writer.writerow([])
+                    writer.writerow([f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"])
+                    for note in notes:
+                        writer.writerow([note])
+                    writer.writerow([])
+                writer.writerow(headers)
+                while True:
+                    batch = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                    if not batch:
+                        break
+                    if columns:
+                        batch = [[row[c] for c in columns] for row in batch]
+                    writer.writerows(batch)
+                    rows_written += len(batch)
+            logging.info(f"Exported {rows_written} rows to {filename}")
+            return filename, rows_written
+        except Exception as e:
+            logging.error(f"Error exporting {filename}: {e}")
+            raise
+
+def export_filename(prefix):
+    return f"reports/{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+ARREARS_EXPORT_COLUMNS = ['admission_number', 'name', 'class_name', 'guardian_contact', 'total_expected', 'paid', 'arrears']
+ARREARS_EXPORT_HEADERS = ['Admission No', 'Name', 'Class', 'Guardian Contact', 'Total Fees', 'Paid', 'Arrears']
+
+def export_arrears(filename, title, notes=(), class_name=None, min_arrears=None, order_by='class'):
+    """Export the same rows get_arrears() returns for these filters."""
+    query, params = arrears_query(class_name, min_arrears, order_by)
+    return export_query_csv(filename, ARREARS_EXPORT_HEADERS, query, params, title, notes, ARREARS_EXPORT_COLUMNS)
+
 def generate_payment_summary(start_date, end_date):
     os.makedirs('reports', exist_ok=True)
     with DBManager() as db:
@@ -88,4 +141,17 @@ def generate_class_report(class_id: int):
             return filename
         except Exception as e:
             logging.error(f"Error generating class report: {e}")
-            raise
\ No newline at end of file
+            raise
+
+def generate_aging_report(class_id=None):
+    """Export arrears split into 0-30/31-60/61-90/90+ day buckets for the school or one class."""
+    ensure_current()
+    query, params = aging_query(class_id)
+    scope = f"class_{class_id}" if class_id else "all"
+    filename, _ = export_query_csv(
+        export_filename(f"arrears_aging_{scope}"),
+        ['Adm No', 'Name', 'Class', '0-30 Days', '31-60 Days', '61-90 Days', '90+ Days', 'Total Arrears'],
+        query, params
+    )
+    logging.info(f"Generated arrears aging report: {filename}")
+    return filename
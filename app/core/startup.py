@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Wall-clock phases of getting to a usable window: launch to login screen,
+# and sign-in to the first tab on screen. Each run is logged as one line,
+# e.g. "Login to usable: authenticate 0.310s, main window 0.042s, ... (total 0.51s)".
+
+class StartupTimer:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.runs = []
+        self.start()
+
+    def start(self):
+        """Begin a new run; phases are timed from here."""
+        self._started = self._last = self.clock()
+        self.phases = []
+        self.running = True
+
+    def mark(self, phase):
+        """Record the time since the previous mark (or start) as phase; ignored once the run is reported."""
+        if not self.running:
+            return
+        now = self.clock()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self, title):
+        """Log the phases so far, close the run and return it as a dict."""
+        self.running = False
+        run = {
+            'title': title,
+            'phases': [{'phase': phase, 'seconds': round(seconds, 4)} for phase, seconds in self.phases],
+            'total': round(self._last - self._started, 4),
+        }
+        self.runs.append(run)
+        logging.info(f"{title}: " + ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phases)
+                     + f" (total {run['total']:.2f}s)")
+        return run
+
+startup_timer = StartupTimer()
+
+# run.py --profile-startup: where launch time goes, as a JSON report that can
+# be diffed between releases. Imports are timed by wrapping module loaders,
+# DB queries are traced on every DBManager connection, and the repeated
+# logging.basicConfig / load_dotenv calls are counted. Everything is filed
+# under the startup_timer phase that was open at the time.
+
+class _TimedLoader:
+    """Loader proxy that times creating and executing its module."""
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        # Extension modules do their work here
+        create = getattr(self._loader, 'create_module', None)
+        return self._profiler._timed(spec.name, create, spec) if create else None
+
+    def exec_module(self, module):
+        self._profiler._timed(module.__name__, self._loader.exec_module, module)
+
+_SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+def normalize_sql(sql):
+    """Statement text with literals replaced by ?, so repeats of one query group together."""
+    return " ".join(_SQL_LITERAL.sub("?", sql).split())
+
+class StartupProfiler:
+    """Meta path finder plus hooks that record imports, queries and setup calls until uninstalled."""
+    def __init__(self, timer=None, clock=time.perf_counter):
+        self.timer = timer or startup_timer
+        self.clock = clock
+        self.imports = {}
+        self.queries = {}
+        self.calls = {}
+        self.widget_costs = []
+        self._local = threading.local()
+        self._patched = []
+        self.active = False
+
+    def _phase(self):
+        # Index of the phase that is still open; names are resolved in report()
+        return len(self.timer.phases)
+
+    def _timed(self, name, fn, *args):
+        if not self.active:
+            return fn(*args)
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        started = self.clock()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = self.clock() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            record = self.imports.setdefault(name, {'cumulative': 0.0, 'self': 0.0, 'phase': self._phase()})
+            record['cumulative'] += elapsed
+            record['self'] += elapsed - children
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def _trace(self, conn):
+        def record(sql):
+            key = (self._phase(), normalize_sql(sql))
+            self.queries[key] = self.queries.get(key, 0) + 1
+        conn.set_trace_callback(record)
+
+    def _count(self, owner, attr, label):
+        original = getattr(owner, attr)
+        def counted(*args, **kwargs):
+            started = self.clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                stats = self.calls.setdefault(label, {'count': 0, 'seconds': 0.0})
+                stats['count'] += 1
+                stats['seconds'] += self.clock() - started
+        setattr(owner, attr, counted)
+        self._patched.append((owner, attr, original))
+
+    def install(self):
+        """Start a timer run and begin recording. Install before importing the application."""
+        self.timer.start()
+        self.active = True
+        sys.meta_path.insert(0, self)
+        self._count(logging, 'basicConfig', 'logging.basicConfig')
+        try:
+            import dotenv
+            self._count(dotenv, 'load_dotenv', 'dotenv.load_dotenv')
+        except ImportError:
+            pass
+        # Importing the hooks list goes through the finder, so it is timed too
+        from .db_manager import connection_hooks
+        connection_hooks.append(self._trace)
+
+    def uninstall(self):
+        self.active = False
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        for owner, attr, original in reversed(self._patched):
+            setattr(owner, attr, original)
+        self._patched = []
+        from .db_manager import connection_hooks
+        if self._trace in connection_hooks:
+            connection_hooks.remove(self._trace)
+
+    def widgets(self, name, widget, phase=None):
+        """Record a widget built in phase (default: the one just marked) and the child widgets it created."""
+        from PyQt6.QtWidgets import QWidget
+        phase, seconds = next(p for p in reversed(self.timer.phases) if phase is None or p[0] == phase)
+        self.widget_costs.append({'widget': name, 'phase': phase, 'seconds': round(seconds, 4),
+                                  'children': len(widget.findChildren(QWidget))})
+
+    def report(self):
+        """The recording so far as a dict. Lists are in a stable order so two reports diff cleanly."""
+        import platform
+        import sqlite3
+        names = [phase for phase, _ in self.timer.phases] + ['(unfinished)']
+        phases = [{'phase': phase, 'seconds': round(seconds, 4), 'queries': 0, 'imports': 0}
+                  for phase, seconds in self.timer.phases]
+        phases.append({'phase': '(unfinished)', 'seconds': 0.0, 'queries': 0, 'imports': 0})
+        for (index, _), count in self.queries.items():
+            phases[index]['queries'] += count
+        for record in self.imports.values():
+            phases[record['phase']]['imports'] += 1
+        if not phases[-1]['queries'] and not phases[-1]['imports']:
+            phases.pop()
+        return {
+            'format': 1,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'total_seconds': round(self.timer._last - self.timer._started, 4),
+            'phases': phases,
+            'imports': [{'module': name, 'cumulative': round(record['cumulative'], 4), 'self': round(record['self'], 4),
+                         'phase': names[record['phase']]} for name, record in sorted(self.imports.items())],
+            'calls': {label: {'count': stats['count'], 'seconds': round(stats['seconds'], 4)}
+                      for label, stats in sorted(self.calls.items())},
+            'queries': [{'phase': names[index], 'sql': sql, 'count': count}
+                        for (index, sql), count in sorted(self.queries.items())],
+            'widgets': self.widget_costs,
+        }
+
+    def write(self, path):
+        report = self.report()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        return report
+
+def summarize(report, top=15):
+    """Human-readable lines for a profile report: phases, slowest imports, setup calls and queries."""
+    lines = [f"Total {report['total_seconds']:.3f}s"]
+    for phase in report['phases']:
+        lines.append(f"  {phase['phase']:<24} {phase['seconds']:>8.3f}s  {phase['imports']:>4} imports  {phase['queries']:>4} queries")
+    lines.append(f"Slowest imports (cumulative, of {len(report['imports'])}):")
+    for record in sorted(report['imports'], key=lambda r: r['cumulative'], reverse=True)[:top]:
+        lines.append(f"  {record['module']:<48} {record['cumulative']:>8.3f}s  self {record['self']:.3f}s")
+    for label, stats in report['calls'].items():
+        lines.append(f"{label}: {stats['count']} calls, {stats['seconds']:.3f}s")
+    lines.append(f"DB queries: {sum(q['count'] for q in report['queries'])}")
+    lines.append("Widgets:")
+    for widget in report['widgets']:
+        lines.append(f"  {widget['widget']:<24} {widget['seconds']:>8.3f}s  {widget['children']} child widgets")
+    return lines
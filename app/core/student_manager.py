@@ -1,8 +1,31 @@
 from .db_manager import DBManager
+from .kpi_manager import remove_student, expected_fee_sql
+from .aging_manager import update_student_aging
+from .audit_log import audit_event
+from .events import publish, subscribe, STUDENT_CHANGED, PAYMENT_RECORDED, FEE_CHANGED, REFERENCE_CHANGED
+from .payment_manager import payment_history_rows
+from .config import PROFILE_CACHE_SECONDS, PAYMENT_PAGE_SIZE
 import logging
+import threading
+import time
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+STUDENT_SELECT = """
+    SELECT s.id, s.admission_number, s.name, s.class_id, s.guardian_contact,
+           s.profile_picture, s.bus_location, COALESCE(c.name, 'No Class') as class_name
+    FROM students s
+    LEFT JOIN classes c ON s.class_id = c.id
+"""
+
+# Student columns copied into arrears_aging; fees themselves live in the fees table
+AGED_FIELDS = {'class_id'}
+
+def _student_row(db, student_id):
+    """One student as get_all_students lists them, as a dict for event payloads."""
+    row = db.fetch_one(STUDENT_SELECT + " WHERE s.id = ?", (student_id,))
+    return dict(row) if row else None
+
 def create_student(admission_number, name, class_id, guardian_contact, profile_picture=None, bus_location=None):
     with DBManager() as db:
         try:
@@ -13,6 +36,10 @@ def create_student(admission_number, name, class_id, guardian_contact, profile_p
             )
             student_id = db.cursor.lastrowid  # SQLite way to get last inserted ID
             logging.info(f"Created student: {name} (ID: {student_id})")
+            audit_event('student.created', 'student', student_id, f"Created student {admission_number} {name}",
+                        {'admission_number': admission_number, 'name': name, 'class_id': class_id,
+                         'guardian_contact': guardian_contact, 'bus_location': bus_location})
+            publish(STUDENT_CHANGED, action='created', student=_student_row(db, student_id), previous=None)
             return student_id
         except Exception as e:
             logging.error(f"Error creating student {name}: {e}")
@@ -23,14 +50,38 @@ def update_student(student_id, **kwargs):
         return
     with DBManager() as db:
         try:
+            previous = _student_row(db, student_id)
             set_clause = ', '.join(f"{k} = ?" for k in kwargs)
             params = list(kwargs.values()) + [student_id]
             db.execute(f"UPDATE students SET {set_clause} WHERE id = ?", params)
+            if AGED_FIELDS.intersection(kwargs):
+                update_student_aging(db, student_id)
             logging.info(f"Updated student {student_id}")
+            audit_event('student.updated', 'student', student_id,
+                        f"Updated student {student_id}: {', '.join(kwargs)}",
+                        {k: v for k, v in kwargs.items() if k != 'profile_picture'})
+            publish(STUDENT_CHANGED, action='updated', student=_student_row(db, student_id), previous=previous)
         except Exception as e:
             logging.error(f"Error updating student {student_id}: {e}")
             raise
 
+def delete_student(student_id):
+    with DBManager() as db:
+        try:
+            previous = _student_row(db, student_id)
+            remove_student(db, student_id)
+            db.execute("DELETE FROM students WHERE id = ?", (student_id,))
+            update_student_aging(db, student_id)
+            logging.info(f"Deleted student {student_id}")
+            if previous:
+                audit_event('student.deleted', 'student', student_id,
+                            f"Deleted student {previous['admission_number']} {previous['name']}",
+                            {k: previous[k] for k in ('admission_number', 'name', 'class_id')})
+                publish(STUDENT_CHANGED, action='deleted', student=None, previous=previous)
+        except Exception as e:
+            logging.error(f"Error deleting student {student_id}: {e}")
+            raise
+
 def get_student(student_id):
     with DBManager() as db:
         try:
@@ -42,13 +93,7 @@ def get_student(student_id):
 def get_all_students():
     with DBManager() as db:
         try:
-            return db.fetch_all("""
-                SELECT s.id, s.admission_number, s.name, s.class_id, s.guardian_contact, 
-                       s.profile_picture, s.bus_location, COALESCE(c.name, 'No Class') as class_name 
-                FROM students s 
-                LEFT JOIN classes c ON s.class_id = c.id 
-                ORDER BY c.name, s.name
-            """)
+            return db.fetch_all(STUDENT_SELECT + " ORDER BY c.name, s.name")
         except Exception as e:
             logging.error(f"Error fetching all students: {e}")
             raise
@@ -59,14 +104,8 @@ def search_students(query):
     with DBManager() as db:
         try:
             search_pattern = f"%{query}%"
-            return db.fetch_all("""
-                SELECT s.id, s.admission_number, s.name, s.class_id, s.guardian_contact, 
-                       s.profile_picture, s.bus_location, COALESCE(c.name, 'No Class') as class_name 
-                FROM students s 
-                LEFT JOIN classes c ON s.class_id = c.id 
-                WHERE s.name LIKE ? OR s.admission_number LIKE ? 
-                ORDER BY c.name, s.name
-            """, (search_pattern, search_pattern))
+            return db.fetch_all(STUDENT_SELECT + " WHERE s.name LIKE ? OR s.admission_number LIKE ? ORDER BY c.name, s.name",
+                                (search_pattern, search_pattern))
         except Exception as e:
             logging.error(f"Error searching students for query '{query}': {e}")
             raise
@@ -78,4 +117,97 @@ def get_highest_admission_number():
             return result[0] or "ADM000"
         except Exception as e:
             logging.error(f"Error fetching highest admission number: {e}")
-            raise
\ No newline at end of file
+            raise
+
+# Profiles opened in the last PROFILE_CACHE_SECONDS, by student id. Entries
+# are dropped as soon as an event says the student, their fees or payments,
+# or the class reference data changed.
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+def invalidate_student_profile(student_id=None):
+    """Forget one cached profile, or all of them."""
+    with _profiles_lock:
+        if student_id is None:
+            _profiles.clear()
+        else:
+            _profiles.pop(student_id, None)
+
+def _payment_recorded(payment):
+    invalidate_student_profile(payment['student_id'])
+
+def _student_changed(action, student, previous):
+    invalidate_student_profile((student or previous)['id'])
+
+def _fees_changed(student_ids, class_id):
+    for student_id in student_ids:
+        invalidate_student_profile(student_id)
+
+def _reference_changed(kind):
+    if kind in ('classes', 'food_requirements'):
+        invalidate_student_profile()
+
+subscribe(PAYMENT_RECORDED, _payment_recorded)
+subscribe(STUDENT_CHANGED, _student_changed)
+subscribe(FEE_CHANGED, _fees_changed)
+subscribe(REFERENCE_CHANGED, _reference_changed)
+
+def _load_student_profile(db, student_id):
+    student = db.fetch_one(f"""
+        SELECT s.id, s.admission_number, s.name, s.class_id, s.guardian_contact, s.profile_picture, s.bus_location,
+               COALESCE(c.name, 'No Class') AS class_name,
+               COALESCE(f.total_fees, 0) AS total_fees, COALESCE(f.bus_fee, 0) AS bus_fee,
+               COALESCE(f.boarding_fee, 0) AS boarding_fee, {expected_fee_sql()} AS expected,
+               COALESCE(r.maize_kg, 0) AS maize_kg, COALESCE(r.beans_kg, 0) AS beans_kg,
+               COALESCE(r.millet_kg, 0) AS millet_kg
+        FROM students s
+        LEFT JOIN classes c ON s.class_id = c.id
+        LEFT JOIN fees f ON f.student_id = s.id
+        LEFT JOIN food_requirements r ON r.class_id = s.class_id
+        WHERE s.id = ?
+    """, (student_id,))
+    if student is None:
+        return None
+    student = dict(student)
+    # One extra row tells the profile whether older pages exist
+    payments = payment_history_rows(db, student_id, limit=PAYMENT_PAGE_SIZE + 1)
+    contributions = [dict(c) for c in db.fetch_all(
+        "SELECT item, quantity, cash_equivalent FROM contributions WHERE student_id = ? ORDER BY id", (student_id,))]
+    paid = payments[0]['paid_to_date'] if payments else 0
+    return {
+        'student': {k: student[k] for k in ('id', 'admission_number', 'name', 'class_id', 'guardian_contact',
+                                            'profile_picture', 'bus_location', 'class_name')},
+        'fee': {k: student[k] for k in ('total_fees', 'bus_fee', 'boarding_fee')},
+        'expected': student['expected'],
+        'paid': paid,
+        'balance': student['expected'] - paid,
+        'payments': payments[:PAYMENT_PAGE_SIZE],
+        'more_payments': len(payments) > PAYMENT_PAGE_SIZE,
+        'contributions': contributions,
+        'food_requirements': {k: student[k] for k in ('maize_kg', 'beans_kg', 'millet_kg')},
+    }
+
+def get_student_profile(student_id, use_cache=True):
+    """Everything the profile screen shows, read over one connection.
+
+    Returns a dict with student, fee, expected, paid, balance, payments (the
+    newest page, see get_payment_history), more_payments, contributions and
+    food_requirements, or None for an unknown student.
+    Cached for PROFILE_CACHE_SECONDS; treat the result as read-only.
+    """
+    now = time.monotonic()
+    if use_cache:
+        with _profiles_lock:
+            cached = _profiles.get(student_id)
+        if cached and now - cached[0] < PROFILE_CACHE_SECONDS:
+            return cached[1]
+    with DBManager() as db:
+        try:
+            profile = _load_student_profile(db, student_id)
+        except Exception as e:
+            logging.error(f"Error loading profile for student {student_id}: {e}")
+            raise
+    if profile is not None and use_cache:
+        with _profiles_lock:
+            _profiles[student_id] = (now, profile)
+    return profile
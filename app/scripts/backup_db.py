@@ -1,4 +1,4 @@
-import shutil
+import sqlite3
 import os
 from datetime import datetime
 from pathlib import Path
@@ -6,11 +6,42 @@ import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Pages copied per step of the online backup; between steps the source is
+# unlocked for BACKUP_STEP_SLEEP seconds so clerks can keep writing.
+BACKUP_PAGES_PER_STEP = int(os.getenv('BACKUP_PAGES_PER_STEP', '256'))
+BACKUP_STEP_SLEEP = float(os.getenv('BACKUP_STEP_SLEEP', '0.01'))
+
+def online_backup(db_path, backup_path, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP, progress=None):
+    """Copy a live database with the SQLite backup API and verify the copy.
+
+    The copy is written next to backup_path and only renamed into place once
+    PRAGMA integrity_check passes, so a failed backup never looks like a good one.
+    """
+    partial_path = f"{backup_path}.partial"
+    source = sqlite3.connect(db_path)
+    try:
+        target = sqlite3.connect(partial_path)
+        try:
+            source.backup(target, pages=pages, sleep=sleep, progress=progress)
+            result = target.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            target.close()
+        if result != 'ok':
+            raise RuntimeError(f"Integrity check failed for backup of {db_path}: {result}")
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    finally:
+        source.close()
+    os.replace(partial_path, backup_path)
+    return backup_path
+
 def backup():
     try:
         backup_dir = "backups"
         os.makedirs(backup_dir, exist_ok=True)
-        db_path = "data/school_fees.db"  # Adjust for MySQL if needed
+        db_path = os.getenv('SQLITE_PATH', 'app/data/school_fees.db')  # Adjust for MySQL if needed
         if not os.path.exists(db_path):
             logging.warning("Database file not found. Please initialize the database first.")
             print("Database file not found. Please initialize the database first.")
@@ -18,10 +49,11 @@ def backup():
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_filename = f'school_fees_backup_{timestamp}.db'
         backup_path = os.path.join(backup_dir, backup_filename)
-        shutil.copy2(db_path, backup_path)
+        online_backup(db_path, backup_path)
         logging.info(f"Backup created successfully: {backup_path}")
         print(f"Backup created successfully: {backup_path}")
         cleanup_old_backups(backup_dir)
+        return backup_path
     except Exception as e:
         logging.error(f"Backup failed: {e}")
         print(f"Backup failed: {e}")
@@ -40,4 +72,4 @@ def cleanup_old_backups(backup_dir, keep_count=10):
         print(f"Cleanup failed: {e}")
 
 if __name__ == "__main__":
-    backup()
\ No newline at end of file
+    backup()
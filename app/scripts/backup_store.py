@@ -0,0 +1,285 @@
+"""Deduplicated, compressed database snapshots.
+
+    python -m app.scripts.backup_store snapshot
+    python -m app.scripts.backup_store list
+    python -m app.scripts.backup_store verify [SNAPSHOT_ID]
+    python -m app.scripts.backup_store restore SNAPSHOT_ID DEST
+    python -m app.scripts.backup_store prune --keep-last 24 --keep-daily 30
+
+The database is split into page-aligned chunks. Each unique chunk is
+zlib-compressed once under chunks/<sha256>, and a snapshot is a small
+JSON manifest listing its chunk hashes. Pages that did not change since
+the last snapshot cost nothing, so hourly snapshots grow the store only
+by what clerks actually changed.
+
+snapshot and prune hold the store's lock file while they work, so prune
+never deletes a chunk that a snapshot found already stored but has not yet
+listed in its manifest.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from .backup_db import online_backup
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+STORE_DIR = os.getenv('BACKUP_STORE_DIR', 'backups/store')
+CHUNK_PAGES = int(os.getenv('BACKUP_CHUNK_PAGES', '16'))
+
+def _chunk_path(store, digest):
+    return Path(store) / 'chunks' / digest[:2] / digest
+
+def _manifest_path(store, snapshot_id):
+    return Path(store) / 'snapshots' / f"{snapshot_id}.json"
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+@contextlib.contextmanager
+def _store_lock(store):
+    """Exclusive lock on store/lock, waiting for other snapshot/prune runs; released if the process dies."""
+    path = Path(store) / 'lock'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK gives up after about 10 seconds
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _page_size(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        conn.close()
+
+def snapshot(db_path=None, store=STORE_DIR, chunk_pages=CHUNK_PAGES):
+    """Store a consistent copy of the database. Returns the manifest."""
+    db_path = db_path or os.getenv('SQLITE_PATH', 'app/data/school_fees.db')
+    created = datetime.now()
+    snapshot_id = created.strftime('%Y%m%d_%H%M%S_%f')
+    with tempfile.TemporaryDirectory() as tmp:
+        # Chunk a verified online copy, never the live file
+        copy_path = online_backup(db_path, os.path.join(tmp, 'snapshot.db'))
+        page_size = _page_size(copy_path)
+        chunk_size = page_size * chunk_pages
+        # Held until the manifest is written, so prune cannot remove a chunk this snapshot reuses
+        with _store_lock(store):
+            chunks, new_chunks, stored_bytes = [], 0, 0
+            whole = hashlib.sha256()
+            with open(copy_path, 'rb') as f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    whole.update(data)
+                    digest = hashlib.sha256(data).hexdigest()
+                    path = _chunk_path(store, digest)
+                    if not path.exists():
+                        compressed = zlib.compress(data, 6)
+                        _write_atomic(path, compressed)
+                        new_chunks += 1
+                        stored_bytes += len(compressed)
+                    chunks.append(digest)
+            manifest = {
+                'id': snapshot_id,
+                'created': created.isoformat(timespec='seconds'),
+                'source': str(db_path),
+                'page_size': page_size,
+                'chunk_size': chunk_size,
+                'size': os.path.getsize(copy_path),
+                'sha256': whole.hexdigest(),
+                'chunks': chunks,
+                'new_chunks': new_chunks,
+                'stored_bytes': stored_bytes,
+            }
+            # The manifest goes last, so a snapshot only exists once all its chunks do
+            _write_atomic(_manifest_path(store, snapshot_id), json.dumps(manifest, indent=1).encode('utf-8'))
+    logging.info(f"Snapshot {snapshot_id}: {len(chunks)} chunks, {new_chunks} new ({stored_bytes} bytes stored)")
+    return manifest
+
+def list_snapshots(store=STORE_DIR):
+    """Manifests, oldest first."""
+    folder = Path(store) / 'snapshots'
+    if not folder.exists():
+        return []
+    manifests = []
+    for path in sorted(folder.glob('*.json')):
+        with open(path, encoding='utf-8') as f:
+            manifests.append(json.load(f))
+    return manifests
+
+def load_manifest(snapshot_id, store=STORE_DIR):
+    path = _manifest_path(store, snapshot_id)
+    if not path.exists():
+        raise ValueError(f"No snapshot {snapshot_id} in {store}")
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _read_chunk(store, digest):
+    with open(_chunk_path(store, digest), 'rb') as f:
+        data = zlib.decompress(f.read())
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"Chunk {digest} is corrupt")
+    return data
+
+def restore(snapshot_id, dest, store=STORE_DIR):
+    """Rebuild a snapshot's database file at dest, checking every chunk and the whole file."""
+    manifest = load_manifest(snapshot_id, store)
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + '.restoring')
+    whole = hashlib.sha256()
+    try:
+        with open(tmp, 'wb') as f:
+            for digest in manifest['chunks']:
+                data = _read_chunk(store, digest)
+                whole.update(data)
+                f.write(data)
+        if whole.hexdigest() != manifest['sha256']:
+            raise ValueError(f"Restored file for {snapshot_id} does not match its checksum")
+        conn = sqlite3.connect(tmp)
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+        if result != 'ok':
+            raise ValueError(f"Restored database for {snapshot_id} failed integrity check: {result}")
+    except Exception:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+    os.replace(tmp, dest)
+    logging.info(f"Restored snapshot {snapshot_id} to {dest}")
+    return dest
+
+def verify(snapshot_id=None, store=STORE_DIR):
+    """Check that every chunk of one or all snapshots is present and intact. Returns {id: [problems]}."""
+    manifests = [load_manifest(snapshot_id, store)] if snapshot_id else list_snapshots(store)
+    checked, report = {}, {}
+    for manifest in manifests:
+        problems = []
+        for digest in manifest['chunks']:
+            if digest not in checked:
+                try:
+                    _read_chunk(store, digest)
+                    checked[digest] = None
+                except FileNotFoundError:
+                    checked[digest] = f"missing chunk {digest}"
+                except (ValueError, zlib.error) as e:
+                    checked[digest] = f"corrupt chunk {digest}: {e}"
+            if checked[digest]:
+                problems.append(checked[digest])
+        report[manifest['id']] = problems
+    return report
+
+def prune(keep_last=24, keep_daily=30, store=STORE_DIR, now=None):
+    """Drop snapshots outside the retention policy, then delete chunks no snapshot uses.
+
+    Keeps the newest keep_last snapshots plus the newest snapshot of each of the last keep_daily days.
+    Returns (snapshots_removed, chunks_removed).
+    """
+    with _store_lock(store):
+        return _prune(keep_last, keep_daily, store, now)
+
+def _prune(keep_last, keep_daily, store, now):
+    manifests = list_snapshots(store)
+    now = now or datetime.now()
+    keep = {m['id'] for m in manifests[-keep_last:]} if keep_last else set()
+    newest_per_day = {}
+    for m in manifests:
+        newest_per_day[m['created'][:10]] = m['id']
+    cutoff = (now - timedelta(days=keep_daily)).strftime('%Y-%m-%d')
+    keep.update(snapshot_id for day, snapshot_id in newest_per_day.items() if day > cutoff)
+    removed = 0
+    for m in manifests:
+        if m['id'] not in keep:
+            _manifest_path(store, m['id']).unlink()
+            removed += 1
+    used = {digest for m in list_snapshots(store) for digest in m['chunks']}
+    chunks_removed = 0
+    chunk_root = Path(store) / 'chunks'
+    if chunk_root.exists():
+        for path in chunk_root.glob('*/*'):
+            if path.name not in used and not path.name.endswith('.tmp'):
+                path.unlink()
+                chunks_removed += 1
+    logging.info(f"Pruned {removed} snapshots and {chunks_removed} chunks from {store}")
+    return removed, chunks_removed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deduplicated database snapshots")
+    parser.add_argument('--store', default=STORE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    snap = commands.add_parser('snapshot', help="take a snapshot of the database")
+    snap.add_argument('--db', default=None)
+    commands.add_parser('list', help="list snapshots")
+    check = commands.add_parser('verify', help="check chunks of one or all snapshots")
+    check.add_argument('snapshot_id', nargs='?')
+    rest = commands.add_parser('restore', help="rebuild a snapshot into a database file")
+    rest.add_argument('snapshot_id')
+    rest.add_argument('dest')
+    trim = commands.add_parser('prune', help="apply retention and delete unused chunks")
+    trim.add_argument('--keep-last', type=int, default=24)
+    trim.add_argument('--keep-daily', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    if args.command == 'snapshot':
+        m = snapshot(args.db, args.store)
+        print(f"Snapshot {m['id']}: {len(m['chunks'])} chunks, {m['new_chunks']} new, {m['stored_bytes']} bytes stored")
+    elif args.command == 'list':
+        for m in list_snapshots(args.store):
+            print(f"{m['id']}  {m['created']}  {m['size']:>10} bytes  {m['new_chunks']:>5} new chunks")
+    elif args.command == 'verify':
+        report = verify(args.snapshot_id, args.store)
+        bad = {sid: problems for sid, problems in report.items() if problems}
+        for sid, problems in bad.items():
+            print(f"{sid}: {len(problems)} problem(s)")
+            for problem in problems[:5]:
+                print(f"  {problem}")
+        print(f"Verified {len(report)} snapshot(s), {len(bad)} with problems")
+        return 1 if bad else 0
+    elif args.command == 'restore':
+        print(f"Restored to {restore(args.snapshot_id, args.dest, args.store)}")
+    elif args.command == 'prune':
+        removed, chunks = prune(args.keep_last, args.keep_daily, args.store)
+        print(f"Removed {removed} snapshot(s) and {chunks} unused chunk(s)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""Database query profile reports.
+
+    python -m app.scripts.query_profile summary [--file PATH] [--top 15] [--json]
+    python -m app.scripts.query_profile slow [--tail 20]
+    python -m app.scripts.query_profile run SCRIPT [ARGS...]
+
+Start the app with QUERY_PROFILE=1 (or `python run.py --profile-queries`)
+and it saves a summary of every DBManager statement when it exits; `summary`
+prints that file and `slow` the end of the slow-query log. `run` profiles
+one Python script in this process, e.g. `run run.py --profile-startup`, and
+prints the summary when it finishes.
+"""
+import argparse
+import json
+import os
+import runpy
+import sys
+from ..core.config import QUERY_PROFILE_PATH, SLOW_QUERY_LOG
+
+def show_summary(path, top, as_json=False):
+    from ..core.query_profiler import format_summary
+    if not os.path.exists(path):
+        print(f"No query profile at {path}; run the app with QUERY_PROFILE=1 first")
+        return 1
+    with open(path, encoding='utf-8') as f:
+        summary = json.load(f)
+    print(json.dumps(summary, indent=2) if as_json else "\n".join(format_summary(summary, top)))
+    return 0
+
+def show_slow(path, tail):
+    if not os.path.exists(path):
+        print(f"No slow-query log at {path}")
+        return 1
+    with open(path, encoding='utf-8') as f:
+        entries = []
+        for line in f:
+            # Each entry is a timestamped line followed by indented sql/params/plan lines
+            if line.startswith(' ') and entries:
+                entries[-1] += line
+            else:
+                entries.append(line)
+    print("".join(entries[-tail:]), end="")
+    return 0
+
+def run_script(script, args, top):
+    from ..core.query_profiler import query_profiler, format_summary
+    query_profiler.enable()
+    sys.argv = [script] + args
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit:
+        pass
+    finally:
+        print("\n".join(format_summary(query_profiler.summary(top), top)))
+        print(f"Summary saved to {query_profiler.save()}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Database query profile reports")
+    commands = parser.add_subparsers(dest='command', required=True)
+    summary = commands.add_parser('summary', help="top statements, screens and connection opens from the saved profile")
+    summary.add_argument('--file', default=QUERY_PROFILE_PATH)
+    summary.add_argument('--top', type=int, default=15)
+    summary.add_argument('--json', action='store_true', help="print the saved JSON as is")
+    slow = commands.add_parser('slow', help="latest entries of the slow-query log, with query plans")
+    slow.add_argument('--log', default=SLOW_QUERY_LOG)
+    slow.add_argument('--tail', type=int, default=20)
+    run = commands.add_parser('run', help="run a Python script with profiling on and print its summary")
+    run.add_argument('--top', type=int, default=15)
+    run.add_argument('script')
+    run.add_argument('args', nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    if args.command == 'summary':
+        return show_summary(args.file, args.top, args.json)
+    if args.command == 'slow':
+        return show_slow(args.log, args.tail)
+    return run_script(args.script, args.args, args.top)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,373 @@
+"""Continuous WAL archiving and point-in-time restore.
+
+    python -m app.scripts.wal_archive run [--interval 1]
+    python -m app.scripts.wal_archive list
+    python -m app.scripts.wal_archive restore DEST [--to "2025-09-01 14:05"]
+
+The archiver switches the database to WAL mode and, on every sync, copies
+newly committed WAL frames into a compressed segment. Each frame's checksum
+chain and salts are checked before it is shipped and again on restore.
+
+A generation is a raw copy of the database file plus the unbroken run of
+segments that follows it. The archiver keeps a read transaction open so
+nobody else can restart the WAL under it, and it checkpoints the WAL
+itself. If it ever finds the WAL reset by someone else, it cannot prove
+no frames were missed, so it starts a new generation. A restart of the
+archiver also starts a new generation.
+
+Restore picks the newest generation that started before the target time
+and replays segments synced up to it. The precision is the sync interval.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import struct
+import threading
+from datetime import datetime
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+ARCHIVE_DIR = os.getenv('WAL_ARCHIVE_DIR', 'backups/wal')
+SYNC_INTERVAL = float(os.getenv('WAL_SYNC_INTERVAL', '1.0'))
+# Frames allowed to pile up in the WAL before the archiver checkpoints it
+CHECKPOINT_FRAMES = int(os.getenv('WAL_CHECKPOINT_FRAMES', '1000'))
+
+WAL_HEADER_SIZE = 32
+FRAME_HEADER_SIZE = 24
+WAL_MAGIC = (0x377f0682, 0x377f0683)
+
+def wal_checksum(data, s0=0, s1=0, big_endian=False):
+    """SQLite's WAL checksum over data (a multiple of 8 bytes), continuing from (s0, s1)."""
+    words = struct.unpack(f"{'>' if big_endian else '<'}{len(data) // 4}I", data)
+    for i in range(0, len(words), 2):
+        s0 = (s0 + words[i] + s1) & 0xFFFFFFFF
+        s1 = (s1 + words[i + 1] + s0) & 0xFFFFFFFF
+    return s0, s1
+
+def read_wal_header(wal_path):
+    """The WAL header as a dict, or None if there is no valid WAL."""
+    try:
+        with open(wal_path, 'rb') as f:
+            raw = f.read(WAL_HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+    if len(raw) < WAL_HEADER_SIZE:
+        return None
+    magic, _, page_size, _, salt1, salt2, c1, c2 = struct.unpack('>8I', raw)
+    if magic not in WAL_MAGIC:
+        return None
+    big_endian = bool(magic & 1)
+    if wal_checksum(raw[:24], big_endian=big_endian) != (c1, c2):
+        return None
+    return {'page_size': page_size, 'salt': (salt1, salt2), 'checksum': (c1, c2), 'big_endian': big_endian}
+
+def iter_frames(data, page_size, salt, checksum, big_endian):
+    """Yield (page_number, commit_size, page, checksum) for each valid frame in data, stopping at the first bad one."""
+    frame_size = FRAME_HEADER_SIZE + page_size
+    for offset in range(0, len(data) - frame_size + 1, frame_size):
+        frame = data[offset:offset + frame_size]
+        pgno, commit_size, salt1, salt2, c1, c2 = struct.unpack('>6I', frame[:FRAME_HEADER_SIZE])
+        if (salt1, salt2) != tuple(salt):
+            return
+        page = frame[FRAME_HEADER_SIZE:]
+        checksum = wal_checksum(frame[:8] + page, *checksum, big_endian=big_endian)
+        if checksum != (c1, c2):
+            return
+        yield pgno, commit_size, page, checksum
+
+def read_committed_frames(wal_path, header, after_frame, checksum, stop_frame=None):
+    """Raw frames after after_frame up to the last commit (or stop_frame).
+
+    Returns (data, last_frame, checksum, db_size); data is empty when nothing new has been committed.
+    """
+    page_size = header['page_size']
+    frame_size = FRAME_HEADER_SIZE + page_size
+    with open(wal_path, 'rb') as f:
+        f.seek(WAL_HEADER_SIZE + after_frame * frame_size)
+        limit = (stop_frame - after_frame) * frame_size if stop_frame is not None else -1
+        data = f.read(limit)
+    frame, end, end_checksum, db_size = after_frame, after_frame, checksum, None
+    for _, commit_size, _, checksum in iter_frames(data, page_size, header['salt'], checksum, header['big_endian']):
+        frame += 1
+        if commit_size:
+            end, end_checksum, db_size = frame, checksum, commit_size
+    return data[:(end - after_frame) * frame_size], end, end_checksum, db_size
+
+def _fsync_write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+def _append_line(path, entry):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+class WalArchiver:
+    def __init__(self, db_path=None, directory=None, checkpoint_frames=CHECKPOINT_FRAMES, clock=datetime.now):
+        self.db_path = db_path or os.getenv('SQLITE_PATH', 'app/data/school_fees.db')
+        self.wal_path = f"{self.db_path}-wal"
+        self.directory = Path(directory or ARCHIVE_DIR)
+        self.checkpoint_frames = checkpoint_frames
+        self.clock = clock
+        self.conn = None
+        self.generation = None
+        self._lock = threading.Lock()
+
+    def _now(self):
+        return self.clock().isoformat(sep=' ', timespec='microseconds')
+
+    def start(self):
+        """Switch the database to WAL mode and begin a generation."""
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        mode = self.conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if mode != 'wal':
+            raise RuntimeError(f"Could not switch {self.db_path} to WAL mode (got {mode})")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS _wal_archive (id INTEGER PRIMARY KEY CHECK (id = 1), generation TEXT, touched_at TEXT)"
+        )
+        with self._lock:
+            self._new_generation()
+
+    def close(self):
+        if self.conn is not None:
+            self._release()
+            self.conn.close()
+            self.conn = None
+
+    def sync(self):
+        """Ship frames committed since the last sync; checkpoint once the WAL is long enough."""
+        with self._lock:
+            header = read_wal_header(self.wal_path)
+            if header is None or header['salt'] != self.header['salt']:
+                logging.warning(f"WAL for {self.db_path} was reset outside the archiver; starting a new generation")
+                self._new_generation()
+                return
+            self._ship()
+            if self.frame >= self.checkpoint_frames:
+                self._checkpoint()
+
+    def _touch(self):
+        # A committed write, so the WAL has frames for the read lock to pin
+        self.conn.execute("INSERT OR REPLACE INTO _wal_archive (id, generation, touched_at) VALUES (1, ?, ?)",
+                          (self.generation, self._now()))
+
+    def _hold(self):
+        self.conn.execute("BEGIN")
+        self.conn.execute("SELECT COUNT(*) FROM _wal_archive").fetchone()
+
+    def _release(self):
+        if self.conn.in_transaction:
+            self.conn.execute("COMMIT")
+
+    def _new_generation(self):
+        self._release()
+        name = self.clock().strftime('%Y%m%dT%H%M%S%f')
+        suffix = 0
+        while (self.directory / (name if not suffix else f"{name}-{suffix}")).exists():
+            suffix += 1
+        self.generation = name if not suffix else f"{name}-{suffix}"
+        self.gen_dir = self.directory / self.generation
+        (self.gen_dir / 'wal').mkdir(parents=True)
+        self._touch()
+        self._hold()
+        self.header = read_wal_header(self.wal_path)
+        if self.header is None:
+            raise RuntimeError(f"No WAL found for {self.db_path}")
+        self.frame, self.checksum, self.seq = 0, self.header['checksum'], 0
+        # Checkpoints may write to the file while it is copied, but only pages
+        # from frames the read lock still pins, and replaying them fixes that
+        with open(self.db_path, 'rb') as src, open(self.gen_dir / 'base.db.gz', 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as dst:
+                shutil.copyfileobj(src, dst)
+            raw.flush()
+            os.fsync(raw.fileno())
+        first = self._ship()
+        # Nothing to ship when another connection restarted the WAL between the touch and the read
+        # lock; the base copy already holds those pages, so the generation starts now
+        started = first['synced_at'] if first else self._now()
+        _fsync_write(self.gen_dir / 'generation.json', json.dumps({
+            'id': self.generation, 'started': started, 'source': str(self.db_path),
+            'page_size': self.header['page_size'],
+        }, indent=2).encode('utf-8'))
+        logging.info(f"Started WAL archive generation {self.generation} for {self.db_path}")
+
+    def _ship(self, stop_frame=None):
+        """Write a segment with the frames committed since the last one. Returns its metadata, or None."""
+        data, end, checksum, db_size = read_committed_frames(self.wal_path, self.header, self.frame, self.checksum, stop_frame)
+        if not data:
+            return None
+        self.seq += 1
+        segment = {
+            'seq': self.seq, 'file': f"{self.seq:08d}.frames.gz", 'synced_at': self._now(),
+            'salt': list(self.header['salt']), 'big_endian': self.header['big_endian'],
+            'page_size': self.header['page_size'], 'first_frame': self.frame + 1, 'frames': end - self.frame,
+            'checksum_in': list(self.checksum), 'checksum_out': list(checksum), 'db_size': db_size,
+        }
+        _fsync_write(self.gen_dir / 'wal' / segment['file'], gzip.compress(data))
+        # The segment only counts once it is listed, so a crash mid-write leaves no half segment in use
+        _append_line(self.gen_dir / 'segments.jsonl', segment)
+        self.frame, self.checksum = end, checksum
+        return segment
+
+    def _checkpoint(self):
+        self._release()
+        busy, log_frames, _ = self.conn.execute("PRAGMA wal_checkpoint(RESTART)").fetchone()
+        if busy:
+            # Someone is still reading the WAL; keep appending and try next time
+            self._hold()
+            return
+        # Frames committed after the last ship are still in the old WAL unless
+        # a writer has already restarted it over them
+        self._ship(stop_frame=log_frames)
+        if self.frame != log_frames:
+            logging.warning("WAL frames were overwritten before they could be archived; starting a new generation")
+            self._new_generation()
+            return
+        old_salt = self.header['salt'][0]
+        self._touch()
+        self._hold()
+        header = read_wal_header(self.wal_path)
+        # Each restart bumps the first salt by one; anything else means a WAL went by unseen
+        if header is None or header['salt'][0] != (old_salt + 1) & 0xFFFFFFFF:
+            logging.warning("WAL restarted more than once during checkpoint; starting a new generation")
+            self._new_generation()
+            return
+        self.header, self.frame, self.checksum = header, 0, header['checksum']
+        self._ship()
+
+    def run(self, interval=SYNC_INTERVAL, stop=None):
+        """Sync every interval seconds until stop (a threading.Event) is set."""
+        stop = stop or threading.Event()
+        self.start()
+        try:
+            while not stop.wait(interval):
+                try:
+                    self.sync()
+                except Exception as e:
+                    logging.error(f"WAL archive sync failed: {e}")
+        finally:
+            self.close()
+
+def _segments(gen_dir):
+    path = Path(gen_dir) / 'segments.jsonl'
+    if not path.exists():
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def list_generations(directory=None):
+    """Generations, oldest first, with the time range they can restore to."""
+    directory = Path(directory or ARCHIVE_DIR)
+    generations = []
+    for meta_path in sorted(directory.glob('*/generation.json')):
+        with open(meta_path, encoding='utf-8') as f:
+            generation = json.load(f)
+        segments = _segments(meta_path.parent)
+        generation['segments'] = len(segments)
+        generation['latest'] = segments[-1]['synced_at'] if segments else generation['started']
+        generation['path'] = str(meta_path.parent)
+        generations.append(generation)
+    generations.sort(key=lambda g: datetime.fromisoformat(g['started']))
+    return generations
+
+def restore(dest, target=None, directory=None):
+    """Rebuild the database as of target (a datetime or ISO string; default: latest) at dest.
+
+    Returns the sync time of the last segment applied.
+    """
+    dest = Path(dest)
+    if dest.exists():
+        raise ValueError(f"{dest} already exists; restore to a new path")
+    if isinstance(target, str):
+        target = datetime.fromisoformat(target)
+    generations = [g for g in list_generations(directory)
+                   if target is None or datetime.fromisoformat(g['started']) <= target]
+    if not generations:
+        raise ValueError(f"No archived generation covers {target}")
+    generation = generations[-1]
+    gen_dir = Path(generation['path'])
+    page_size = generation['page_size']
+    segments = [s for s in _segments(gen_dir) if target is None or datetime.fromisoformat(s['synced_at']) <= target]
+
+    tmp = dest.with_name(dest.name + '.restoring')
+    try:
+        with gzip.open(gen_dir / 'base.db.gz', 'rb') as src, open(tmp, 'wb') as out:
+            shutil.copyfileobj(src, out)
+        previous, db_size = None, None
+        with open(tmp, 'r+b') as out:
+            for segment in segments:
+                if previous is not None:
+                    if segment['salt'] == previous['salt']:
+                        continuous = (segment['first_frame'] == previous['first_frame'] + previous['frames']
+                                      and segment['checksum_in'] == previous['checksum_out'])
+                    else:
+                        continuous = (segment['first_frame'] == 1
+                                      and segment['salt'][0] == (previous['salt'][0] + 1) & 0xFFFFFFFF)
+                    if not continuous:
+                        raise ValueError(f"Segment {segment['seq']} of generation {generation['id']} does not follow segment {previous['seq']}")
+                with gzip.open(gen_dir / 'wal' / segment['file'], 'rb') as f:
+                    data = f.read()
+                frames = 0
+                for pgno, _, page, checksum in iter_frames(data, page_size, segment['salt'], segment['checksum_in'], segment['big_endian']):
+                    out.seek((pgno - 1) * page_size)
+                    out.write(page)
+                    frames += 1
+                if frames != segment['frames'] or list(checksum) != segment['checksum_out']:
+                    raise ValueError(f"Segment {segment['seq']} of generation {generation['id']} failed its checksum")
+                previous, db_size = segment, segment['db_size']
+            if db_size:
+                out.truncate(db_size * page_size)
+        conn = sqlite3.connect(tmp)
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+        if result != 'ok':
+            raise ValueError(f"Restored database failed integrity check: {result}")
+    except Exception:
+        for path in (tmp, Path(f"{tmp}-wal"), Path(f"{tmp}-shm")):
+            if path.exists():
+                path.unlink()
+        raise
+    os.replace(tmp, dest)
+    restored_to = segments[-1]['synced_at'] if segments else generation['started']
+    logging.info(f"Restored {dest} to {restored_to} from generation {generation['id']}")
+    return restored_to
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Continuous WAL archiving and point-in-time restore")
+    parser.add_argument('--archive', default=ARCHIVE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="archive the database continuously")
+    run.add_argument('--db', default=None)
+    run.add_argument('--interval', type=float, default=SYNC_INTERVAL)
+    commands.add_parser('list', help="list generations and the times they cover")
+    rest = commands.add_parser('restore', help="rebuild the database as of a point in time")
+    rest.add_argument('dest')
+    rest.add_argument('--to', default=None, help="local time, e.g. '2025-09-01 14:05'; default latest")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        archiver = WalArchiver(args.db, args.archive)
+        print(f"Archiving {archiver.db_path} to {archiver.directory} every {args.interval}s (Ctrl+C to stop)")
+        try:
+            archiver.run(args.interval)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'list':
+        for g in list_generations(args.archive):
+            print(f"{g['id']}  {g['started']} .. {g['latest']}  {g['segments']} segments")
+    elif args.command == 'restore':
+        print(f"Restored {args.dest} to {restore(args.dest, args.to, args.archive)}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,30 @@
+import os
+import tempfile
+import unittest
+from ..core.initialize_db import init_db
+from ..core.audit_log import audit_sink
+
+class TempDatabaseTestCase(unittest.TestCase):
+    """Points SQLITE_PATH at a fresh database in a temp directory for each test.
+
+    The database is migrated with init_db() unless migrate is False. Subclasses
+    that patch anything init_db() reads set it up before calling super().setUp();
+    the path is restored and the directory removed after their tearDown.
+    """
+    migrate = True
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self._restore_path, os.environ.get('SQLITE_PATH'))
+        self.db_path = os.path.join(self.tmp.name, 'school_fees.db')
+        os.environ['SQLITE_PATH'] = self.db_path
+        if self.migrate:
+            init_db()
+            self.addCleanup(audit_sink.flush)
+
+    def _restore_path(self, old_path):
+        if old_path is None:
+            os.environ.pop('SQLITE_PATH', None)
+        else:
+            os.environ['SQLITE_PATH'] = old_path
@@ -0,0 +1,58 @@
+import unittest
+from datetime import date
+from . import TempDatabaseTestCase
+from ..core import aging_manager
+from ..core.aging_manager import age_balance, refresh_arrears_aging, get_aging_summary, get_arrears_aging
+from ..core.payment_manager import record_payment
+from ..core.fee_manager import set_fee
+from ..core.student_manager import create_student, update_student
+
+class TestArrearsAging(TempDatabaseTestCase):
+    def setUp(self):
+        self.old_terms = aging_manager.TERM_STARTS
+        aging_manager.TERM_STARTS = ['01-06', '05-04', '08-31']
+        super().setUp()
+
+    def tearDown(self):
+        aging_manager.TERM_STARTS = self.old_terms
+
+    def test_payments_settle_oldest_charges_first(self):
+        as_of = date(2025, 9, 15)
+        # 900 charged as 300 on Jan 6, May 4 and Aug 31; 400 paid covers Jan and part of May
+        self.assertEqual(age_balance(900.0, 400.0, as_of), [300.0, 0.0, 0.0, 200.0])
+        self.assertEqual(age_balance(900.0, 1000.0, as_of), [0.0, 0.0, 0.0, 0.0])
+
+    def test_early_january_is_still_last_years_bill(self):
+        # Before the first term starts, last year's unpaid charges stay overdue instead of restarting at 0-30
+        self.assertEqual(age_balance(30000.0, 0.0, date(2026, 12, 20)), [0.0, 0.0, 0.0, 30000.0])
+        self.assertEqual(age_balance(30000.0, 0.0, date(2027, 1, 3)), [0.0, 0.0, 0.0, 30000.0])
+
+    def test_terms_not_yet_charged_are_not_owed(self):
+        # In February only the January term is due; May and August are not yet arrears
+        self.assertEqual(age_balance(900.0, 0.0, date(2025, 2, 20)), [0.0, 300.0, 0.0, 0.0])
+        self.assertEqual(age_balance(900.0, 300.0, date(2025, 2, 20)), [0.0, 0.0, 0.0, 0.0])
+
+    def test_refresh_and_incremental_update(self):
+        as_of = '2025-09-15'
+        a = create_student("ADM001", "Student A", 1, None)
+        b = create_student("ADM002", "Student B", 2, None)
+        set_fee(a, 900.0)
+        set_fee(b, 300.0)
+        refresh_arrears_aging(as_of)
+        summary = get_aging_summary(as_of=as_of)
+        self.assertEqual(summary['students'], 2)
+        self.assertEqual(summary['90+'], 800.0)
+        self.assertEqual(summary['0-30'], 400.0)
+        # A payment re-ages only that student, against the same as-of date
+        record_payment(a, 600.0, "Cash", "2025-09-10", 1)
+        self.assertEqual(get_aging_summary(as_of=as_of)['90+'], 200.0)
+        class_rows = get_arrears_aging(class_id=2, as_of=as_of)
+        self.assertEqual([r[0] for r in class_rows], ["ADM002"])
+        # Moving a student moves their aging row to the new class
+        update_student(b, class_id=1)
+        self.assertEqual(get_arrears_aging(class_id=2, as_of=as_of), [])
+        self.assertEqual(sorted(r[0] for r in get_arrears_aging(class_id=1, as_of=as_of)), ["ADM001", "ADM002"])
+        self.assertEqual(get_aging_summary(class_id=1, as_of=as_of)['total'], 600.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import sqlite3
+import unittest
+from unittest import mock
+from datetime import date
+from ..core import audit_log
+from ..core.db_manager import DBManager
+from ..core.audit_log import AuditLogSink, audit_sink, get_audit_page, purge_audit_logs, get_audit_events
+from ..core.payment_manager import record_payment
+from ..core.student_manager import create_student, delete_student
+from ..core.fee_manager import set_fee
+from ..core.audit_archive import archive_audit_logs, search_archive, load_index
+from . import TempDatabaseTestCase
+
+class TestAuditLogSink(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # A long interval so only size, flush() and close() trigger writes
+        self.sink = AuditLogSink(batch_size=50, flush_interval=60.0)
+
+    def tearDown(self):
+        self.sink.close()
+
+    def count(self):
+        with DBManager() as db:
+            return db.fetch_one("SELECT COUNT(*) FROM audit_logs WHERE action LIKE 'event %'")[0]
+
+    def test_flush_writes_queued_events_in_order(self):
+        for i in range(10):
+            self.sink.log(1, f"event {i}")
+        self.assertTrue(self.sink.flush())
+        with DBManager() as db:
+            actions = [r[0] for r in db.fetch_all("SELECT action FROM audit_logs WHERE action LIKE 'event %' ORDER BY id")]
+            timestamp = db.fetch_one("SELECT timestamp FROM audit_logs WHERE action = 'event 0'")[0]
+        self.assertEqual(actions, [f"event {i}" for i in range(10)])
+        self.assertRegex(timestamp, r"^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d$")
+
+    def test_critical_event_is_written_before_returning(self):
+        self.sink.log(1, "event login failed", critical=True)
+        self.assertEqual(self.count(), 1)
+
+    def test_transient_lock_is_retried(self):
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise sqlite3.OperationalError("database is locked")
+            return DBManager()
+        with mock.patch.object(audit_log, '_RETRY_DELAY', 0.0), mock.patch.object(audit_log, 'DBManager', connect):
+            self.assertTrue(self.sink.log(1, "event after lock", critical=True))
+        self.assertEqual((len(attempts), self.count()), (3, 1))
+
+    def test_dropped_batch_is_reported_to_flush(self):
+        self.sink.log(1, "event lost")
+        locked = mock.Mock(side_effect=sqlite3.OperationalError("database is locked"))
+        with mock.patch.object(audit_log, '_RETRY_DELAY', 0.0), mock.patch.object(audit_log, 'DBManager', locked):
+            self.assertFalse(self.sink.flush())
+            self.assertFalse(self.sink.log(1, "event critical", critical=True))
+        self.assertEqual(self.count(), 0)
+        # Only what was dropped since the last flush counts against the next one
+        self.sink.log(1, "event kept")
+        self.assertTrue(self.sink.flush())
+        self.assertEqual(self.count(), 1)
+
+    def test_close_drains_pending_events(self):
+        for i in range(5):
+            self.sink.log(None, f"event {i}")
+        self.sink.close()
+        self.assertEqual(self.count(), 5)
+        # Events after shutdown are written synchronously rather than lost
+        self.sink.log(None, "event late")
+        self.assertEqual(self.count(), 6)
+
+    def test_keyset_pages_cover_the_range_once(self):
+        # Three entries per day share a timestamp, so paging must break ties on id
+        rows = [(1 if i % 2 else 2, f"entry {i}", f"2025-03-{1 + i // 3:02d} 08:00:00") for i in range(30)]
+        with DBManager() as db:
+            db.cursor.executemany("INSERT INTO audit_logs (user_id, action, timestamp) VALUES (?, ?, ?)", rows)
+        pages, before = [], None
+        while True:
+            page = get_audit_page('2025-03-02', '2025-03-09', before=before, limit=7)
+            if not page:
+                break
+            pages.append(page)
+            before = (page[-1][0], page[-1][5])
+        seen = [r[2] for page in pages for r in page]
+        # 2025-03-02 through 03-09 inclusive is 8 days of 3 entries
+        self.assertEqual(len(seen), 24)
+        self.assertEqual(len(set(seen)), 24)
+        self.assertEqual(seen[0], "entry 26")
+        # Paging back from the second page returns the first
+        newer = get_audit_page('2025-03-02', '2025-03-09', after=(pages[1][0][0], pages[1][0][5]), limit=7)
+        self.assertEqual([r[5] for r in newer], [r[5] for r in pages[0]])
+        only_user = get_audit_page('2025-03-01', '2025-03-31', user_id=2, limit=100)
+        self.assertEqual(len(only_user), 15)
+        self.assertEqual(purge_audit_logs('2025-03-02'), 3)
+
+    def test_archive_moves_rows_into_monthly_segments(self):
+        rows = [(1, f"entry {i}", f"2025-0{1 + i % 3}-{1 + i:02d} 10:00:00") for i in range(12)]
+        with DBManager() as db:
+            db.cursor.executemany("INSERT INTO audit_logs (user_id, action, timestamp) VALUES (?, ?, ?)", rows)
+        self.assertEqual(archive_audit_logs('2025-02-01'), 4)
+        # A second run appends to the January segment instead of rewriting it
+        with DBManager() as db:
+            db.execute("INSERT INTO audit_logs (user_id, action, timestamp) VALUES (2, 'entry late', '2025-01-31 23:00:00')")
+        self.assertEqual(archive_audit_logs('2025-03-01'), 5)
+        index = load_index()
+        self.assertEqual(index['segments']['2025-01']['rows'], 5)
+        self.assertEqual(index['segments']['2025-01']['members'], 2)
+        self.assertEqual(sorted(index['segments']), ['2025-01', '2025-02'])
+        with DBManager() as db:
+            self.assertEqual(db.fetch_one("SELECT COUNT(*) FROM audit_logs WHERE action LIKE 'entry %'")[0], 4)
+        found = search_archive('2025-01-01', '2025-01-31')
+        self.assertEqual([r[2] for r in found][:2], ["entry late", "entry 9"])
+        self.assertEqual(found[1][1], "admin")
+        self.assertEqual(len(search_archive('2025-01-01', '2025-12-31', user_id=1)), 8)
+        self.assertEqual([r[2] for r in search_archive('2025-01-01', '2025-12-31', text="ENTRY 1")], ["entry 10", "entry 1"])
+
+    def test_search_finds_payment_codes(self):
+        student_id = create_student("ADM042", "Student", 1, None)
+        _, receipt_no = record_payment(student_id, 500.0, "M-Pesa", "2025-08-15", 1, mpesa_code="QKX81ZT4")
+        record_payment(student_id, 200.0, "Cash", "2025-08-16", 1)
+        audit_sink.flush()
+        today = date.today().isoformat()
+        found = get_audit_page('2000-01-01', today, text="qkx81zt4")
+        self.assertEqual(len(found), 1)
+        self.assertIn(receipt_no, found[0][2])
+        self.assertEqual(len(get_audit_page('2000-01-01', today, text=f"student {student_id}")), 2)
+        self.assertEqual(len(get_audit_page('2000-01-01', today, text="QKX81")), 1)
+        # The index follows deletes
+        with DBManager() as db:
+            db.execute("DELETE FROM audit_logs WHERE action LIKE '%QKX81ZT4%'")
+        self.assertEqual(get_audit_page('2000-01-01', today, text="QKX81ZT4"), [])
+
+    def test_structured_events(self):
+        student_id = create_student("ADM007", "Student", 3, None)
+        set_fee(student_id, 900.0)
+        payment_id, receipt_no = record_payment(student_id, 300.0, "Cash", "2025-08-15", 1)
+        delete_student(student_id)
+        audit_sink.flush()
+        payments = get_audit_events(event_type='payment.recorded', user_id=1)
+        self.assertEqual(len(payments), 1)
+        self.assertEqual(payments[0]['entity_id'], str(payment_id))
+        self.assertEqual(payments[0]['payload']['receipt_no'], receipt_no)
+        self.assertEqual(payments[0]['payload']['amount'], 300.0)
+        self.assertEqual(payments[0]['username'], 'admin')
+        history = [e['event_type'] for e in get_audit_events(entity_type='student', entity_id=student_id)]
+        self.assertEqual(sorted(history), ['fee.set', 'student.created', 'student.deleted'])
+        # The viewer still sees the readable message
+        self.assertIn(receipt_no, get_audit_page('2000-01-01', date.today().isoformat(), text=receipt_no)[0][2])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from passlib.hash import bcrypt
+from ..core.db_manager import DBManager
+from ..core.auth import Auth
+from ..core.login_throttle import throttle, LoginThrottled
+from . import TempDatabaseTestCase
+
+class TestAuth(TempDatabaseTestCase):
+    def setUp(self):
+        self.old_hasher = Auth.hasher
+        # Low costs keep the test fast; the behaviour is the same at any cost
+        Auth.hasher = bcrypt.using(rounds=4)
+        self.old_throttle = (throttle.clock, throttle.max_failures, throttle.workstation_max_failures)
+        self.now = 1000000.0
+        throttle.clock = lambda: self.now
+        throttle.max_failures, throttle.workstation_max_failures = 3, 5
+        throttle.reset()
+        super().setUp()
+
+    def tearDown(self):
+        Auth.hasher = self.old_hasher
+        throttle.clock, throttle.max_failures, throttle.workstation_max_failures = self.old_throttle
+        throttle.reset()
+
+    def stored_hash(self, username):
+        with DBManager() as db:
+            return db.fetch_one("SELECT password FROM users WHERE username = ?", (username,))[0]
+
+    def test_outdated_cost_is_rehashed_on_login(self):
+        with DBManager() as db:
+            db.execute("INSERT INTO users (username, email, password, role) VALUES (?, ?, ?, ?)",
+                       ("clerk", "clerk@example.com", bcrypt.using(rounds=5).hash("s3cret"), "clerk"))
+        self.assertIsNone(Auth.authenticate("clerk", "wrong"))
+        self.assertTrue(self.stored_hash("clerk").startswith("$2b$05$"))
+        self.assertEqual(Auth.authenticate("clerk", "s3cret")['username'], "clerk")
+        self.assertTrue(self.stored_hash("clerk").startswith("$2b$04$"))
+        # Still verifies after the upgrade
+        self.assertIsNotNone(Auth.authenticate("clerk@example.com", "s3cret"))
+
+    def test_throttle_refuses_before_hashing(self):
+        for _ in range(3):
+            self.assertIsNone(Auth.authenticate("admin", "guess", workstation="OFFICE-PC"))
+        calls = []
+        original_verify = Auth.verify_password
+        Auth.verify_password = staticmethod(lambda *args: calls.append(args) or original_verify(*args))
+        try:
+            with self.assertRaises(LoginThrottled) as raised:
+                Auth.authenticate("admin", "admin123", workstation="OFFICE-PC")
+            self.assertEqual(calls, [])
+        finally:
+            Auth.verify_password = original_verify
+        self.assertAlmostEqual(raised.exception.retry_after, throttle.window)
+        # The window slides: once the first failure is old enough, one more try is allowed
+        self.now += throttle.window + 1
+        self.assertIsNotNone(Auth.authenticate("admin", "admin123", workstation="OFFICE-PC"))
+
+    def test_username_and_email_share_one_count(self):
+        throttle.workstation_max_failures = 20
+        self.assertIsNone(Auth.authenticate("admin", "guess", workstation="OFFICE-PC"))
+        self.assertIsNone(Auth.authenticate("admin@barsiele.ac.ke", "guess", workstation="OFFICE-PC"))
+        # A success by email clears failures made under either identifier
+        self.assertIsNotNone(Auth.authenticate("admin@barsiele.ac.ke", "admin123", workstation="OFFICE-PC"))
+        for identifier in ["admin", "admin@barsiele.ac.ke", "admin"]:
+            self.assertIsNone(Auth.authenticate(identifier, "guess", workstation="OFFICE-PC"))
+        with self.assertRaises(LoginThrottled) as raised:
+            Auth.authenticate("admin@barsiele.ac.ke", "admin123", workstation="OFFICE-PC")
+        self.assertTrue(raised.exception.key.startswith("account:"))
+
+    def test_workstation_limit_and_persistence(self):
+        for name in ["a", "b", "c", "d", "e"]:
+            Auth.authenticate(name, "guess", workstation="FRONT-DESK")
+        with self.assertRaises(LoginThrottled):
+            Auth.authenticate("admin", "admin123", workstation="FRONT-DESK")
+        # Another machine is unaffected, and counts survive a restart (empty cache)
+        self.assertIsNotNone(Auth.authenticate("admin", "admin123", workstation="BURSAR-PC"))
+        throttle.reset()
+        with self.assertRaises(LoginThrottled):
+            Auth.authenticate("admin", "admin123", workstation="FRONT-DESK")
+
+if __name__ == "__main__":
+    unittest.main()
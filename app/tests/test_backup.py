@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from ..scripts.backup_db import online_backup, cleanup_old_backups
+from ..scripts import backup_store
+
+class TestOnlineBackup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'school_fees.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE payments (id INTEGER PRIMARY KEY, amount REAL, note TEXT)")
+        conn.executemany("INSERT INTO payments (amount, note) VALUES (?, ?)", [(i, 'x' * 500) for i in range(2000)])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writers_are_not_blocked_during_backup(self):
+        writer = sqlite3.connect(self.db_path, timeout=0)
+        writes = []
+
+        def progress(status, remaining, total):
+            # Between steps the source is unlocked, so a clerk's write goes straight through
+            if remaining and not writes:
+                writer.execute("INSERT INTO payments (amount, note) VALUES (999, 'during backup')")
+                writer.commit()
+                writes.append(remaining)
+
+        backup_path = os.path.join(self.tmp.name, 'school_fees_backup_1.db')
+        online_backup(self.db_path, backup_path, pages=5, sleep=0, progress=progress)
+        writer.close()
+        self.assertTrue(writes)
+        copy = sqlite3.connect(backup_path)
+        self.assertEqual(copy.execute("PRAGMA integrity_check").fetchone()[0], 'ok')
+        # The backup restarts after an outside write, so the copy includes it
+        self.assertEqual(copy.execute("SELECT COUNT(*) FROM payments").fetchone()[0], 2001)
+        copy.close()
+        self.assertFalse(os.path.exists(backup_path + '.partial'))
+
+    def test_retention_keeps_newest_ten(self):
+        now = time.time()
+        for i in range(12):
+            path = os.path.join(self.tmp.name, f'school_fees_backup_{i:02d}.db')
+            online_backup(self.db_path, path)
+            os.utime(path, (now + i, now + i))
+        cleanup_old_backups(self.tmp.name)
+        kept = sorted(f for f in os.listdir(self.tmp.name) if f.startswith('school_fees_backup_'))
+        self.assertEqual(kept, [f'school_fees_backup_{i:02d}.db' for i in range(2, 12)])
+
+class TestBackupStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'school_fees.db')
+        self.store = os.path.join(self.tmp.name, 'store')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE payments (id INTEGER PRIMARY KEY, amount REAL, note TEXT)")
+        conn.executemany("INSERT INTO payments (amount, note) VALUES (?, ?)", [(i, f'receipt {i} ' * 40) for i in range(3000)])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged_pages_are_stored_once(self):
+        first = backup_store.snapshot(self.db_path, self.store)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE payments SET amount = -1 WHERE id = 2999")
+        conn.commit()
+        conn.close()
+        second = backup_store.snapshot(self.db_path, self.store)
+        self.assertEqual(first['new_chunks'], len(set(first['chunks'])))
+        # One changed row touches a page or two, not the whole file
+        self.assertLessEqual(second['new_chunks'], 3)
+        self.assertLess(second['stored_bytes'], first['stored_bytes'] / 5)
+
+        restored = os.path.join(self.tmp.name, 'restored.db')
+        backup_store.restore(first['id'], restored, self.store)
+        copy = sqlite3.connect(restored)
+        self.assertEqual(copy.execute("SELECT amount FROM payments WHERE id = 2999").fetchone()[0], 2998)
+        copy.close()
+        self.assertEqual(backup_store.verify(store=self.store), {first['id']: [], second['id']: []})
+
+    def test_verify_and_restore_catch_a_damaged_chunk(self):
+        manifest = backup_store.snapshot(self.db_path, self.store)
+        damaged = backup_store._chunk_path(self.store, manifest['chunks'][-1])
+        damaged.write_bytes(b'not a chunk')
+        self.assertEqual(len(backup_store.verify(manifest['id'], self.store)[manifest['id']]), 1)
+        restored = os.path.join(self.tmp.name, 'restored.db')
+        with self.assertRaises(Exception):
+            backup_store.restore(manifest['id'], restored, self.store)
+        self.assertFalse(os.path.exists(restored))
+
+    def test_prune_drops_old_snapshots_and_unused_chunks(self):
+        first = backup_store.snapshot(self.db_path, self.store)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM payments WHERE id > 1500")
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.close()
+        second = backup_store.snapshot(self.db_path, self.store)
+        removed, chunks_removed = backup_store.prune(keep_last=1, keep_daily=0, store=self.store)
+        self.assertEqual(removed, 1)
+        self.assertEqual(chunks_removed, len(set(first['chunks']) - set(second['chunks'])))
+        self.assertEqual([m['id'] for m in backup_store.list_snapshots(self.store)], [second['id']])
+        self.assertEqual(backup_store.verify(store=self.store), {second['id']: []})
+
+    def test_prune_waits_for_a_snapshot_in_progress(self):
+        manifest = backup_store.snapshot(self.db_path, self.store)
+        with backup_store._store_lock(self.store):
+            # As if a snapshot had found these chunks stored but not yet written its manifest
+            for path in (Path(self.store) / 'snapshots').glob('*.json'):
+                path.rename(path.with_name(path.name + '.pending'))
+            pruning = threading.Thread(target=backup_store.prune, kwargs={'keep_last': 1, 'store': self.store})
+            pruning.start()
+            pruning.join(0.3)
+            self.assertTrue(pruning.is_alive())
+            for path in (Path(self.store) / 'snapshots').glob('*.pending'):
+                path.rename(path.with_name(path.name[:-len('.pending')]))
+        pruning.join(5)
+        self.assertFalse(pruning.is_alive())
+        self.assertEqual(backup_store.verify(store=self.store), {manifest['id']: []})
+
+if __name__ == "__main__":
+    unittest.main()
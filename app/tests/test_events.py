@@ -0,0 +1,79 @@
+import gc
+import unittest
+from ..core import events
+from ..core.events import publish, subscribe, unsubscribe, PAYMENT_RECORDED, STUDENT_CHANGED, FEE_CHANGED
+from ..core.payment_manager import record_payment, get_arrears
+from ..core.fee_manager import set_fee
+from ..core.student_manager import create_student, update_student, delete_student
+from . import TempDatabaseTestCase
+
+class Listener:
+    def __init__(self, event):
+        self.received = []
+        subscribe(event, self.on_event)
+
+    def on_event(self, **payload):
+        self.received.append(payload)
+
+class TestEventBus(unittest.TestCase):
+    def setUp(self):
+        self.saved = dict(events._subscribers)
+        events._subscribers.clear()
+
+    def tearDown(self):
+        events._subscribers.clear()
+        events._subscribers.update(self.saved)
+
+    def test_subscribers_are_held_weakly(self):
+        listener = Listener('test.event')
+        publish('test.event', value=1)
+        self.assertEqual(listener.received, [{'value': 1}])
+        del listener
+        gc.collect()
+        publish('test.event', value=2)
+        self.assertEqual(events._subscribers['test.event'], [])
+
+    def test_failing_subscriber_does_not_stop_the_rest(self):
+        def broken(**payload):
+            raise RuntimeError("boom")
+        subscribe('test.event', broken)
+        listener = Listener('test.event')
+        publish('test.event', value=1)
+        self.assertEqual(listener.received, [{'value': 1}])
+        unsubscribe('test.event', listener.on_event)
+        publish('test.event', value=2)
+        self.assertEqual(len(listener.received), 1)
+
+class TestManagerEvents(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.students = Listener(STUDENT_CHANGED)
+        self.fees = Listener(FEE_CHANGED)
+        self.payments = Listener(PAYMENT_RECORDED)
+
+    def test_changes_carry_the_rows_views_need(self):
+        student_id = create_student("ADM001", "Student A", 1, "0700000001")
+        set_fee(student_id, 1000.0)
+        payment_id, receipt_no = record_payment(student_id, 400.0, "M-Pesa", "2025-08-02", 1, mpesa_code="QWE123")
+        update_student(student_id, class_id=2)
+        delete_student(student_id)
+
+        created, updated, deleted = self.students.received
+        self.assertEqual((created['action'], created['student']['class_name'], created['previous']), ('created', 'Grade 1', None))
+        self.assertEqual((updated['previous']['class_name'], updated['student']['class_name']), ('Grade 1', 'Grade 2'))
+        self.assertEqual((deleted['action'], deleted['student'], deleted['previous']['id']), ('deleted', None, student_id))
+        self.assertEqual(self.fees.received, [{'student_ids': [student_id], 'class_id': None}])
+        payment = self.payments.received[0]['payment']
+        self.assertEqual((payment['id'], payment['receipt_no'], payment['amount'], payment['ref_code']),
+                         (payment_id, receipt_no, 400.0, 'QWE123'))
+
+    def test_arrears_for_changed_students_only(self):
+        a = create_student("ADM001", "Student A", 1, "0700000001")
+        b = create_student("ADM002", "Student B", 1, "0700000002")
+        set_fee(a, 1000.0)
+        set_fee(b, 500.0)
+        rows = get_arrears(student_ids=[b])
+        self.assertEqual([(r['student_id'], r['arrears']) for r in rows], [(b, 500.0)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import csv
+import os
+import unittest
+from unittest import mock
+from . import TempDatabaseTestCase
+from ..core.kpi_manager import get_dashboard_kpis, get_collection_breakdown, rebuild_rollups
+from ..core import payment_manager
+from ..core.db_manager import DBManager
+from ..core.payment_manager import record_payment, get_arrears
+from ..core.fee_manager import set_fee
+from ..core.student_manager import create_student, delete_student
+from ..core.report_manager import export_arrears
+
+class TestKpiRollups(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.a = create_student("ADM001", "Student A", 1, "0700000001")
+        self.b = create_student("ADM002", "Student B", 2, "0700000002")
+        set_fee(self.a, 1000.0)
+        set_fee(self.b, 500.0)
+
+    def kpis(self):
+        return get_dashboard_kpis(('2025-08-01', '2025-09-01'), ('2025-07-01', '2025-08-01'))
+
+    def test_incremental_matches_rebuild(self):
+        record_payment(self.a, 300.0, "Cash", "2025-07-10", 1)
+        record_payment(self.a, 900.0, "M-Pesa", "2025-08-02", 1, mpesa_code="QWE123")
+        record_payment(self.b, 200.0, "Cash", "2025-08-03", 1)
+        incremental = self.kpis()
+        self.assertEqual(incremental['month_collected'], 1100.0)
+        self.assertEqual(incremental['month_payments'], 2)
+        self.assertAlmostEqual(incremental['change_pct'], (1100.0 - 300.0) / 300.0 * 100)
+        # Student A overpaid by 200; only B's 300 is outstanding
+        self.assertEqual(incremental['outstanding_arrears'], 300.0)
+        self.assertAlmostEqual(incremental['collection_rate'], 1400.0 / 1500.0 * 100)
+        rebuild_rollups()
+        self.assertEqual(self.kpis(), incremental)
+
+    def test_fee_change_and_delete(self):
+        record_payment(self.b, 200.0, "Cash", "2025-08-03", 1)
+        set_fee(self.b, 800.0)
+        self.assertEqual(self.kpis()['outstanding_arrears'], 1000.0 + 600.0)
+        delete_student(self.a)
+        self.assertEqual(self.kpis()['outstanding_arrears'], 600.0)
+
+    def test_payment_and_rollups_commit_together(self):
+        before = self.kpis()
+        # A failure after the rollups were touched leaves neither the payment nor the rollups behind
+        with mock.patch.object(payment_manager, 'update_student_aging', side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                record_payment(self.a, 300.0, "Cash", "2025-08-02", 1)
+        with DBManager() as db:
+            self.assertEqual(db.fetch_one("SELECT COUNT(*) FROM payments")[0], 0)
+        self.assertEqual(self.kpis(), before)
+
+    def test_breakdown_by_method(self):
+        record_payment(self.a, 100.0, "Cash", "2025-08-02", 1)
+        record_payment(self.b, 50.0, "Cash", "2025-08-05", 1)
+        record_payment(self.b, 70.0, "Cheque", "2025-08-06", 1, transaction_code="CHQ1")
+        rows = {r[0]: r[1] for r in get_collection_breakdown('2025-08-01', '2025-09-01', by='method')}
+        self.assertEqual(rows, {'Cash': 150.0, 'Cheque': 70.0})
+
+    def test_arrears_single_query(self):
+        record_payment(self.a, 400.0, "Cash", "2025-08-02", 1)
+        rows = get_arrears(min_arrears=0, order_by='arrears')
+        self.assertEqual([(r['admission_number'], r['arrears']) for r in rows], [("ADM001", 600.0), ("ADM002", 500.0)])
+        self.assertEqual(len(get_arrears(min_arrears=550)), 1)
+        self.assertEqual(len(get_arrears(min_arrears=0, limit=1)), 1)
+
+    def test_arrears_export_streams_typed_values(self):
+        record_payment(self.a, 250.0, "Cash", "2025-08-02", 1)
+        filename = os.path.join(self.tmp.name, 'arrears.csv')
+        _, rows = export_arrears(filename, None, min_arrears=0, order_by='arrears')
+        self.assertEqual(rows, 2)
+        with open(filename, newline='', encoding='utf-8') as f:
+            lines = list(csv.reader(f))
+        self.assertEqual(lines[0][0], 'Admission No')
+        self.assertEqual(lines[1], ['ADM001', 'Student A', 'Grade 1', '0700000001', '1000.0', '250.0', '750.0'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import sqlite3
+import unittest
+from unittest import mock
+from ..core import migrations, models
+from ..core.auth import Auth
+from ..core.db_manager import DBManager
+from ..core.initialize_db import init_db
+from ..core.migrations import migrate, schema_version, SCHEMA_VERSION
+from . import TempDatabaseTestCase
+
+# The schema the old app/scripts.initialize_database created
+LEGACY_SCHEMA = """
+    CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(50) UNIQUE NOT NULL, password VARCHAR(255) NOT NULL,
+                        role VARCHAR(50) NOT NULL CHECK (role IN ('admin', 'clerk')));
+    CREATE TABLE classes (id INTEGER PRIMARY KEY, name VARCHAR(50) UNIQUE NOT NULL);
+    CREATE TABLE students (id INTEGER PRIMARY KEY, admission_number VARCHAR(50) UNIQUE NOT NULL, name VARCHAR(100) NOT NULL,
+                           class_id INTEGER, guardian_contact VARCHAR(15), profile_picture VARCHAR(255), bus_location VARCHAR(50));
+    CREATE TABLE fees (id INTEGER PRIMARY KEY, student_id INTEGER UNIQUE NOT NULL, total_fees DECIMAL(10, 2) NOT NULL,
+                       bus_fee DECIMAL(10, 2) DEFAULT 0.00);
+    CREATE TABLE payments (id INTEGER PRIMARY KEY, student_id INTEGER NOT NULL, amount DECIMAL(10, 2) NOT NULL,
+                           method VARCHAR(50) NOT NULL, date DATE NOT NULL, clerk_id INTEGER NOT NULL,
+                           receipt_no VARCHAR(50) UNIQUE NOT NULL);
+    CREATE TABLE audit_logs (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, action VARCHAR(255) NOT NULL,
+                             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP);
+    INSERT INTO users (username, password, role) VALUES ('admin', 'admin123', 'admin');
+    INSERT INTO classes (name) VALUES ('Grade 4');
+    INSERT INTO students (admission_number, name, class_id) VALUES ('ADM001', 'Student A', 1);
+    INSERT INTO fees (student_id, total_fees, bus_fee) VALUES (1, 1000, 200);
+    INSERT INTO payments (student_id, amount, method, date, clerk_id, receipt_no) VALUES (1, 300, 'Cash', '2025-08-01', 1, 'R1');
+    INSERT INTO audit_logs (user_id, action) VALUES (1, 'Recorded payment R1');
+"""
+
+class TestMigrations(TempDatabaseTestCase):
+    migrate = False
+
+    def test_fresh_database_reaches_current_version_once(self):
+        init_db()
+        with DBManager() as db:
+            self.assertEqual(schema_version(db), SCHEMA_VERSION)
+            self.assertEqual(db.fetch_one("SELECT COUNT(*) FROM classes")[0], 8)
+            statements = []
+            db.conn.set_trace_callback(statements.append)
+            self.assertEqual(migrate(db), SCHEMA_VERSION)
+            db.conn.set_trace_callback(None)
+        # An up-to-date database costs one PRAGMA read
+        self.assertEqual(statements, ["PRAGMA user_version"])
+
+    def test_migrated_schema_matches_models(self):
+        def schema(conn):
+            objects = conn.execute(
+                # Table SQL differs once ALTER TABLE has added columns, so tables are compared by their columns
+                "SELECT type, name, CASE WHEN type = 'table' THEN NULL ELSE sql END FROM sqlite_master "
+                "WHERE name NOT LIKE 'sqlite_%' AND name NOT LIKE 'audit_logs_fts_%' ORDER BY type, name"
+            ).fetchall()
+            columns = {name: conn.execute(f"PRAGMA table_xinfo({name})").fetchall() for kind, name, _ in objects if kind == 'table'}
+            return objects, columns
+        init_db()
+        migrated = sqlite3.connect(self.db_path)
+        current = sqlite3.connect(':memory:')
+        try:
+            for sql in models.tables + models.indexes + [models.audit_events_view] + models.audit_fts:
+                current.execute(sql)
+            self.assertEqual(schema(migrated), schema(current))
+        finally:
+            migrated.close()
+            current.close()
+
+    def test_legacy_scripts_schema_is_upgraded(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(LEGACY_SCHEMA)
+        conn.close()
+        init_db()
+        with DBManager() as db:
+            self.assertEqual(schema_version(db), SCHEMA_VERSION)
+            admin = db.fetch_one("SELECT username, email, password FROM users")
+            self.assertEqual(admin['email'], 'admin@barsiele.ac.ke')
+            self.assertTrue(Auth.hasher.verify('admin123', admin['password']))
+            self.assertEqual(db.fetch_one("SELECT boarding_fee FROM fees")[0], 0.0)
+            self.assertIsNone(db.fetch_one("SELECT mpesa_code FROM payments")[0])
+            # Failed sign-ins are logged without a user
+            db.execute("INSERT INTO audit_logs (user_id, action) VALUES (NULL, 'Failed login')")
+            # Existing classes are kept rather than reseeded, and the rollups see the old payment
+            self.assertEqual(db.fetch_one("SELECT COUNT(*) FROM classes")[0], 1)
+            self.assertEqual(tuple(db.fetch_one("SELECT expected, paid FROM kpi_totals")), (1200.0, 300.0))
+            self.assertEqual(db.fetch_one("SELECT action FROM audit_logs WHERE id = 1")[0], 'Recorded payment R1')
+            columns = {col[1] for col in db.fetch_all("PRAGMA table_info(audit_logs)")}
+            self.assertTrue({'event_type', 'entity_type', 'entity_id', 'payload'} <= columns)
+
+    def test_failed_step_rolls_back_to_previous_version(self):
+        def broken(db):
+            db.execute("CREATE TABLE half_done (id INTEGER)")
+            raise RuntimeError("boom")
+        steps = migrations.MIGRATIONS + [(SCHEMA_VERSION + 1, "broken", broken)]
+        init_db()
+        with mock.patch.object(migrations, 'MIGRATIONS', steps), mock.patch.object(migrations, 'SCHEMA_VERSION', SCHEMA_VERSION + 1):
+            with DBManager() as db:
+                with self.assertRaises(RuntimeError):
+                    migrate(db, SCHEMA_VERSION + 1)
+                self.assertEqual(schema_version(db), SCHEMA_VERSION)
+                self.assertIsNone(db.fetch_one("SELECT 1 FROM sqlite_master WHERE name = 'half_done'"))
+
+if __name__ == "__main__":
+    unittest.main()
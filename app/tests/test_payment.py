@@ -1,15 +1,12 @@
 import unittest
-from ..core.db_manager import DBManager
-from ..core.payment_manager import record_payment, get_balance
+from ..core.payment_manager import record_payment, get_balance, get_payment_history
 from ..core.fee_manager import set_fee
 from ..core.student_manager import create_student
+from . import TempDatabaseTestCase
 
-class TestPayment(unittest.TestCase):
+class TestPayment(TempDatabaseTestCase):
     def setUp(self):
-        self.db = DBManager()
-        self.db.execute("DELETE FROM payments")
-        self.db.execute("DELETE FROM fees")
-        self.db.execute("DELETE FROM students")
+        super().setUp()
         self.student_id = create_student("ADM001", "Test Student", 1, "guardian@example.com")
         set_fee(self.student_id, 1000.0)
 
@@ -18,8 +15,15 @@ class TestPayment(unittest.TestCase):
         balance = get_balance(self.student_id)
         self.assertEqual(balance, 500.0)
 
-    def tearDown(self):
-        self.db.close()
+    def test_history_pages_carry_a_running_balance(self):
+        for day in (3, 1, 2, 2):
+            record_payment(self.student_id, 100.0, "cash", f"2025-08-0{day}", 1)
+        first = get_payment_history(self.student_id, limit=3)
+        oldest = first[-1]
+        rest = get_payment_history(self.student_id, before=(oldest['date'], oldest['id']), limit=3)
+        history = first + rest
+        self.assertEqual([p['date'] for p in history], ["2025-08-03", "2025-08-02", "2025-08-02", "2025-08-01"])
+        self.assertEqual([p['balance_after'] for p in history], [600.0, 700.0, 800.0, 900.0])
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import unittest
+from ..core import db_manager
+from ..core.db_manager import DBManager
+from ..core.query_profiler import QueryProfiler, format_summary
+from . import TempDatabaseTestCase
+
+class TestQueryProfiler(TempDatabaseTestCase):
+    migrate = False
+
+    def setUp(self):
+        super().setUp()
+        self.slow_log = os.path.join(self.tmp.name, 'slow_queries.log')
+        self.previous = db_manager.profiler
+
+    def tearDown(self):
+        db_manager.profiler = self.previous
+
+    def run_statements(self):
+        with DBManager() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY, name TEXT)")
+            for i in range(3):
+                db.execute("INSERT INTO t (name) VALUES (?)", (f"name {i}",))
+            db.fetch_all("SELECT * FROM t WHERE name LIKE 'name%'")
+            db.fetch_one("SELECT * FROM t WHERE id = 2")
+
+    def test_statements_are_grouped_with_their_caller(self):
+        profiler = QueryProfiler(slow_ms=10_000, slow_log=self.slow_log, save_path=None)
+        profiler.enable()
+        self.run_statements()
+        profiler.disable()
+        self.run_statements()  # not recorded
+
+        summary = profiler.summary()
+        insert = next(s for s in summary['by_calls'] if s['sql'].startswith("INSERT"))
+        self.assertEqual((summary['by_calls'][0]['sql'], insert['calls'], insert['rows']),
+                         ("INSERT INTO t (name) VALUES (?)", 3, 3))
+        scan = next(s for s in summary['by_total'] if "LIKE" in s['sql'])
+        self.assertEqual((scan['sql'], scan['rows']), ("SELECT * FROM t WHERE name LIKE ?", 3))
+        self.assertIn("test_query_profiler.py:run_statements", next(iter(insert['callers'])))
+        self.assertEqual(summary['connections']['opened'], 1)
+        self.assertEqual(summary['slow'], [])
+        self.assertFalse(os.path.exists(self.slow_log))
+        self.assertTrue(format_summary(summary))
+
+    def test_slow_statements_are_logged_with_their_plan(self):
+        profiler = QueryProfiler(slow_ms=0, slow_log=self.slow_log, save_path=None)
+        profiler.enable()
+        self.run_statements()
+        profiler.disable()
+
+        lookup = next(e for e in profiler.slow if e['sql'] == "SELECT * FROM t WHERE id = 2")
+        self.assertTrue(any("USING INTEGER PRIMARY KEY" in step for step in lookup['plan']))
+        with open(self.slow_log, encoding='utf-8') as f:
+            self.assertIn("SELECT * FROM t WHERE id = 2", f.read())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from ..core.db_manager import connection_hooks
+from ..core.auth import Auth
+from ..core.fee_manager import set_bus_location, set_food_requirements, get_food_requirements
+from ..core.reference_data import reference_data, add_class, delete_class
+from . import TempDatabaseTestCase
+
+class TestReferenceData(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.connections = 0
+        connection_hooks.append(self.count_connection)
+
+    def tearDown(self):
+        connection_hooks.remove(self.count_connection)
+
+    def count_connection(self, conn):
+        self.connections += 1
+
+    def test_lookups_are_served_from_memory(self):
+        self.assertEqual(len(reference_data.classes()), 8)
+        loaded = self.connections
+        grade_4 = reference_data.class_id("Grade 4")
+        self.assertEqual(reference_data.class_name(grade_4), "Grade 4")
+        self.assertIsNone(reference_data.class_id("Grade 12"))
+        self.assertEqual([c.name for c in reference_data.classes()][:2], ["Grade 1", "Grade 2"])
+        self.assertEqual(self.connections, loaded)
+
+    def test_writes_invalidate(self):
+        self.assertIsNone(reference_data.bus_fee("Kericho"))
+        set_bus_location("Kericho", 1500.0)
+        self.assertEqual(reference_data.bus_fee("Kericho"), 1500.0)
+
+        grade_1 = reference_data.class_id("Grade 1")
+        self.assertEqual(get_food_requirements(grade_1)['maize_kg'], 0.0)
+        set_food_requirements(grade_1, 10.0, 5.0, 2.0)
+        self.assertEqual(get_food_requirements(grade_1), {'maize_kg': 10.0, 'beans_kg': 5.0, 'millet_kg': 2.0})
+
+        add_class("Grade 9")
+        self.assertIsNotNone(reference_data.class_id("Grade 9"))
+        delete_class("Grade 9")
+        self.assertIsNone(reference_data.class_id("Grade 9"))
+
+        Auth.create_user("clerk1", "clerk1@example.com", "secret123", "clerk")
+        user_id = reference_data.user_id("clerk1")
+        self.assertEqual(reference_data.username(user_id), "clerk1")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import logging
+import os
+import sys
+import unittest
+from ..core.db_manager import DBManager, connection_hooks
+from ..core.startup import StartupProfiler, StartupTimer, normalize_sql
+from . import TempDatabaseTestCase
+
+class TestStartupProfiler(TempDatabaseTestCase):
+    migrate = False
+
+    def setUp(self):
+        super().setUp()
+        with open(os.path.join(self.tmp.name, 'profiled_module.py'), 'w') as f:
+            f.write("import logging\nlogging.basicConfig()\nVALUE = sum(range(1000))\n")
+        sys.path.insert(0, self.tmp.name)
+
+    def tearDown(self):
+        sys.path.remove(self.tmp.name)
+        sys.modules.pop('profiled_module', None)
+
+    def test_imports_queries_and_calls_are_filed_under_phases(self):
+        timer = StartupTimer()
+        profiler = StartupProfiler(timer)
+        basic_config = logging.basicConfig
+        profiler.install()
+        try:
+            import profiled_module
+            timer.mark("imports")
+            with DBManager() as db:
+                db.execute("CREATE TABLE t (id INTEGER, name TEXT)")
+                for i in range(3):
+                    db.execute("INSERT INTO t VALUES (?, ?)", (i, f"name {i}"))
+            timer.mark("database")
+        finally:
+            profiler.uninstall()
+        self.assertEqual(profiled_module.VALUE, 499500)
+        self.assertIs(logging.basicConfig, basic_config)
+        self.assertNotIn(profiler, sys.meta_path)
+        self.assertNotIn(profiler._trace, connection_hooks)
+
+        report = profiler.report()
+        imported = {record['module']: record for record in report['imports']}
+        self.assertEqual(imported['profiled_module']['phase'], 'imports')
+        self.assertEqual(report['calls']['logging.basicConfig']['count'], 1)
+        # The trace also sees the BEGIN / COMMIT around each statement
+        self.assertEqual([(p['phase'], p['queries']) for p in report['phases']],
+                         [('imports', 0), ('database', sum(q['count'] for q in report['queries']))])
+        inserts = [q for q in report['queries'] if q['sql'].startswith('INSERT')]
+        self.assertEqual(inserts, [{'phase': 'database', 'sql': 'INSERT INTO t VALUES (?, ?)', 'count': 3}])
+
+    def test_marks_after_the_report_are_ignored(self):
+        ticks = iter(range(10))
+        timer = StartupTimer(clock=lambda: next(ticks))
+        timer.mark("authenticate")
+        timer.mark("main window")
+        self.assertEqual(timer.report("Login to usable")['total'], 2)
+        # A tab opened later is not part of the startup run
+        timer.mark("ReportTab")
+        self.assertEqual([phase for phase, _ in timer.phases], ["authenticate", "main window"])
+        timer.start()
+        timer.mark("authenticate")
+        self.assertEqual([phase for phase, _ in timer.phases], ["authenticate"])
+
+    def test_normalize_sql(self):
+        self.assertEqual(normalize_sql("SELECT * FROM users\n  WHERE name = 'O''Brien' AND id = 12 AND fee > 3.5"),
+                         "SELECT * FROM users WHERE name = ? AND id = ? AND fee > ?")
+
+if __name__ == "__main__":
+    unittest.main()
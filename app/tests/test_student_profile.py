@@ -0,0 +1,46 @@
+import unittest
+from ..core.db_manager import connection_hooks
+from ..core.fee_manager import set_fee
+from ..core.payment_manager import record_payment
+from ..core.student_manager import create_student, update_student, get_student_profile, invalidate_student_profile
+from . import TempDatabaseTestCase
+
+class TestStudentProfile(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        invalidate_student_profile()
+        self.student_id = create_student("ADM001", "Student A", 1, "0700000001")
+        set_fee(self.student_id, 1000.0, 200.0)
+        self.connections = 0
+        connection_hooks.append(self.count_connection)
+
+    def tearDown(self):
+        connection_hooks.remove(self.count_connection)
+        invalidate_student_profile()
+
+    def count_connection(self, conn):
+        self.connections += 1
+
+    def test_profile_is_read_over_one_connection(self):
+        profile = get_student_profile(self.student_id)
+        self.assertEqual(self.connections, 1)
+        self.assertEqual(profile['student']['class_name'], "Grade 1")
+        self.assertEqual(profile['fee'], {'total_fees': 1000.0, 'bus_fee': 200.0, 'boarding_fee': 0})
+        self.assertEqual((profile['paid'], profile['balance']), (0, 1200.0))
+        self.assertEqual(profile['food_requirements'], {'maize_kg': 0.0, 'beans_kg': 0.0, 'millet_kg': 0.0})
+        self.assertIsNone(get_student_profile(9999))
+
+    def test_cache_is_dropped_when_the_student_changes(self):
+        get_student_profile(self.student_id)
+        self.assertIs(get_student_profile(self.student_id), get_student_profile(self.student_id))
+        self.assertEqual(self.connections, 1)
+
+        record_payment(self.student_id, 400.0, "Cash", "2025-08-02", 1)
+        profile = get_student_profile(self.student_id)
+        self.assertEqual((profile['paid'], profile['balance'], len(profile['payments'])), (400.0, 800.0, 1))
+
+        update_student(self.student_id, class_id=2)
+        self.assertEqual(get_student_profile(self.student_id)['student']['class_name'], "Grade 2")
+
+if __name__ == "__main__":
+    unittest.main()
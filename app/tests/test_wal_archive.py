@@ -0,0 +1,96 @@
+import gzip
+import os
+import sqlite3
+import unittest
+from datetime import datetime
+from unittest import mock
+from ..core.audit_log import audit_sink
+from ..core.payment_manager import record_payment
+from ..core.student_manager import create_student, delete_student
+from ..scripts.wal_archive import WalArchiver, list_generations, restore
+from . import TempDatabaseTestCase
+
+class TestWalArchive(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.archive = os.path.join(self.tmp.name, 'wal')
+        self.now = datetime(2025, 9, 1, 7, 0)
+        # A low checkpoint threshold so the day crosses several WAL restarts
+        self.archiver = WalArchiver(self.db_path, self.archive, checkpoint_frames=40, clock=lambda: self.now)
+        self.archiver.start()
+
+    def tearDown(self):
+        audit_sink.flush()
+        self.archiver.close()
+
+    def state(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            students = conn.execute("SELECT id, admission_number, name FROM students ORDER BY id").fetchall()
+            payments = conn.execute("SELECT id, student_id, amount, date FROM payments ORDER BY id").fetchall()
+            return students, payments
+        finally:
+            conn.close()
+
+    def sync_at(self, hour, minute):
+        audit_sink.flush()
+        self.now = datetime(2025, 9, 1, hour, minute)
+        self.archiver.sync()
+        return self.now, self.state(self.db_path)
+
+    def test_restore_a_school_day_to_any_sync(self):
+        victim = create_student("ADM900", "Wrongly Deleted", 1, "0700000900")
+        record_payment(victim, 1500.0, "Cash", "2025-09-01", 1)
+        checkpoints = [self.sync_at(7, 30)]
+        n = 0
+        for hour in range(8, 17):
+            for _ in range(6):
+                n += 1
+                student_id = create_student(f"ADM{n:03d}", f"Student {n}", 1 + n % 3, f"07{n:08d}")
+                record_payment(student_id, 100.0 * (n % 7 + 1), "M-Pesa", "2025-09-01", 1, mpesa_code=f"MP{n:05d}")
+            if hour == 14:
+                delete_student(victim)
+            checkpoints.append(self.sync_at(hour, 45))
+
+        # The whole day stayed in one generation despite the checkpoints
+        self.assertEqual(len(list_generations(self.archive)), 1)
+        for i, (when, expected) in enumerate(checkpoints):
+            dest = os.path.join(self.tmp.name, f'restored_{i}.db')
+            self.assertEqual(restore(dest, when, self.archive), when.isoformat(sep=' ', timespec='microseconds'))
+            self.assertEqual(self.state(dest), expected)
+
+        # Just before the mistake the student and their payment are still there
+        dest = os.path.join(self.tmp.name, 'before_delete.db')
+        restore(dest, "2025-09-01 14:30", self.archive)
+        students, payments = self.state(dest)
+        self.assertIn("ADM900", [s[1] for s in students])
+        self.assertIn((victim, 1500.0), [(p[1], p[2]) for p in payments])
+
+    def test_damaged_segment_is_rejected(self):
+        create_student("ADM001", "Student 1", 1, "0700000001")
+        self.sync_at(8, 0)
+        generation = list_generations(self.archive)[0]
+        segment = os.path.join(generation['path'], 'wal', '00000002.frames.gz')
+        with gzip.open(segment, 'rb') as f:
+            data = bytearray(f.read())
+        data[-100] ^= 0xFF
+        with open(segment, 'wb') as f:
+            f.write(gzip.compress(bytes(data)))
+        dest = os.path.join(self.tmp.name, 'restored.db')
+        with self.assertRaises(ValueError):
+            restore(dest, None, self.archive)
+        self.assertFalse(os.path.exists(dest))
+
+    def test_generation_with_no_frames_to_ship_starts_at_its_copy(self):
+        self.now = datetime(2025, 9, 1, 8, 0)
+        # As if another connection restarted the WAL just before the first ship
+        with mock.patch.object(WalArchiver, '_ship', return_value=None):
+            with self.archiver._lock:
+                self.archiver._new_generation()
+        generation = list_generations(self.archive)[-1]
+        self.assertEqual((generation['started'], generation['segments']), ("2025-09-01 08:00:00.000000", 0))
+        dest = os.path.join(self.tmp.name, 'restored.db')
+        self.assertEqual(restore(dest, None, self.archive), generation['started'])
+
+if __name__ == "__main__":
+    unittest.main()
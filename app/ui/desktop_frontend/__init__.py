@@ -1,8 +1,21 @@
-from .login import LoginWindow
-from .main import MainWindow
-from .payment_tab import PaymentTab
-from .report_tab import ReportTab
-from .student_tab import StudentTab
-from .user_tab import UserTab
-from .admin_dashboard import AdminDashboard
-from .settings_tab import SettingsTab
\ No newline at end of file
+import importlib
+
+# Imported on first access, so opening the login window does not load every
+# page (and fpdf with it)
+_EXPORTS = {
+    'LoginWindow': 'login',
+    'MainWindow': 'main',
+    'PaymentTab': 'payment_tab',
+    'ReportTab': 'report_tab',
+    'StudentTab': 'student_tab',
+    'UserTab': 'user_tab',
+    'AdminDashboard': 'admin_dashboard',
+    'SettingsTab': 'settings_tab',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
@@ -1,13 +1,21 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QPushButton, QDialog, QMessageBox, QDateEdit, QComboBox
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QPushButton, QDialog, QMessageBox, QDateEdit, QComboBox, QLineEdit
 from PyQt6.QtCore import Qt, QDate
-from ...core.db_manager import DBManager
+from ...core.report_manager import export_query_csv, export_filename
+from ...core.audit_log import audit, audit_event, audit_log_query, get_audit_page
+from ...core.audit_archive import archive_audit_logs, search_archive
+from ...core.config import AUDIT_PAGE_SIZE
+from ...core.reference_data import reference_data
+from .workers import run_in_background
 import logging
+import os
 from datetime import datetime, timedelta
 
 logging.basicConfig(filename='app/logs/activity_logs.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+ARCHIVE_SEARCH_LIMIT = 1000
+
 class ActivityLogsDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, date_range=None):
         super().__init__(parent)
         self.setWindowTitle("Activity Logs - Barsiele Sunrise Academy")
         self.setMinimumSize(1000, 700)
@@ -30,7 +38,7 @@ class ActivityLogsDialog(QDialog):
             }
             QPushButton:hover { background-color: #2980b9; }
             QPushButton:pressed { background-color: #21618c; }
-            QDateEdit, QComboBox { 
+            QDateEdit, QComboBox, QLineEdit { 
                 border: 2px solid #3498db; 
                 border-radius: 8px; 
                 padding: 8px; 
@@ -72,12 +80,21 @@ class ActivityLogsDialog(QDialog):
         self.to_date.setDate(QDate.currentDate())
         self.to_date.setCalendarPopup(True)
         filter_layout.addWidget(self.to_date)
+        if date_range:  # (from, to) QDates to open on instead
+            self.from_date.setDate(date_range[0])
+            self.to_date.setDate(date_range[1])
         
         filter_layout.addWidget(QLabel("User:"))
         self.user_filter = QComboBox()
         self.load_users()
         filter_layout.addWidget(self.user_filter)
         
+        filter_layout.addWidget(QLabel("Search:"))
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Receipt no, M-Pesa code, student id...")
+        self.search_input.returnPressed.connect(self.load_logs)
+        filter_layout.addWidget(self.search_input)
+        
         filter_btn = QPushButton("Apply Filter")
         filter_btn.clicked.connect(self.load_logs)
         filter_layout.addWidget(filter_btn)
@@ -98,215 +115,220 @@ class ActivityLogsDialog(QDialog):
         
         # Buttons
         btn_layout = QHBoxLayout()
-        export_btn = QPushButton("Export Logs")
-        export_btn.clicked.connect(self.export_logs)
-        clear_old_btn = QPushButton("Clear Old Logs")
-        clear_old_btn.clicked.connect(self.clear_old_logs)
+        self.export_btn = QPushButton("Export Logs")
+        self.export_btn.clicked.connect(self.export_logs)
+        archive_old_btn = QPushButton("Archive Old Logs")
+        archive_old_btn.clicked.connect(self.archive_old_logs)
+        self.archive_btn = QPushButton("Search Archive")
+        self.archive_btn.clicked.connect(self.search_archive)
         refresh_btn = QPushButton("Refresh")
         refresh_btn.clicked.connect(self.load_logs)
+        self.newer_btn = QPushButton("< Newer")
+        self.newer_btn.clicked.connect(self.newer_page)
+        self.older_btn = QPushButton("Older >")
+        self.older_btn.clicked.connect(self.older_page)
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(self.close)
         
-        btn_layout.addWidget(export_btn)
-        btn_layout.addWidget(clear_old_btn)
+        btn_layout.addWidget(self.export_btn)
+        btn_layout.addWidget(archive_old_btn)
+        btn_layout.addWidget(self.archive_btn)
         btn_layout.addStretch()
+        btn_layout.addWidget(self.newer_btn)
+        btn_layout.addWidget(self.older_btn)
         btn_layout.addWidget(refresh_btn)
         btn_layout.addWidget(close_btn)
         layout.addLayout(btn_layout)
         
         self.setLayout(layout)
+        self.page = 0
+        self.page_edges = None
         self.load_logs()
     
     def load_users(self):
         try:
-            with DBManager() as db:
-                users = db.fetch_all("SELECT id, username FROM users ORDER BY username")
-                self.user_filter.clear()
-                self.user_filter.addItem("All Users", None)
-                for user_id, username in users:
-                    self.user_filter.addItem(username, user_id)
+            users = reference_data.users()
+            self.user_filter.clear()
+            self.user_filter.addItem("All Users", None)
+            for user in users:
+                self.user_filter.addItem(user.username, user.id)
         except Exception as e:
             logging.error(f"Error loading users for filter: {e}")
     
+    def filters(self):
+        from_date = self.from_date.date().toString("yyyy-MM-dd")
+        to_date = self.to_date.date().toString("yyyy-MM-dd")
+        return from_date, to_date, self.user_filter.currentData(), self.search_input.text().strip()
+    
     def load_logs(self):
+        """Start again from the newest page for the current filters."""
+        self.page = 0
+        self.show_page()
+    
+    def older_page(self):
+        if self.page_edges:
+            self.page += 1
+            self.show_page(before=self.page_edges[1])
+    
+    def newer_page(self):
+        if self.page_edges and self.page > 0:
+            self.page -= 1
+            self.show_page(after=self.page_edges[0])
+    
+    def show_page(self, before=None, after=None):
         try:
-            with DBManager() as db:
-                # Build query based on filters
-                query = """
-                    SELECT al.timestamp, u.username, al.action, al.ip_address, al.user_agent, al.id
-                    FROM audit_logs al
-                    LEFT JOIN users u ON al.user_id = u.id
-                    WHERE 1=1
-                """
-                params = []
-                
-                # Date filters
-                from_date = self.from_date.date().toString("yyyy-MM-dd")
-                to_date = self.to_date.date().toString("yyyy-MM-dd")
-                query += " AND DATE(al.timestamp) BETWEEN ? AND ?"
-                params.extend([from_date, to_date])
-                
-                # User filter
-                selected_user_id = self.user_filter.currentData()
-                if selected_user_id:
-                    query += " AND al.user_id = ?"
-                    params.append(selected_user_id)
-                
-                query += " ORDER BY al.timestamp DESC LIMIT 1000"
-                
-                logs = db.fetch_all(query, params)
-                
-                # Update summary
-                total_logs = len(logs)
-                unique_users = len(set(log[1] for log in logs if log[1]))
-                date_range = f"{from_date} to {to_date}"
-                summary_text = f"Showing {total_logs} log entries from {date_range} | {unique_users} unique users"
-                self.summary_label.setText(summary_text)
-                
-                # Populate table
-                self.logs_table.setRowCount(len(logs))
-                for row, log_entry in enumerate(logs):
-                    timestamp, username, action, ip_address, user_agent, log_id = log_entry
-                    
-                    # Format timestamp
-                    if timestamp:
-                        try:
-                            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                            formatted_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-                        except:
-                            formatted_time = str(timestamp)
-                    else:
-                        formatted_time = ""
-                    
-                    self.logs_table.setItem(row, 0, QTableWidgetItem(formatted_time))
-                    self.logs_table.setItem(row, 1, QTableWidgetItem(username or "System"))
-                    self.logs_table.setItem(row, 2, QTableWidgetItem(action or ""))
-                    self.logs_table.setItem(row, 3, QTableWidgetItem(ip_address or ""))
-                    
-                    # Truncate user agent for display
-                    user_agent_display = (user_agent[:50] + "...") if user_agent and len(user_agent) > 50 else (user_agent or "")
-                    self.logs_table.setItem(row, 4, QTableWidgetItem(user_agent_display))
-                    
-                    # Add details button or additional info
-                    details = f"Log ID: {log_id}"
-                    self.logs_table.setItem(row, 5, QTableWidgetItem(details))
-                
-                # Auto-resize columns
-                self.logs_table.resizeColumnsToContents()
-                
+            from_date, to_date, user_id, text = self.filters()
+            # Fetch one extra row to know whether an older page exists
+            logs = get_audit_page(from_date, to_date, user_id, before, after, limit=AUDIT_PAGE_SIZE + 1, text=text)
+            if after:
+                if len(logs) <= AUDIT_PAGE_SIZE:
+                    # Nothing newer beyond this page; show the newest full page instead
+                    self.load_logs()
+                    return
+                logs = logs[-AUDIT_PAGE_SIZE:]
+                has_older = True
+            else:
+                has_older = len(logs) > AUDIT_PAGE_SIZE
+                logs = logs[:AUDIT_PAGE_SIZE]
+            self.page_edges = ((logs[0][0], logs[0][5]), (logs[-1][0], logs[-1][5])) if logs else None
+            self.newer_btn.setEnabled(self.page > 0)
+            self.older_btn.setEnabled(has_older)
+            
+            # Update summary
+            unique_users = len(set(log[1] for log in logs if log[1]))
+            date_range = f"{from_date} to {to_date}"
+            matching = f" matching '{text}'" if text else ""
+            summary_text = f"Page {self.page + 1}: {len(logs)} log entries{matching} from {date_range} | {unique_users} unique users"
+            self.summary_label.setText(summary_text)
+            
+            self.populate_table(logs)
+            
         except Exception as e:
             logging.error(f"Error loading activity logs: {e}")
             QMessageBox.critical(self, "Error", f"Failed to load activity logs: {str(e)}")
     
-    def export_logs(self):
-        try:
-            import csv
-            from datetime import datetime
-            import os
+    def populate_table(self, logs):
+        self.logs_table.setRowCount(len(logs))
+        for row, log_entry in enumerate(logs):
+            timestamp, username, action, ip_address, user_agent, log_id = log_entry
             
-            # Create reports directory if it doesn't exist
-            reports_dir = "reports"
-            if not os.path.exists(reports_dir):
-                os.makedirs(reports_dir)
+            # Format timestamp
+            if timestamp:
+                try:
+                    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                    formatted_time = dt.strftime("%Y-%m-%d %H:%M:%S")
+                except:
+                    formatted_time = str(timestamp)
+            else:
+                formatted_time = ""
             
-            # Generate filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            from_date = self.from_date.date().toString("yyyy-MM-dd")
-            to_date = self.to_date.date().toString("yyyy-MM-dd")
-            filename = f"reports/activity_logs_{from_date}_to_{to_date}_{timestamp}.csv"
+            self.logs_table.setItem(row, 0, QTableWidgetItem(formatted_time))
+            self.logs_table.setItem(row, 1, QTableWidgetItem(username or "System"))
+            self.logs_table.setItem(row, 2, QTableWidgetItem(action or ""))
+            self.logs_table.setItem(row, 3, QTableWidgetItem(ip_address or ""))
             
-            # Export data
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Write header
-                writer.writerow(["Barsiele Sunrise Academy - Activity Logs"])
-                writer.writerow(["P.O Box 117 LONDIANI"])
-                writer.writerow(["Together we Rise"])
-                writer.writerow([])
-                writer.writerow([f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"])
-                writer.writerow([f"Date Range: {from_date} to {to_date}"])
-                writer.writerow([])
-                
-                # Write table headers
-                headers = []
-                for col in range(self.logs_table.columnCount()):
-                    headers.append(self.logs_table.horizontalHeaderItem(col).text())
-                writer.writerow(headers)
-                
-                # Write data
-                for row in range(self.logs_table.rowCount()):
-                    row_data = []
-                    for col in range(self.logs_table.columnCount()):
-                        item = self.logs_table.item(row, col)
-                        row_data.append(item.text() if item else "")
-                    writer.writerow(row_data)
-            
-            QMessageBox.information(self, "Export Complete", f"Activity logs exported to: {filename}")
+            # Truncate user agent for display
+            user_agent_display = (user_agent[:50] + "...") if user_agent and len(user_agent) > 50 else (user_agent or "")
+            self.logs_table.setItem(row, 4, QTableWidgetItem(user_agent_display))
             
-            # Open the reports folder
+            # Add details button or additional info
+            details = f"Log ID: {log_id}"
+            self.logs_table.setItem(row, 5, QTableWidgetItem(details))
+        
+        # Auto-resize columns
+        self.logs_table.resizeColumnsToContents()
+    
+    def export_logs(self):
+        from_date, to_date, user_id, text = self.filters()
+        query, params = audit_log_query(from_date, to_date, user_id, text=text)
+        self.export_btn.setEnabled(False)
+        run_in_background(
+            self, export_query_csv, export_filename(f"activity_logs_{from_date}_to_{to_date}"),
+            ["Timestamp", "User", "Action", "IP Address", "User Agent", "Log ID"], query, params,
+            "Activity Logs", [f"Date Range: {from_date} to {to_date}"] + ([f"Search: {text}"] if text else []),
+            on_success=self.export_finished, on_error=self.export_failed
+        )
+    
+    def export_finished(self, result):
+        filename, rows = result
+        self.export_btn.setEnabled(True)
+        QMessageBox.information(self, "Export Complete", f"Activity logs exported to: {filename} ({rows} entries)")
+        
+        # Open the reports folder
+        try:
             import subprocess
             subprocess.Popen(f'explorer /select,"{os.path.abspath(filename)}"')
-            
-        except Exception as e:
-            logging.error(f"Error exporting activity logs: {e}")
-            QMessageBox.critical(self, "Error", f"Failed to export logs: {str(e)}")
+        except OSError:
+            pass
+    
+    def export_failed(self, error):
+        self.export_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Failed to export logs: {error}")
     
-    def clear_old_logs(self):
-        reply = QMessageBox.question(self, "Clear Old Logs", 
-                                   "This will delete all logs older than 90 days.\n\nAre you sure you want to continue?",
+    def search_archive(self):
+        """Show archived entries for the current filters (older than the live table keeps)."""
+        from_date, to_date, user_id, text = self.filters()
+        self.archive_btn.setEnabled(False)
+        self.summary_label.setText("Searching archive...")
+        run_in_background(
+            self, search_archive, from_date, to_date, user_id, text, limit=ARCHIVE_SEARCH_LIMIT,
+            on_success=self.show_archive_results, on_error=self.archive_search_failed
+        )
+    
+    def show_archive_results(self, logs):
+        self.archive_btn.setEnabled(True)
+        from_date, to_date, _, _ = self.filters()
+        self.page_edges = None
+        self.newer_btn.setEnabled(False)
+        self.older_btn.setEnabled(False)
+        capped = " (newest shown)" if len(logs) >= ARCHIVE_SEARCH_LIMIT else ""
+        self.summary_label.setText(f"Archive: {len(logs)} log entries from {from_date} to {to_date}{capped} | Refresh to return to live logs")
+        self.populate_table(logs)
+    
+    def archive_search_failed(self, error):
+        self.archive_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Failed to search archive: {error}")
+    
+    def archive_old_logs(self):
+        reply = QMessageBox.question(self, "Archive Old Logs", 
+                                   "This will move all logs older than 90 days to the compressed archive.\n\n"
+                                   "They remain searchable with 'Search Archive'. Continue?",
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                with DBManager() as db:
-                    # Calculate date 90 days ago
-                    cutoff_date = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
-                    
-                    # Count logs to be deleted
-                    count_result = db.fetch_one("SELECT COUNT(*) FROM audit_logs WHERE DATE(timestamp) < ?", (cutoff_date,))
-                    count = count_result[0] if count_result else 0
-                    
-                    if count > 0:
-                        # Delete old logs
-                        db.execute("DELETE FROM audit_logs WHERE DATE(timestamp) < ?", (cutoff_date,))
-                        
-                        # Log this action
-                        db.execute("INSERT INTO audit_logs (user_id, action) VALUES (?, ?)",
-                                  (1, f"Cleared {count} old log entries (older than {cutoff_date})"))
-                        
-                        QMessageBox.information(self, "Logs Cleared", f"Successfully deleted {count} old log entries.")
-                        self.load_logs()  # Refresh the display
-                    else:
-                        QMessageBox.information(self, "No Old Logs", "No logs older than 90 days found.")
+                # Calculate date 90 days ago
+                cutoff_date = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
+                count = archive_audit_logs(cutoff_date)
                 
+                if count > 0:
+                    # Log this action
+                    audit_event('audit.archived', 'audit_log', None, f"Archived {count} old log entries (older than {cutoff_date})",
+                                {'before': cutoff_date, 'rows': count}, critical=True)
+                    
+                    QMessageBox.information(self, "Logs Archived", f"Successfully archived {count} old log entries.")
+                    self.load_logs()  # Refresh the display
+                else:
+                    QMessageBox.information(self, "No Old Logs", "No logs older than 90 days found.")
+            
             except Exception as e:
-                logging.error(f"Error clearing old logs: {e}")
-                QMessageBox.critical(self, "Error", f"Failed to clear old logs: {str(e)}")
+                logging.error(f"Error archiving old logs: {e}")
+                QMessageBox.critical(self, "Error", f"Failed to archive old logs: {str(e)}")
 
 
-def log_user_action(user_id, action, ip_address=None, user_agent=None):
+def log_user_action(user_id, action, ip_address=None, user_agent=None, critical=False):
     """Helper function to log user actions with IP and user agent"""
-    try:
-        with DBManager() as db:
-            db.execute("INSERT INTO audit_logs (user_id, action, ip_address, user_agent) VALUES (?, ?, ?, ?)", 
-                      (user_id, action, ip_address, user_agent))
-    except Exception as e:
-        logging.error(f"Error logging user action: {e}")
+    audit(user_id, action, ip_address, user_agent, critical)
 
 
-def log_login_attempt(username, success, ip_address=None, user_agent=None):
-    """Helper function to log login attempts"""
+def log_login_attempt(username, success, ip_address=None, user_agent=None, user_id=None):
+    """Helper function to log login attempts; failed attempts are flushed immediately"""
     try:
-        with DBManager() as db:
-            # Get user ID if login was successful
-            user_id = None
-            if success:
-                user_result = db.fetch_one("SELECT id FROM users WHERE username = ?", (username,))
-                user_id = user_result[0] if user_result else None
-            
-            action = f"Login {'successful' if success else 'failed'} for user: {username}"
-            db.execute("INSERT INTO audit_logs (user_id, action, ip_address, user_agent) VALUES (?, ?, ?, ?)", 
-                      (user_id, action, ip_address, user_agent))
+        if success and user_id is None:
+            user_id = reference_data.user_id(username)
+        
+        action = f"Login {'successful' if success else 'failed'} for user: {username}"
+        audit_event('auth.login' if success else 'auth.login_failed', 'user', user_id, action, {'identifier': username},
+                    user_id=user_id, critical=not success, ip_address=ip_address, user_agent=user_agent)
     except Exception as e:
         logging.error(f"Error logging login attempt: {e}")
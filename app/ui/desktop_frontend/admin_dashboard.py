@@ -10,19 +10,40 @@ from ...core.fee_manager import (
     set_food_requirements,
     get_food_requirements,
 )
-from ...core.student_manager import get_all_students
 from ...core.student_manager import create_student, update_student, get_student
 from ...core.auth import Auth  # Use Auth class
-from ...core.payment_manager import get_balance  # Import the missing function
+from ...core.payment_manager import get_arrears
+from ...core.kpi_manager import get_dashboard_kpis, expected_fee_sql
 from .user_management import UserManagementDialog
-from .arrears_detail import ArrearsDetailDialog, HighArrearsDialog
+from .arrears_detail import ArrearsDetailDialog, HighArrearsDialog, ArrearsAgingDialog
 from .activity_logs import ActivityLogsDialog
+from .query_profile import QueryProfileDialog
+from .workers import run_in_background
+from .event_relay import on_event
+from ...core.events import PAYMENT_RECORDED, STUDENT_CHANGED, FEE_CHANGED
+from ...core.reference_data import reference_data, add_class, delete_class
 import logging
-import time
 from datetime import datetime
 
 logging.basicConfig(filename='app/logs/admin.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+HIGH_ARREARS_MIN = 500
+
+def class_arrears_sql(class_names=None):
+    """Students and arrears per class, for every class or just the named ones."""
+    where = f"WHERE c.name IN ({', '.join('?' * len(class_names))})" if class_names is not None else ""
+    return f"""
+        SELECT c.name,
+               COUNT(s.id) as num_students,
+               SUM({expected_fee_sql()} - 
+                   COALESCE((SELECT SUM(amount) FROM payments p WHERE p.student_id = s.id), 0)) as arrears
+        FROM classes c
+        LEFT JOIN students s ON c.id = s.class_id
+        LEFT JOIN fees f ON s.id = f.student_id
+        {where}
+        GROUP BY c.name
+    """
+
 class AdminDashboard(QWidget):
     def __init__(self, user):
         super().__init__()
@@ -117,6 +138,14 @@ class AdminDashboard(QWidget):
         food_card = self._create_management_card("Food Collection", "Totals collected vs required; see classes with biggest deficit", self.open_food_overview)
         cards_layout.addWidget(food_card, 1, 1)
         
+        # Arrears Aging Card
+        aging_card = self._create_management_card("Arrears Aging", "Outstanding balances by 0-30/31-60/61-90/90+ days", self.open_arrears_aging)
+        cards_layout.addWidget(aging_card, 1, 2)
+        
+        # Query Profile Card
+        query_card = self._create_management_card("Query Profile", "Slowest and most frequent database statements", self.open_query_profile)
+        cards_layout.addWidget(query_card, 2, 0)
+        
         layout.addLayout(cards_layout)
         
         # Action buttons
@@ -130,7 +159,15 @@ class AdminDashboard(QWidget):
         actions.addStretch(1)
         layout.addLayout(actions)
 
-        # KPI cards removed per request to simplify dashboard
+        # KPI cards (served from the collection rollups, no payment scans)
+        kpi_layout = QHBoxLayout()
+        self.kpi_collected = self._create_kpi_card("Collected This Month", "KSh 0.00")
+        self.kpi_payments = self._create_kpi_card("Payments This Month", "0")
+        self.kpi_rate = self._create_kpi_card("Collection Rate", "0.0%")
+        self.kpi_arrears = self._create_kpi_card("Outstanding Arrears", "KSh 0.00")
+        for card in (self.kpi_collected, self.kpi_payments, self.kpi_rate, self.kpi_arrears):
+            kpi_layout.addWidget(card)
+        layout.addLayout(kpi_layout)
         
         # Class-wise Arrears
         layout.addWidget(QLabel("Arrears by Class:"))
@@ -230,13 +267,16 @@ class AdminDashboard(QWidget):
         
         scroll.setWidget(content)
         outer_layout.addWidget(scroll)
+        self.high_arrears = []
         self.load_data()
+        # Changes elsewhere refresh only the classes and students they touch
+        on_event(self, PAYMENT_RECORDED, lambda payment: self.refresh_students([payment['student_id']]))
+        on_event(self, STUDENT_CHANGED, self.student_changed)
+        on_event(self, FEE_CHANGED, lambda student_ids, class_id: self.refresh_students(student_ids))
 
     def load_classes(self):
-        with DBManager() as db:
-            classes = db.fetch_all("SELECT name FROM classes")
-            self.class_combo.clear()
-            self.class_combo.addItems([c[0] for c in classes])
+        self.class_combo.clear()
+        self.class_combo.addItems([c.name for c in reference_data.classes()])
 
     def _create_management_card(self, title, description, click_handler):
         """Create a clickable management card"""
@@ -286,10 +326,18 @@ class AdminDashboard(QWidget):
         dialog = HighArrearsDialog(self)
         dialog.exec()
         
+    def open_arrears_aging(self):
+        dialog = ArrearsAgingDialog(parent=self)
+        dialog.exec()
+        
     def open_activity_logs(self):
         dialog = ActivityLogsDialog(self)
         dialog.exec()
 
+    def open_query_profile(self):
+        dialog = QueryProfileDialog(self)
+        dialog.exec()
+
     def open_food_overview(self):
         """Show totals collected vs required overall and per class, with deficits."""
         try:
@@ -300,7 +348,7 @@ class AdminDashboard(QWidget):
                     QMessageBox.warning(self, "Unavailable", "Food tracking tables are missing.")
                     return
 
-                classes = db.fetch_all("SELECT id, name FROM classes ORDER BY name")
+                classes = reference_data.classes()
 
                 # Build per-class student counts
                 counts = {cid: 0 for cid, _ in classes}
@@ -310,11 +358,11 @@ class AdminDashboard(QWidget):
 
                 # Requirements per class (per-student quotas x student count)
                 req_map = {cid: {'maize': 0.0, 'beans': 0.0, 'millet': 0.0} for cid, _ in classes}
-                for (cid, maize, beans, millet) in db.fetch_all("SELECT class_id, maize_kg, beans_kg, millet_kg FROM food_requirements"):
+                for cid, req in reference_data.all_food_requirements().items():
                     if cid in counts and cid in req_map:
-                        req_map[cid]['maize'] = float(maize or 0) * counts[cid]
-                        req_map[cid]['beans'] = float(beans or 0) * counts[cid]
-                        req_map[cid]['millet'] = float(millet or 0) * counts[cid]
+                        req_map[cid]['maize'] = float(req['maize_kg'] or 0) * counts[cid]
+                        req_map[cid]['beans'] = float(req['beans_kg'] or 0) * counts[cid]
+                        req_map[cid]['millet'] = float(req['millet_kg'] or 0) * counts[cid]
 
                 # Collected per class from contributions
                 coll_map = {cid: {'maize': 0.0, 'beans': 0.0, 'millet': 0.0} for cid, _ in classes}
@@ -390,67 +438,114 @@ class AdminDashboard(QWidget):
             QMessageBox.critical(self, "Error", f"Failed to open Food Overview: {e}")
 
     def load_data(self):
-        try:
-            with DBManager() as db:
-                # Simulate progress
-                for i in range(0, 101, 20):
-                    self.progress_bar.setValue(i)
-                    time.sleep(0.1)
-                
-                # KPI calculations removed
-                students = get_all_students()
-
-                # Keep header clean
-                self.header.setText(self._greeting(self.user.get('username', 'Admin')))
-                
-                # Class-wise Arrears (handle pre-migration DBs that may not have boarding_fee)
-                fees_cols = db.fetch_all("PRAGMA table_info(fees)")
-                has_boarding = any(col[1] == 'boarding_fee' for col in fees_cols)
-                amount_expr = "COALESCE(f.total_fees, 0) + COALESCE(f.bus_fee, 0)"
-                if has_boarding:
-                    amount_expr += " + COALESCE(f.boarding_fee, 0)"
-                class_arrears = db.fetch_all(f"""
-                    SELECT c.name,
-                           COUNT(s.id) as num_students,
-                           SUM({amount_expr} - 
-                               COALESCE((SELECT SUM(amount) FROM payments p WHERE p.student_id = s.id), 0)) as arrears
-                    FROM classes c
-                    LEFT JOIN students s ON c.id = s.class_id
-                    LEFT JOIN fees f ON s.id = f.student_id
-                    GROUP BY c.name
-                """)
-                self.class_arrears_table.setRowCount(len(class_arrears))
-                for row, (class_name, num_students, arrears) in enumerate(class_arrears):
-                    self.class_arrears_table.setItem(row, 0, QTableWidgetItem(class_name or ""))
-                    self.class_arrears_table.setItem(row, 1, QTableWidgetItem(str(num_students or 0)))
-                    arrears_value = arrears if arrears and arrears > 0 else 0
-                    self.class_arrears_table.setItem(row, 2, QTableWidgetItem(f"KSh {arrears_value:,.2f}"))
-                
-                # High Arrears Students
-                high_arrears_students = []
-                for student in students:
-                    balance = get_balance(student[0])
-                    if balance > 500:
-                        high_arrears_students.append((student[0], student[2], student[7], balance))  # id, name, class_name, balance
-                
-                self.high_arrears_table.setRowCount(len(high_arrears_students))
-                for row, (id, name, class_name, arrears) in enumerate(high_arrears_students):
-                    self.high_arrears_table.setItem(row, 0, QTableWidgetItem(str(id)))
-                    self.high_arrears_table.setItem(row, 1, QTableWidgetItem(name or ""))
-                    self.high_arrears_table.setItem(row, 2, QTableWidgetItem(class_name or ""))
-                    self.high_arrears_table.setItem(row, 3, QTableWidgetItem(f"KSh {arrears:,.2f}"))
-                
-                # Logs summary (replace old table usage)
-                logs = db.fetch_all("SELECT user_id, action, timestamp FROM audit_logs ORDER BY timestamp DESC LIMIT 5")
-                summary_lines = []
-                for (user_id, action, timestamp) in logs:
-                    summary_lines.append(f"{timestamp} - User {user_id or 'N/A'}: {action}")
-                self.logs_summary.setText("\n".join(summary_lines) if summary_lines else "No recent activity.")
-                
-                self.progress_bar.setValue(100)
-        except Exception as e:
-            logging.error(f"Error loading dashboard data: {e}")
-            QMessageBox.critical(self, "Error", f"Failed to load dashboard: {str(e)}")
+        """Fetch the figures off the UI thread; the progress bar runs until they arrive."""
+        self.progress_bar.setRange(0, 0)
+        run_in_background(self, self.fetch_data, on_success=self.show_data, on_error=self.load_failed)
+
+    def fetch_data(self):
+        kpis = get_dashboard_kpis(self._month_range(0), self._month_range(-1))
+        with DBManager() as db:
+            class_arrears = db.fetch_all(class_arrears_sql())
+            logs = db.fetch_all("SELECT user_id, action, timestamp FROM audit_logs ORDER BY timestamp DESC LIMIT 5")
+        high_arrears_students = [
+            (r['student_id'], r['name'], r['class_name'], r['arrears'])
+            for r in get_arrears(min_arrears=HIGH_ARREARS_MIN, order_by='arrears')
+        ]
+        return {
+            'kpis': kpis,
+            'class_arrears': [tuple(row) for row in class_arrears],
+            'high_arrears': high_arrears_students,
+            'logs': [tuple(row) for row in logs],
+        }
+
+    def show_data(self, data):
+        self._show_kpis(data['kpis'])
+
+        # Keep header clean
+        self.header.setText(self._greeting(self.user.get('username', 'Admin')))
+
+        # Class-wise Arrears
+        self.class_arrears_table.setRowCount(len(data['class_arrears']))
+        for row, values in enumerate(data['class_arrears']):
+            self._set_class_row(row, values)
+
+        # High Arrears Students
+        self.high_arrears = data['high_arrears']
+        self._show_high_arrears()
+
+        # Logs summary (replace old table usage)
+        summary_lines = []
+        for (user_id, action, timestamp) in data['logs']:
+            summary_lines.append(f"{timestamp} - User {user_id or 'N/A'}: {action}")
+        self.logs_summary.setText("\n".join(summary_lines) if summary_lines else "No recent activity.")
+
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(100)
+
+    def _show_kpis(self, kpis):
+        self._set_kpi_value(self.kpi_collected, f"KSh {kpis['month_collected']:,.2f}", kpis['change_pct'])
+        self._set_kpi_value(self.kpi_payments, f"{kpis['month_payments']:,}")
+        self._set_kpi_value(self.kpi_rate, f"{kpis['collection_rate']:.1f}%")
+        self._set_kpi_value(self.kpi_arrears, f"KSh {kpis['outstanding_arrears']:,.2f}")
+
+    def _set_class_row(self, row, values):
+        class_name, num_students, arrears = values
+        self.class_arrears_table.setItem(row, 0, QTableWidgetItem(class_name or ""))
+        self.class_arrears_table.setItem(row, 1, QTableWidgetItem(str(num_students or 0)))
+        arrears_value = arrears if arrears and arrears > 0 else 0
+        self.class_arrears_table.setItem(row, 2, QTableWidgetItem(f"KSh {arrears_value:,.2f}"))
+
+    def _show_high_arrears(self):
+        self.high_arrears_table.setRowCount(len(self.high_arrears))
+        for row, (id, name, class_name, arrears) in enumerate(self.high_arrears):
+            self.high_arrears_table.setItem(row, 0, QTableWidgetItem(str(id)))
+            self.high_arrears_table.setItem(row, 1, QTableWidgetItem(name or ""))
+            self.high_arrears_table.setItem(row, 2, QTableWidgetItem(class_name or ""))
+            self.high_arrears_table.setItem(row, 3, QTableWidgetItem(f"KSh {arrears:,.2f}"))
+
+    def student_changed(self, action, student, previous):
+        # A class move changes the old class's row as well as the new one's
+        rows = [row for row in (student, previous) if row]
+        self.refresh_students([rows[0]['id']], {row['class_name'] for row in rows})
+
+    def refresh_students(self, student_ids, class_names=()):
+        """Re-read the KPIs, the rows of the given students and the rows of their classes."""
+        run_in_background(self, self.fetch_student_changes, list(student_ids), set(class_names),
+                          on_success=self.show_student_changes,
+                          on_error=lambda error: logging.error(f"Error refreshing dashboard rows: {error}"))
+
+    def fetch_student_changes(self, student_ids, class_names):
+        kpis = get_dashboard_kpis(self._month_range(0), self._month_range(-1))
+        students = get_arrears(student_ids=student_ids)
+        class_names = sorted(class_names | {r['class_name'] for r in students})
+        with DBManager() as db:
+            class_arrears = db.fetch_all(class_arrears_sql(class_names), class_names)
+        return {
+            'kpis': kpis,
+            'student_ids': set(student_ids),
+            'class_arrears': [tuple(row) for row in class_arrears],
+            'high_arrears': [(r['student_id'], r['name'], r['class_name'], r['arrears'])
+                             for r in students if r['arrears'] > HIGH_ARREARS_MIN],
+        }
+
+    def show_student_changes(self, data):
+        self._show_kpis(data['kpis'])
+        for values in data['class_arrears']:
+            matches = self.class_arrears_table.findItems(values[0], Qt.MatchFlag.MatchExactly)
+            row = next((item.row() for item in matches if item.column() == 0), None)
+            if row is None:
+                row = self.class_arrears_table.rowCount()
+                self.class_arrears_table.insertRow(row)
+            self._set_class_row(row, values)
+        kept = [r for r in self.high_arrears if r[0] not in data['student_ids']]
+        self.high_arrears = sorted(kept + data['high_arrears'], key=lambda r: (-r[3], r[1]))
+        self._show_high_arrears()
+
+    def load_failed(self, error):
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        logging.error(f"Error loading dashboard data: {error}")
+        QMessageBox.critical(self, "Error", f"Failed to load dashboard: {error}")
 
     def show_students_for_class(self, row, column):
         try:
@@ -458,11 +553,10 @@ class AdminDashboard(QWidget):
             if not class_name_item:
                 return
             class_name = class_name_item.text()
+            class_id = reference_data.class_id(class_name)
+            if class_id is None:
+                return
             with DBManager() as db:
-                class_row = db.fetch_one("SELECT id FROM classes WHERE name = ?", (class_name,))
-                if not class_row:
-                    return
-                class_id = class_row[0]
                 students = db.fetch_all("SELECT admission_number, name FROM students WHERE class_id = ? ORDER BY name", (class_id,))
             dialog = QDialog(self)
             dialog.setWindowTitle(f"Students - {class_name}")
@@ -555,8 +649,7 @@ class AdminDashboard(QWidget):
         try:
             class_name, ok = QInputDialog.getText(self, "Add Class", "Enter class name:")
             if ok and class_name.strip():
-                with DBManager() as db:
-                    db.execute("INSERT OR IGNORE INTO classes (name) VALUES (?)", (class_name.strip(),))
+                add_class(class_name.strip())
                 self.load_classes()
                 self.load_data()
                 QMessageBox.information(self, "Success", f"Class {class_name} added")
@@ -570,8 +663,7 @@ class AdminDashboard(QWidget):
                 reply = QMessageBox.question(self, "Confirm Delete", f"Are you sure you want to delete {class_name}?",
                                            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
                 if reply == QMessageBox.StandardButton.Yes:
-                    with DBManager() as db:
-                        db.execute("DELETE FROM classes WHERE name = ?", (class_name,))
+                    delete_class(class_name)
                     self.load_classes()
                     self.load_data()
                     QMessageBox.information(self, "Success", f"Class {class_name} deleted")
@@ -584,12 +676,10 @@ class AdminDashboard(QWidget):
             if not class_name:
                 QMessageBox.warning(self, "Warning", "Select a class first")
                 return
-            with DBManager() as db:
-                row = db.fetch_one("SELECT id FROM classes WHERE name = ?", (class_name,))
-                if not row:
-                    QMessageBox.warning(self, "Warning", "Unknown class")
-                    return
-                class_id = row[0]
+            class_id = reference_data.class_id(class_name)
+            if class_id is None:
+                QMessageBox.warning(self, "Warning", "Unknown class")
+                return
             term = self.term_combo.currentIndex() + 1
             amount = float(self.term_amount.text() or 0)
             set_class_term_fee(class_id, term, amount)
@@ -602,11 +692,9 @@ class AdminDashboard(QWidget):
             class_name = self.class_combo.currentText()
             if not class_name:
                 return
-            with DBManager() as db:
-                row = db.fetch_one("SELECT id FROM classes WHERE name = ?", (class_name,))
-            if not row:
+            class_id = reference_data.class_id(class_name)
+            if class_id is None:
                 return
-            class_id = row[0]
             req = get_food_requirements(class_id)
             self.food_maize.setText(str(req.get('maize_kg', 0)))
             self.food_beans.setText(str(req.get('beans_kg', 0)))
@@ -620,12 +708,10 @@ class AdminDashboard(QWidget):
             if not class_name:
                 QMessageBox.warning(self, "Warning", "Select a class first")
                 return
-            with DBManager() as db:
-                row = db.fetch_one("SELECT id FROM classes WHERE name = ?", (class_name,))
-            if not row:
+            class_id = reference_data.class_id(class_name)
+            if class_id is None:
                 QMessageBox.warning(self, "Warning", "Unknown class")
                 return
-            class_id = row[0]
             maize = float(self.food_maize.text() or 0)
             beans = float(self.food_beans.text() or 0)
             millet = float(self.food_millet.text() or 0)
@@ -640,16 +726,13 @@ class AdminDashboard(QWidget):
             if not class_name:
                 QMessageBox.warning(self, "Warning", "Select a class first")
                 return
-            with DBManager() as db:
-                row = db.fetch_one("SELECT id FROM classes WHERE name = ?", (class_name,))
-            if not row:
+            class_id = reference_data.class_id(class_name)
+            if class_id is None:
                 QMessageBox.warning(self, "Warning", "Unknown class")
                 return
-            class_id = row[0]
             amount = float(self.boarding_amount.text() or 0)
             set_boarding_fee_for_class(class_id, amount)
             QMessageBox.information(self, "Saved", f"Applied boarding fee KSh {amount:,.2f} to {class_name}")
-            self.load_data()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to apply boarding fee: {str(e)}")
 
@@ -1,15 +1,83 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QPushButton, QDialog, QMessageBox
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QPushButton, QDialog, QMessageBox, QComboBox
 from PyQt6.QtCore import Qt
-from ...core.db_manager import DBManager
-from ...core.payment_manager import get_balance
+from ...core.payment_manager import get_arrears
+from ...core.report_manager import export_arrears, export_filename
+from .workers import run_in_background
+from .event_relay import on_event
+from ...core.events import PAYMENT_RECORDED, STUDENT_CHANGED, FEE_CHANGED
+from ...core.reference_data import reference_data
+from ...core.aging_manager import get_arrears_aging, get_aging_summary, refresh_arrears_aging, AGING_BUCKETS
 import logging
+import os
 
 logging.basicConfig(filename='app/logs/arrears.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-class ArrearsDetailDialog(QDialog):
+HIGH_ARREARS_THRESHOLD = 1000
+
+def export_finished(parent, button, label, result):
+    filename, rows = result
+    button.setEnabled(True)
+    QMessageBox.information(parent, "Export Complete", f"{label} exported to: {filename} ({rows} rows)")
+    # Open the reports folder
+    try:
+        import subprocess
+        subprocess.Popen(f'explorer /select,"{os.path.abspath(filename)}"')
+    except OSError:
+        pass
+
+def export_failed(parent, button, error):
+    button.setEnabled(True)
+    QMessageBox.critical(parent, "Error", f"Failed to export data: {error}")
+
+class LiveArrearsRows:
+    """Keeps an open arrears window current while it is open.
+
+    The window holds its rows (get_arrears dicts) in self.rows and draws them
+    with show_rows(). A payment adjusts its student's row in place; student
+    and fee changes re-read only the students they touch. Windows are deleted
+    on close so they stop listening.
+    """
+    class_name = None
+    min_arrears = None
+    order_by = 'class'
+
+    def watch_changes(self):
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        on_event(self, PAYMENT_RECORDED, self.payment_recorded)
+        on_event(self, STUDENT_CHANGED, lambda action, student, previous: self.refresh_students([(student or previous)['id']]))
+        on_event(self, FEE_CHANGED, lambda student_ids, class_id: self.refresh_students(student_ids))
+
+    def _shown(self, row):
+        return self.min_arrears is None or row['arrears'] > self.min_arrears
+
+    def _place(self, student_ids, rows):
+        kept = [r for r in self.rows if r['student_id'] not in student_ids]
+        key = (lambda r: (r['class_name'], r['name'])) if self.order_by == 'class' else (lambda r: (-r['arrears'], r['name']))
+        self.rows = sorted(kept + [r for r in rows if self._shown(r)], key=key)
+        self.show_rows()
+
+    def payment_recorded(self, payment):
+        row = next((r for r in self.rows if r['student_id'] == payment['student_id']), None)
+        # Students not shown only move further below the threshold
+        if row:
+            row['paid'] += payment['amount']
+            row['arrears'] -= payment['amount']
+            self._place({row['student_id']}, [row])
+
+    def refresh_students(self, student_ids):
+        try:
+            rows = [dict(r) for r in get_arrears(self.class_name, student_ids=list(student_ids))]
+            self._place(set(student_ids), rows)
+        except Exception as e:
+            logging.error(f"Error refreshing arrears rows: {e}")
+
+
+class ArrearsDetailDialog(LiveArrearsRows, QDialog):
     def __init__(self, class_name=None, parent=None):
         super().__init__(parent)
         self.class_name = class_name
+        # Whole class, or every student who owes something
+        self.min_arrears = None if class_name else 0
         self.setWindowTitle(f"Arrears Details - {class_name if class_name else 'All Classes'}")
         self.setMinimumSize(900, 700)
         self.setStyleSheet("""
@@ -65,14 +133,18 @@ class ArrearsDetailDialog(QDialog):
         
         # Buttons
         btn_layout = QHBoxLayout()
-        export_btn = QPushButton("Export to CSV")
-        export_btn.clicked.connect(self.export_data)
+        self.export_btn = QPushButton("Export to CSV")
+        self.export_btn.clicked.connect(self.export_data)
         refresh_btn = QPushButton("Refresh")
         refresh_btn.clicked.connect(self.load_data)
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(self.close)
         
-        btn_layout.addWidget(export_btn)
+        aging_btn = QPushButton("View Aging")
+        aging_btn.clicked.connect(self.open_aging)
+        
+        btn_layout.addWidget(self.export_btn)
+        btn_layout.addWidget(aging_btn)
         btn_layout.addStretch()
         btn_layout.addWidget(refresh_btn)
         btn_layout.addWidget(close_btn)
@@ -80,147 +152,81 @@ class ArrearsDetailDialog(QDialog):
         
         self.setLayout(layout)
         self.load_data()
+        self.watch_changes()
+    
+    def open_aging(self):
+        dialog = ArrearsAgingDialog(self.class_name, self)
+        dialog.exec()
     
     def load_data(self):
         try:
-            with DBManager() as db:
-                if self.class_name:
-                    # Get students from specific class
-                    students = db.fetch_all("""
-                        SELECT s.admission_number, s.name, c.name as class_name, s.id,
-                               COALESCE(f.total_fees, 0) as total_fees,
-                               COALESCE(f.bus_fee, 0) as bus_fee
-                        FROM students s
-                        JOIN classes c ON s.class_id = c.id
-                        LEFT JOIN fees f ON s.id = f.student_id
-                        WHERE c.name = ?
-                        ORDER BY s.name
-                    """, (self.class_name,))
-                else:
-                    # Get all students with arrears > 0
-                    students = db.fetch_all("""
-                        SELECT s.admission_number, s.name, c.name as class_name, s.id,
-                               COALESCE(f.total_fees, 0) as total_fees,
-                               COALESCE(f.bus_fee, 0) as bus_fee
-                        FROM students s
-                        JOIN classes c ON s.class_id = c.id
-                        LEFT JOIN fees f ON s.id = f.student_id
-                        ORDER BY c.name, s.name
-                    """)
-                
-                # Calculate arrears for each student
-                students_with_arrears = []
-                total_arrears = 0
-                total_fees_expected = 0
-                total_paid = 0
-                
-                for student in students:
-                    admission_no, name, class_name, student_id, fees, bus_fee = student
-                    
-                    # Get payments for this student
-                    paid_result = db.fetch_one("SELECT SUM(amount) FROM payments WHERE student_id = ?", (student_id,))
-                    paid = paid_result[0] if paid_result and paid_result[0] else 0
-                    
-                    total_expected = fees + bus_fee
-                    arrears = total_expected - paid
-                    
-                    # Only include students with arrears > 0 if showing all classes
-                    if self.class_name or arrears > 0:
-                        students_with_arrears.append((admission_no, name, class_name, total_expected, paid, arrears))
-                        total_arrears += arrears
-                        total_fees_expected += total_expected
-                        total_paid += paid
-                
-                # Update summary
-                if self.class_name:
-                    summary_text = f"Class {self.class_name}: {len(students_with_arrears)} students | Total Expected: KSh {total_fees_expected:,.2f} | Total Paid: KSh {total_paid:,.2f} | Total Arrears: KSh {total_arrears:,.2f}"
-                else:
-                    summary_text = f"Students with Arrears: {len(students_with_arrears)} | Total Expected: KSh {total_fees_expected:,.2f} | Total Paid: KSh {total_paid:,.2f} | Total Arrears: KSh {total_arrears:,.2f}"
-                
-                self.summary_label.setText(summary_text)
-                
-                # Populate table
-                self.students_table.setRowCount(len(students_with_arrears))
-                for row, (admission_no, name, class_name, total_expected, paid, arrears) in enumerate(students_with_arrears):
-                    self.students_table.setItem(row, 0, QTableWidgetItem(str(admission_no or "")))
-                    self.students_table.setItem(row, 1, QTableWidgetItem(name or ""))
-                    self.students_table.setItem(row, 2, QTableWidgetItem(class_name or ""))
-                    self.students_table.setItem(row, 3, QTableWidgetItem(f"KSh {total_expected:,.2f}"))
-                    self.students_table.setItem(row, 4, QTableWidgetItem(f"KSh {paid:,.2f}"))
-                    
-                    # Color code arrears
-                    arrears_item = QTableWidgetItem(f"KSh {arrears:,.2f}")
-                    if arrears > 1000:
-                        arrears_item.setBackground(Qt.GlobalColor.red)
-                        arrears_item.setForeground(Qt.GlobalColor.white)
-                    elif arrears > 500:
-                        arrears_item.setBackground(Qt.GlobalColor.yellow)
-                    self.students_table.setItem(row, 5, arrears_item)
-                
-                # Auto-resize columns
-                self.students_table.resizeColumnsToContents()
-                
+            self.rows = [dict(r) for r in get_arrears(self.class_name, self.min_arrears)]
         except Exception as e:
             logging.error(f"Error loading arrears data: {e}")
             QMessageBox.critical(self, "Error", f"Failed to load arrears data: {str(e)}")
-    
-    def export_data(self):
+            return
+        self.show_rows()
+
+    def show_rows(self):
         try:
-            import csv
-            from datetime import datetime
-            import os
-            
-            # Create reports directory if it doesn't exist
-            reports_dir = "reports"
-            if not os.path.exists(reports_dir):
-                os.makedirs(reports_dir)
+            rows = self.rows
+            students_with_arrears = [
+                (r['admission_number'], r['name'], r['class_name'], r['total_expected'], r['paid'], r['arrears'])
+                for r in rows
+            ]
+            total_arrears = sum(r['arrears'] for r in rows)
+            total_fees_expected = sum(r['total_expected'] for r in rows)
+            total_paid = sum(r['paid'] for r in rows)
             
-            # Generate filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Update summary
             if self.class_name:
-                filename = f"reports/{self.class_name.replace(' ', '_')}_arrears_{timestamp}.csv"
+                summary_text = f"Class {self.class_name}: {len(students_with_arrears)} students | Total Expected: KSh {total_fees_expected:,.2f} | Total Paid: KSh {total_paid:,.2f} | Total Arrears: KSh {total_arrears:,.2f}"
             else:
-                filename = f"reports/all_arrears_{timestamp}.csv"
+                summary_text = f"Students with Arrears: {len(students_with_arrears)} | Total Expected: KSh {total_fees_expected:,.2f} | Total Paid: KSh {total_paid:,.2f} | Total Arrears: KSh {total_arrears:,.2f}"
             
-            # Export data
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Write header
-                writer.writerow(["Barsiele Sunrise Academy - Arrears Report"])
-                writer.writerow(["P.O Box 117 LONDIANI"])
-                writer.writerow(["Together we Rise"])
-                writer.writerow([])
-                writer.writerow([f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"])
-                writer.writerow([f"Report for: {self.class_name if self.class_name else 'All Classes with Arrears'}"])
-                writer.writerow([])
-                
-                # Write table headers
-                headers = []
-                for col in range(self.students_table.columnCount()):
-                    headers.append(self.students_table.horizontalHeaderItem(col).text())
-                writer.writerow(headers)
-                
-                # Write data
-                for row in range(self.students_table.rowCount()):
-                    row_data = []
-                    for col in range(self.students_table.columnCount()):
-                        item = self.students_table.item(row, col)
-                        row_data.append(item.text() if item else "")
-                    writer.writerow(row_data)
+            self.summary_label.setText(summary_text)
             
-            QMessageBox.information(self, "Export Complete", f"Arrears report exported to: {filename}")
+            # Populate table
+            self.students_table.setRowCount(len(students_with_arrears))
+            for row, (admission_no, name, class_name, total_expected, paid, arrears) in enumerate(students_with_arrears):
+                self.students_table.setItem(row, 0, QTableWidgetItem(str(admission_no or "")))
+                self.students_table.setItem(row, 1, QTableWidgetItem(name or ""))
+                self.students_table.setItem(row, 2, QTableWidgetItem(class_name or ""))
+                self.students_table.setItem(row, 3, QTableWidgetItem(f"KSh {total_expected:,.2f}"))
+                self.students_table.setItem(row, 4, QTableWidgetItem(f"KSh {paid:,.2f}"))
+                
+                # Color code arrears
+                arrears_item = QTableWidgetItem(f"KSh {arrears:,.2f}")
+                if arrears > 1000:
+                    arrears_item.setBackground(Qt.GlobalColor.red)
+                    arrears_item.setForeground(Qt.GlobalColor.white)
+                elif arrears > 500:
+                    arrears_item.setBackground(Qt.GlobalColor.yellow)
+                self.students_table.setItem(row, 5, arrears_item)
             
-            # Open the reports folder
-            import subprocess
-            subprocess.Popen(f'explorer /select,"{os.path.abspath(filename)}"')
+            # Auto-resize columns
+            self.students_table.resizeColumnsToContents()
             
         except Exception as e:
-            logging.error(f"Error exporting arrears data: {e}")
-            QMessageBox.critical(self, "Error", f"Failed to export data: {str(e)}")
+            logging.error(f"Error loading arrears data: {e}")
+            QMessageBox.critical(self, "Error", f"Failed to load arrears data: {str(e)}")
+    
+    def export_data(self):
+        scope = self.class_name.replace(' ', '_') if self.class_name else "all"
+        self.export_btn.setEnabled(False)
+        run_in_background(
+            self, export_arrears, export_filename(f"{scope}_arrears"), "Arrears Report",
+            [f"Report for: {self.class_name if self.class_name else 'All Classes with Arrears'}"],
+            class_name=self.class_name, min_arrears=None if self.class_name else 0,
+            on_success=lambda result: export_finished(self, self.export_btn, "Arrears report", result),
+            on_error=lambda error: export_failed(self, self.export_btn, error)
+        )
+
 
+class HighArrearsDialog(LiveArrearsRows, QDialog):
+    min_arrears = HIGH_ARREARS_THRESHOLD
+    order_by = 'arrears'
 
-class HighArrearsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("High Arrears Students")
@@ -278,8 +284,8 @@ class HighArrearsDialog(QDialog):
         
         # Buttons
         btn_layout = QHBoxLayout()
-        export_btn = QPushButton("Export High Arrears")
-        export_btn.clicked.connect(self.export_data)
+        self.export_btn = QPushButton("Export High Arrears")
+        self.export_btn.clicked.connect(self.export_data)
         send_sms_btn = QPushButton("Send SMS Reminders")
         send_sms_btn.clicked.connect(self.send_sms_reminders)
         refresh_btn = QPushButton("Refresh")
@@ -287,7 +293,7 @@ class HighArrearsDialog(QDialog):
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(self.close)
         
-        btn_layout.addWidget(export_btn)
+        btn_layout.addWidget(self.export_btn)
         btn_layout.addWidget(send_sms_btn)
         btn_layout.addStretch()
         btn_layout.addWidget(refresh_btn)
@@ -296,126 +302,209 @@ class HighArrearsDialog(QDialog):
         
         self.setLayout(layout)
         self.load_data()
+        self.watch_changes()
     
     def load_data(self):
         try:
-            with DBManager() as db:
-                # Get all students with high arrears (> 1000)
-                students = db.fetch_all("""
-                    SELECT s.admission_number, s.name, c.name as class_name, s.guardian_contact, s.id,
-                           COALESCE(f.total_fees, 0) as total_fees,
-                           COALESCE(f.bus_fee, 0) as bus_fee
-                    FROM students s
-                    JOIN classes c ON s.class_id = c.id
-                    LEFT JOIN fees f ON s.id = f.student_id
-                    ORDER BY c.name, s.name
-                """)
-                
-                high_arrears_students = []
-                total_high_arrears = 0
-                
-                for student in students:
-                    admission_no, name, class_name, guardian_contact, student_id, fees, bus_fee = student
-                    
-                    # Get payments for this student
-                    paid_result = db.fetch_one("SELECT SUM(amount) FROM payments WHERE student_id = ?", (student_id,))
-                    paid = paid_result[0] if paid_result and paid_result[0] else 0
-                    
-                    total_expected = fees + bus_fee
-                    arrears = total_expected - paid
-                    
-                    # Only include students with arrears > 1000
-                    if arrears > 1000:
-                        high_arrears_students.append((admission_no, name, class_name, guardian_contact, total_expected, paid, arrears))
-                        total_high_arrears += arrears
-                
-                # Update summary
-                summary_text = f"Students with High Arrears: {len(high_arrears_students)} | Total High Arrears: KSh {total_high_arrears:,.2f}"
-                self.summary_label.setText(summary_text)
-                
-                # Populate table
-                self.students_table.setRowCount(len(high_arrears_students))
-                for row, (admission_no, name, class_name, guardian_contact, total_expected, paid, arrears) in enumerate(high_arrears_students):
-                    self.students_table.setItem(row, 0, QTableWidgetItem(str(admission_no or "")))
-                    self.students_table.setItem(row, 1, QTableWidgetItem(name or ""))
-                    self.students_table.setItem(row, 2, QTableWidgetItem(class_name or ""))
-                    self.students_table.setItem(row, 3, QTableWidgetItem(guardian_contact or ""))
-                    self.students_table.setItem(row, 4, QTableWidgetItem(f"KSh {total_expected:,.2f}"))
-                    self.students_table.setItem(row, 5, QTableWidgetItem(f"KSh {paid:,.2f}"))
-                    
-                    # Color code arrears based on severity
-                    arrears_item = QTableWidgetItem(f"KSh {arrears:,.2f}")
-                    if arrears > 5000:
-                        arrears_item.setBackground(Qt.GlobalColor.darkRed)
-                        arrears_item.setForeground(Qt.GlobalColor.white)
-                    elif arrears > 2000:
-                        arrears_item.setBackground(Qt.GlobalColor.red)
-                        arrears_item.setForeground(Qt.GlobalColor.white)
-                    else:
-                        arrears_item.setBackground(Qt.GlobalColor.yellow)
-                    self.students_table.setItem(row, 6, arrears_item)
-                
-                # Auto-resize columns
-                self.students_table.resizeColumnsToContents()
-                
+            # Students with high arrears (> 1000), worst first
+            self.rows = [dict(r) for r in get_arrears(min_arrears=self.min_arrears, order_by=self.order_by)]
         except Exception as e:
             logging.error(f"Error loading high arrears data: {e}")
             QMessageBox.critical(self, "Error", f"Failed to load high arrears data: {str(e)}")
-    
-    def export_data(self):
+            return
+        self.show_rows()
+
+    def show_rows(self):
         try:
-            import csv
-            from datetime import datetime
-            import os
-            
-            # Create reports directory if it doesn't exist
-            reports_dir = "reports"
-            if not os.path.exists(reports_dir):
-                os.makedirs(reports_dir)
+            rows = self.rows
+            total_high_arrears = sum(r['arrears'] for r in rows)
             
-            # Generate filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"reports/high_arrears_students_{timestamp}.csv"
+            # Update summary
+            summary_text = f"Students with High Arrears: {len(rows)} | Total High Arrears: KSh {total_high_arrears:,.2f}"
+            self.summary_label.setText(summary_text)
             
-            # Export data
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
+            # Populate table
+            self.students_table.setRowCount(len(rows))
+            for row, r in enumerate(rows):
+                arrears = r['arrears']
+                self.students_table.setItem(row, 0, QTableWidgetItem(str(r['admission_number'] or "")))
+                self.students_table.setItem(row, 1, QTableWidgetItem(r['name'] or ""))
+                self.students_table.setItem(row, 2, QTableWidgetItem(r['class_name'] or ""))
+                self.students_table.setItem(row, 3, QTableWidgetItem(r['guardian_contact'] or ""))
+                self.students_table.setItem(row, 4, QTableWidgetItem(f"KSh {r['total_expected']:,.2f}"))
+                self.students_table.setItem(row, 5, QTableWidgetItem(f"KSh {r['paid']:,.2f}"))
                 
-                # Write header
-                writer.writerow(["Barsiele Sunrise Academy - High Arrears Report"])
-                writer.writerow(["P.O Box 117 LONDIANI"])
-                writer.writerow(["Together we Rise"])
-                writer.writerow([])
-                writer.writerow([f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"])
-                writer.writerow(["Students with arrears > KSh 1,000"])
-                writer.writerow([])
-                
-                # Write table headers
-                headers = []
-                for col in range(self.students_table.columnCount()):
-                    headers.append(self.students_table.horizontalHeaderItem(col).text())
-                writer.writerow(headers)
-                
-                # Write data
-                for row in range(self.students_table.rowCount()):
-                    row_data = []
-                    for col in range(self.students_table.columnCount()):
-                        item = self.students_table.item(row, col)
-                        row_data.append(item.text() if item else "")
-                    writer.writerow(row_data)
-            
-            QMessageBox.information(self, "Export Complete", f"High arrears report exported to: {filename}")
+                # Color code arrears based on severity
+                arrears_item = QTableWidgetItem(f"KSh {arrears:,.2f}")
+                if arrears > 5000:
+                    arrears_item.setBackground(Qt.GlobalColor.darkRed)
+                    arrears_item.setForeground(Qt.GlobalColor.white)
+                elif arrears > 2000:
+                    arrears_item.setBackground(Qt.GlobalColor.red)
+                    arrears_item.setForeground(Qt.GlobalColor.white)
+                else:
+                    arrears_item.setBackground(Qt.GlobalColor.yellow)
+                self.students_table.setItem(row, 6, arrears_item)
             
-            # Open the reports folder
-            import subprocess
-            subprocess.Popen(f'explorer /select,"{os.path.abspath(filename)}"')
+            # Auto-resize columns
+            self.students_table.resizeColumnsToContents()
             
         except Exception as e:
-            logging.error(f"Error exporting high arrears data: {e}")
-            QMessageBox.critical(self, "Error", f"Failed to export data: {str(e)}")
+            logging.error(f"Error loading high arrears data: {e}")
+            QMessageBox.critical(self, "Error", f"Failed to load high arrears data: {str(e)}")
+    
+    def export_data(self):
+        self.export_btn.setEnabled(False)
+        run_in_background(
+            self, export_arrears, export_filename("high_arrears_students"), "High Arrears Report",
+            [f"Students with arrears > KSh {HIGH_ARREARS_THRESHOLD:,}"],
+            min_arrears=HIGH_ARREARS_THRESHOLD, order_by='arrears',
+            on_success=lambda result: export_finished(self, self.export_btn, "High arrears report", result),
+            on_error=lambda error: export_failed(self, self.export_btn, error)
+        )
     
     def send_sms_reminders(self):
         # Placeholder for SMS functionality
         QMessageBox.information(self, "SMS Reminders", 
                                "SMS reminder functionality will be implemented with SMS gateway integration.\n\n"
                                "For now, you can export the data and contact guardians manually.")
+
+
+class ArrearsAgingDialog(QDialog):
+    def __init__(self, class_name=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Arrears Aging")
+        self.setMinimumSize(1000, 700)
+        self.setStyleSheet("""
+            QDialog { background-color: #f8f9fa; }
+            QLabel { color: #2c3e50; font-size: 14px; font-weight: bold; }
+            QTableWidget { 
+                border: 2px solid #e67e22; 
+                background-color: white; 
+                gridline-color: #bdc3c7;
+                selection-background-color: #e67e22;
+            }
+            QPushButton { 
+                background-color: #e67e22; 
+                color: white; 
+                border-radius: 8px; 
+                padding: 12px 20px; 
+                font-weight: bold; 
+                font-size: 14px;
+            }
+            QPushButton:hover { background-color: #d35400; }
+            QPushButton:pressed { background-color: #ba4a00; }
+            QComboBox { 
+                border: 2px solid #e67e22; 
+                border-radius: 8px; 
+                padding: 8px; 
+                background-color: white; 
+                font-size: 14px;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        
+        # Header
+        header = QLabel("Arrears Aging")
+        header.setStyleSheet("font-size: 24px; font-weight: bold; color: #e67e22; margin-bottom: 10px;")
+        header.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(header)
+        
+        # School info
+        school_info = QLabel("Barsiele Sunrise Academy - P.O Box 117 LONDIANI")
+        school_info.setStyleSheet("font-size: 14px; color: #7f8c8d; margin-bottom: 5px;")
+        school_info.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(school_info)
+        
+        # Class filter
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Class:"))
+        self.class_filter = QComboBox()
+        self.class_filter.addItem("All Classes", None)
+        try:
+            for class_info in reference_data.classes():
+                self.class_filter.addItem(class_info.name, class_info.id)
+        except Exception as e:
+            logging.error(f"Error loading classes for aging filter: {e}")
+        if class_name:
+            self.class_filter.setCurrentText(class_name)
+        self.class_filter.currentIndexChanged.connect(self.load_data)
+        filter_layout.addWidget(self.class_filter)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+        
+        # Summary stats
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #e67e22; margin-bottom: 15px; padding: 10px; background-color: #fdf5ec; border-left: 4px solid #e67e22;")
+        layout.addWidget(self.summary_label)
+        
+        # Students table
+        self.students_table = QTableWidget()
+        self.students_table.setColumnCount(8)
+        self.students_table.setHorizontalHeaderLabels(["Admission No", "Name", "Class"] + [f"{b} Days" for b in AGING_BUCKETS] + ["Total"])
+        layout.addWidget(self.students_table)
+        
+        # Buttons
+        btn_layout = QHBoxLayout()
+        export_btn = QPushButton("Export Aging")
+        export_btn.clicked.connect(self.export_data)
+        refresh_btn = QPushButton("Recalculate")
+        refresh_btn.clicked.connect(self.recalculate)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        
+        btn_layout.addWidget(export_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(refresh_btn)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+        
+        self.setLayout(layout)
+        self.load_data()
+    
+    def load_data(self):
+        try:
+            class_id = self.class_filter.currentData()
+            summary = get_aging_summary(class_id)
+            rows = get_arrears_aging(class_id)
+            
+            buckets_text = " | ".join(f"{b}: KSh {summary[b]:,.2f}" for b in AGING_BUCKETS)
+            self.summary_label.setText(f"Students in Arrears: {summary['students']} | {buckets_text} | Total: KSh {summary['total']:,.2f}")
+            
+            self.students_table.setRowCount(len(rows))
+            for row, (admission_no, name, class_name, b0, b1, b2, b3, total) in enumerate(rows):
+                self.students_table.setItem(row, 0, QTableWidgetItem(str(admission_no or "")))
+                self.students_table.setItem(row, 1, QTableWidgetItem(name or ""))
+                self.students_table.setItem(row, 2, QTableWidgetItem(class_name or ""))
+                for col, amount in enumerate((b0, b1, b2, b3), start=3):
+                    item = QTableWidgetItem(f"KSh {amount:,.2f}" if amount else "")
+                    # Oldest debt stands out
+                    if amount and col == 6:
+                        item.setBackground(Qt.GlobalColor.red)
+                        item.setForeground(Qt.GlobalColor.white)
+                    elif amount and col == 5:
+                        item.setBackground(Qt.GlobalColor.yellow)
+                    self.students_table.setItem(row, col, item)
+                self.students_table.setItem(row, 7, QTableWidgetItem(f"KSh {total:,.2f}"))
+            
+            self.students_table.resizeColumnsToContents()
+        except Exception as e:
+            logging.error(f"Error loading arrears aging: {e}")
+            QMessageBox.critical(self, "Error", f"Failed to load arrears aging: {str(e)}")
+    
+    def recalculate(self):
+        try:
+            refresh_arrears_aging()
+            self.load_data()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to recalculate aging: {str(e)}")
+    
+    def export_data(self):
+        try:
+            from ...core.report_manager import generate_aging_report
+            filename = generate_aging_report(self.class_filter.currentData())
+            QMessageBox.information(self, "Export Complete", f"Arrears aging exported to: {filename}")
+        except Exception as e:
+            logging.error(f"Error exporting arrears aging: {e}")
+            QMessageBox.critical(self, "Error", f"Failed to export aging: {str(e)}")
@@ -0,0 +1,31 @@
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+from ...core import events
+
+class EventRelay(QObject):
+    """Hands bus events to a widget's handler on the UI thread, whichever thread published them."""
+    received = pyqtSignal(dict)
+
+    def __init__(self, owner, event, handler):
+        super().__init__(owner)
+        self.event = event
+        self.handler = handler
+        self.received.connect(self.deliver)
+        events.subscribe(event, self.relay)
+
+    def relay(self, **payload):
+        if sip.isdeleted(self):
+            # The widget has been destroyed; stop listening
+            events.unsubscribe(self.event, self.relay)
+            return
+        self.received.emit(payload)
+
+    @pyqtSlot(dict)
+    def deliver(self, payload):
+        self.handler(**payload)
+
+def on_event(owner, event, handler):
+    """Subscribe handler(**payload) for as long as the owner widget exists."""
+    relay = EventRelay(owner, event, handler)
+    owner.__dict__.setdefault('_event_relays', []).append(relay)
+    return relay
@@ -1,6 +1,8 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QPushButton, QMessageBox, QLabel
-from PyQt6.QtCore import Qt
-from ...core.auth import validate_login  # This function needs to be added to auth.py
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QPushButton, QMessageBox, QLabel, QProgressBar
+from PyQt6.QtCore import Qt, QTimer
+from ...core.auth import Auth
+from ...core.startup import startup_timer
+from .workers import run_in_background
 import logging
 
 logging.basicConfig(filename='app/logs/login.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -9,8 +11,8 @@ class LoginWindow(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("School Management System - Login")
-        self.setGeometry(100, 100, 350, 200)
-        self.setFixedSize(350, 200)
+        self.setGeometry(100, 100, 350, 230)
+        self.setFixedSize(350, 230)
         
         # Styling
         self.setStyleSheet("""
@@ -65,6 +67,14 @@ class LoginWindow(QWidget):
         self.login_btn.setMinimumHeight(40)
         main_layout.addWidget(self.login_btn)
         
+        # Busy indicator while the password is being checked
+        self.progress = QProgressBar(self)
+        self.progress.setRange(0, 0)
+        self.progress.setTextVisible(False)
+        self.progress.setMaximumHeight(6)
+        self.progress.setVisible(False)
+        main_layout.addWidget(self.progress)
+        
         main_layout.addStretch()
         self.setLayout(main_layout)
         
@@ -75,35 +85,59 @@ class LoginWindow(QWidget):
         
         self.username.setFocus()
         self.current_user = None
+        self.worker = None
 
     def login(self):
-        try:
-            username = self.username.text().strip()
-            password = self.password.text()
-            
-            if not username or not password:
-                QMessageBox.warning(self, "Input Error", "Please enter both username and password")
-                return
-                
-            # Use the Auth.authenticate method
-            from ...core.auth import Auth
-            user = Auth.authenticate(username, password)
-            if user:
-                # Preserve username from DB (in case login used email)
-                self.current_user = user
-                from .main import MainWindow
-                self.main_window = MainWindow(self.current_user)
-                self.main_window.show()
-                self.hide()
-                logging.info(f"Successful login for user: {user['username']}")
-            else:
-                QMessageBox.warning(self, "Login Failed", "Invalid username or password")
-                self.password.clear()
-                self.username.setFocus()
-                logging.warning(f"Failed login attempt for user: {username}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Login failed: {str(e)}")
-            logging.error(f"Login error for user {username}: {str(e)}")
-            
+        if self.worker is not None:
+            return  # A sign-in is already running
+        username = self.username.text().strip()
+        password = self.password.text()
+        
+        if not username or not password:
+            QMessageBox.warning(self, "Input Error", "Please enter both username and password")
+            return
+        
+        # bcrypt verification takes a noticeable fraction of a second; keep the window responsive
+        startup_timer.start()
+        self.set_busy(True)
+        self.worker = run_in_background(
+            self, Auth.authenticate, username, password,
+            on_success=lambda user: self.login_finished(username, user),
+            on_error=lambda error: self.login_failed(username, error)
+        )
+    
+    def set_busy(self, busy):
+        self.username.setEnabled(not busy)
+        self.password.setEnabled(not busy)
+        self.login_btn.setEnabled(not busy)
+        self.login_btn.setText("Signing in..." if busy else "Login")
+        self.progress.setVisible(busy)
+        if not busy:
+            self.worker = None
+    
+    def login_finished(self, username, user):
+        self.set_busy(False)
+        if user:
+            # Preserve username from DB (in case login used email)
+            self.current_user = user
+            startup_timer.mark("authenticate")
+            from .main import MainWindow
+            self.main_window = MainWindow(self.current_user)
+            self.main_window.show()
+            self.hide()
+            # Runs once the window has been painted
+            QTimer.singleShot(0, lambda: startup_timer.report("Login to usable"))
+            logging.info(f"Successful login for user: {user['username']}")
+        else:
+            QMessageBox.warning(self, "Login Failed", "Invalid username or password")
+            self.password.clear()
+            self.username.setFocus()
+            logging.warning(f"Failed login attempt for user: {username}")
+    
+    def login_failed(self, username, error):
+        self.set_busy(False)
+        QMessageBox.critical(self, "Error", f"Login failed: {error}")
+        logging.error(f"Login error for user {username}: {error}")
+        
     def get_user(self):
         return self.current_user
\ No newline at end of file
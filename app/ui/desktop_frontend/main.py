@@ -1,21 +1,51 @@
+import importlib
 import sys
-from PyQt6.QtWidgets import QApplication, QMainWindow, QTabWidget, QMenuBar, QStatusBar, QProgressBar, QToolBar, QPushButton, QLabel
+from PyQt6.QtWidgets import QApplication, QMainWindow, QTabWidget, QMenuBar, QStatusBar, QProgressBar, QToolBar, QPushButton, QLabel, QWidget, QVBoxLayout
 from PyQt6.QtCore import Qt, QTimer, QEvent
-from .student_tab import StudentTab
-from .payment_tab import PaymentTab
-from .report_tab import ReportTab
-from .user_tab import UserTab
-from .admin_dashboard import AdminDashboard
-from .settings_tab import SettingsTab
+from ...core.audit_log import set_current_user
+from ...core.startup import startup_timer
 import logging
 from datetime import datetime
 
 logging.basicConfig(filename='app/logs/main.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# (title, module, class, takes the signed-in user). Pages are imported and
+# built the first time their tab is shown, so signing in only pays for the
+# first tab.
+ADMIN_TABS = [
+    ("🏠 Dashboard", "admin_dashboard", "AdminDashboard", True),
+    ("👥 Students", "student_tab", "StudentTab", True),
+    ("💰 Payments", "payment_tab", "PaymentTab", True),
+    ("📊 Reports", "report_tab", "ReportTab", False),
+    ("👤 Users", "user_tab", "UserTab", False),
+    ("⚙️ Settings", "settings_tab", "SettingsTab", False),
+]
+CLERK_TABS = ADMIN_TABS[1:3]
+
+class LazyTab(QWidget):
+    """Placeholder that builds its page the first time the tab is shown."""
+    def __init__(self, module, class_name, args=()):
+        super().__init__()
+        self.module = module
+        self.class_name = class_name
+        self.args = args
+        self.page = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    def ensure_built(self):
+        if self.page is None:
+            page_class = getattr(importlib.import_module(f".{self.module}", __package__), self.class_name)
+            self.page = page_class(*self.args)
+            self.layout().addWidget(self.page)
+            startup_timer.mark(self.class_name)
+        return self.page
+
 class MainWindow(QMainWindow):
     def __init__(self, user):
         super().__init__()
         self.user = user
+        set_current_user(user.get('id'))
         self.setWindowTitle(f"School Management System - {user.get('username', 'User')} ({user.get('role', 'Unknown').title()})")
         self.setGeometry(100, 100, 1000, 700)
         self.setMinimumSize(800, 600)
@@ -36,6 +66,7 @@ class MainWindow(QMainWindow):
         today = datetime.now().strftime('%B %d, %Y')
         self.statusBar().showMessage(f"{greeting} | {today} | Role: {user.get('role', 'Unknown').title()}")
         self.create_toolbar()
+        startup_timer.mark("main window")
         self.create_tabs()
         
         # Logout timer
@@ -74,20 +105,19 @@ class MainWindow(QMainWindow):
         toolbar.addWidget(logout_btn)
 
     def create_tabs(self):
-        tabs = QTabWidget()
-        if self.user.get('role') == 'admin':
-            # Dashboard first for admins
-            tabs.addTab(AdminDashboard(self.user), "🏠 Dashboard")
-            tabs.addTab(StudentTab(self.user), "👥 Students")
-            tabs.addTab(PaymentTab(self.user), "💰 Payments")
-            tabs.addTab(ReportTab(), "📊 Reports")
-            tabs.addTab(UserTab(), "👤 Users")
-            tabs.addTab(SettingsTab(), "⚙️ Settings")
-            tabs.setCurrentIndex(0)
-        else:
-            tabs.addTab(StudentTab(self.user), "👥 Students")
-            tabs.addTab(PaymentTab(self.user), "💰 Payments")
-        self.setCentralWidget(tabs)
+        self.tabs = QTabWidget()
+        # Dashboard first for admins
+        specs = ADMIN_TABS if self.user.get('role') == 'admin' else CLERK_TABS
+        for title, module, class_name, takes_user in specs:
+            self.tabs.addTab(LazyTab(module, class_name, (self.user,) if takes_user else ()), title)
+        self.tabs.currentChanged.connect(self.show_tab)
+        self.setCentralWidget(self.tabs)
+        self.show_tab(self.tabs.currentIndex())
+
+    def show_tab(self, index):
+        tab = self.tabs.widget(index)
+        if isinstance(tab, LazyTab):
+            tab.ensure_built()
 
     def logout(self):
         from PyQt6.QtWidgets import QMessageBox
@@ -95,6 +125,7 @@ class MainWindow(QMainWindow):
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
             self.close()
+            set_current_user(None)
             from .login import LoginWindow
             self.login_window = LoginWindow()
             self.login_window.show()
@@ -1,9 +1,11 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QComboBox, QPushButton, QDateEdit, QMessageBox, QFormLayout, QLabel, QDoubleSpinBox, QTableWidget, QTableWidgetItem, QHBoxLayout, QFrame, QLineEdit
 from PyQt6.QtCore import QDate
-from ...core.student_manager import get_all_students
+from ...core.student_manager import get_all_students, invalidate_student_profile
 from ...core.payment_manager import record_payment, get_balance
 from ...core.receipt_generator import generate_receipt
 from ...core.config import DEFAULT_RATES
+from ...core.events import PAYMENT_RECORDED, STUDENT_CHANGED, FEE_CHANGED
+from .event_relay import on_event
 import logging
 import os
 from ...core.db_manager import DBManager
@@ -66,6 +68,7 @@ class PaymentTab(QWidget):
         self.filter_start = QDate.currentDate().addDays(-7)
         self.filter_end = QDate.currentDate()
         
+        self.balance = None
         self.balance_label = QLabel("Balance: KSh 0.00")
         form_layout.addRow("Current Balance:", self.balance_label)
         self.student_combo.currentTextChanged.connect(self.update_balance)
@@ -115,27 +118,52 @@ class PaymentTab(QWidget):
         
         self.setLayout(layout)
         self.update_balance()
+        # Keep the history, balance and student list current without reloading them
+        on_event(self, PAYMENT_RECORDED, self.payment_recorded)
+        on_event(self, STUDENT_CHANGED, self.student_changed)
+        on_event(self, FEE_CHANGED, self.fees_changed)
 
     def load_students(self):
         try:
             self.student_combo.clear()
             students = get_all_students()
             for student in students:
-                self.student_combo.addItem(f"{student[2]} ({student[1]}) - {student[6]}", student[0])
+                self.student_combo.addItem(self._student_label(student), student[0])
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load students: {str(e)}")
 
+    def _student_label(self, student):
+        return f"{student['name']} ({student['admission_number']}) - {student['bus_location']}"
+
+    def student_changed(self, action, student, previous):
+        index = self.student_combo.findData(previous['id']) if previous else -1
+        if action == 'deleted':
+            if index >= 0:
+                self.student_combo.removeItem(index)
+        elif index >= 0:
+            self.student_combo.setItemText(index, self._student_label(student))
+        else:
+            self.student_combo.addItem(self._student_label(student), student['id'])
+
+    def fees_changed(self, student_ids, class_id):
+        if self.student_combo.currentData() in student_ids:
+            self.update_balance()
+
     def update_balance(self):
         try:
             student_id = self.student_combo.currentData()
             if student_id:
-                balance = get_balance(student_id)
-                self.balance_label.setText(f"Balance: KSh {balance:,.2f}")
+                self.show_balance(get_balance(student_id))
             else:
-                self.balance_label.setText("Balance: KSh 0.00")
+                self.show_balance(0.0)
         except Exception as e:
+            self.balance = None
             self.balance_label.setText("Balance: Error loading")
 
+    def show_balance(self, balance):
+        self.balance = balance
+        self.balance_label.setText(f"Balance: KSh {balance:,.2f}")
+
     def load_payments(self):
         try:
             with DBManager() as db:
@@ -155,14 +183,39 @@ class PaymentTab(QWidget):
                 )
                 self.payment_table.setRowCount(len(payments))
                 for row, payment in enumerate(payments):
-                    for col, data in enumerate(payment):
-                        if col == 2:
-                            self.payment_table.setItem(row, col, QTableWidgetItem(f"KSh {data:,.2f}"))
-                        else:
-                            self.payment_table.setItem(row, col, QTableWidgetItem(str(data or "")))
+                    self._set_payment_row(row, payment)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load payments: {str(e)}")
 
+    def _set_payment_row(self, row, payment):
+        for col, data in enumerate(payment):
+            if col == 2:
+                self.payment_table.setItem(row, col, QTableWidgetItem(f"KSh {data:,.2f}"))
+            else:
+                self.payment_table.setItem(row, col, QTableWidgetItem(str(data or "")))
+
+    def _payment_key(self, row):
+        # The (date, id) order load_payments sorts by, newest first
+        return (self.payment_table.item(row, 4).text(), int(self.payment_table.item(row, 0).text()))
+
+    def payment_recorded(self, payment):
+        """Put a new payment into the recent history at its date and take it off the shown balance."""
+        key = (payment['date'], payment['id'])
+        keys = [self._payment_key(row) for row in range(self.payment_table.rowCount())]
+        newer = sum(1 for other in keys if other > key)
+        # A back-dated payment older than all 20 shown rows would not be listed by load_payments either
+        if newer < 20:
+            self.payment_table.setSortingEnabled(False)
+            self.payment_table.insertRow(newer)
+            self._set_payment_row(newer, [payment[k] for k in ('id', 'student_id', 'amount', 'method', 'date',
+                                                               'clerk_id', 'receipt_no', 'ref_code')])
+            if len(keys) >= 20:
+                oldest = min(range(len(keys) + 1), key=self._payment_key)
+                self.payment_table.removeRow(oldest)
+            self.payment_table.setSortingEnabled(True)
+        if self.student_combo.currentData() == payment['student_id'] and self.balance is not None:
+            self.show_balance(self.balance - payment['amount'])
+
     def add_payment(self):
         try:
             student_id = self.student_combo.currentData()
@@ -193,8 +246,6 @@ class PaymentTab(QWidget):
             
             self.amount.setValue(0)
             self.mpesa_code.clear(); self.bank_ref.clear(); self.cheque_no.clear()
-            self.update_balance()
-            self.load_payments()
             QMessageBox.information(self, "Success", f"Payment recorded successfully!\nReceipt No: {receipt_no}")
 
             receipt_file = generate_receipt(payment_id, receipt_no)
@@ -222,6 +273,7 @@ class PaymentTab(QWidget):
             with DBManager() as db:
                 db.execute("INSERT INTO contributions (student_id, item, quantity, cash_equivalent) VALUES (?, ?, ?, ?)",
                           (student_id, item, qty, cash_equiv))
+            invalidate_student_profile(student_id)
             QMessageBox.information(self, "Saved", f"Contribution recorded: {item} {qty} kg (KSh {cash_equiv:,.2f})")
             self.contrib_qty.setValue(0)
             self.load_contributions()
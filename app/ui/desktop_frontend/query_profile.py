@@ -0,0 +1,121 @@
+from PyQt6.QtWidgets import QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLabel, QPushButton, QDialog, QTabWidget
+from PyQt6.QtCore import Qt
+from ...core.query_profiler import query_profiler
+
+STATEMENT_HEADERS = ["Statement", "Calls", "Total ms", "Avg ms", "Max ms", "Rows", "Top Caller"]
+
+class QueryProfileDialog(QDialog):
+    """Live view of the query profiler: heaviest statements, busiest screens and slow queries with their plans."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Database Query Profile")
+        self.setMinimumSize(1100, 700)
+        self.setStyleSheet("""
+            QDialog { background-color: #f8f9fa; }
+            QLabel { color: #2c3e50; font-size: 14px; }
+            QTableWidget {
+                border: 2px solid #3498db;
+                background-color: white;
+                gridline-color: #bdc3c7;
+                selection-background-color: #3498db;
+            }
+            QPushButton {
+                background-color: #3498db;
+                color: white;
+                border-radius: 8px;
+                padding: 10px 18px;
+                font-weight: bold;
+                font-size: 14px;
+            }
+            QPushButton:hover { background-color: #2980b9; }
+        """)
+
+        layout = QVBoxLayout()
+        header = QLabel("Database Query Profile")
+        header.setStyleSheet("font-size: 22px; font-weight: bold; color: #3498db; margin-bottom: 10px;")
+        header.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(header)
+
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("font-weight: bold; padding: 10px; background-color: #ebf3fd; border-left: 4px solid #3498db;")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        self.tabs = QTabWidget()
+        self.by_total = self._table(STATEMENT_HEADERS)
+        self.by_calls = self._table(STATEMENT_HEADERS)
+        self.screens = self._table(["Screen", "Statements", "Total ms"])
+        self.slow = self._table(["When", "ms", "Rows", "Statement", "Query Plan", "Caller", "Screen"])
+        self.tabs.addTab(self.by_total, "By Total Time")
+        self.tabs.addTab(self.by_calls, "By Calls")
+        self.tabs.addTab(self.screens, "Screens")
+        self.tabs.addTab(self.slow, "Slow Queries")
+        layout.addWidget(self.tabs)
+
+        btn_layout = QHBoxLayout()
+        self.toggle_btn = QPushButton()
+        self.toggle_btn.clicked.connect(self.toggle)
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.load_profile)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(self.toggle_btn)
+        btn_layout.addWidget(refresh_btn)
+        btn_layout.addWidget(reset_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.setLayout(layout)
+        self.load_profile()
+
+    def _table(self, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        return table
+
+    def _fill(self, table, rows):
+        table.setRowCount(len(rows))
+        for r, values in enumerate(rows):
+            for c, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                item.setToolTip(str(value))
+                table.setItem(r, c, item)
+        table.resizeColumnsToContents()
+        table.setColumnWidth(0 if table is not self.slow else 3, 480)
+
+    def load_profile(self):
+        enabled = query_profiler.enabled
+        self.toggle_btn.setText("Stop Profiling" if enabled else "Start Profiling")
+        summary = query_profiler.summary(top=50)
+        conns = summary['connections']
+        self.status_label.setText(
+            f"Profiling is {'on' if enabled else 'off'} (since {summary['started']}). "
+            f"{summary['statements']} distinct statements; {conns['opened']} connections opened "
+            f"({conns['total_ms']:.1f} ms total). Statements over {summary['slow_ms']:g} ms are logged with their query plan."
+        )
+        for table, key in ((self.by_total, 'by_total'), (self.by_calls, 'by_calls')):
+            self._fill(table, [
+                (s['sql'], s['calls'], f"{s['total_ms']:.1f}", f"{s['avg_ms']:.2f}", f"{s['max_ms']:.1f}", s['rows'],
+                 next(iter(s['callers']), ''))
+                for s in summary[key]
+            ])
+        self._fill(self.screens, [(s['screen'], s['calls'], f"{s['total_ms']:.1f}") for s in summary['screens']])
+        self._fill(self.slow, [
+            (e['at'], e['ms'], e['rows'], e['sql'], " | ".join(e['plan']), e['caller'], e['screen'] or "")
+            for e in reversed(summary['slow'])
+        ])
+
+    def toggle(self):
+        if query_profiler.enabled:
+            query_profiler.disable()
+        else:
+            query_profiler.enable()
+        self.load_profile()
+
+    def reset(self):
+        query_profiler.reset()
+        self.load_profile()
@@ -2,6 +2,9 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QDateEdit, QPushButton, QMessa
 from PyQt6.QtCore import QDate
 from ...core.report_manager import generate_payment_summary, generate_class_report
 from ...core.db_manager import DBManager
+from ...core.events import PAYMENT_RECORDED
+from ...core.reference_data import reference_data
+from .event_relay import on_event
 import os
 import logging
 
@@ -79,7 +82,10 @@ class ReportTab(QWidget):
         layout.addWidget(self.payments_table)
         
         self.setLayout(layout)
+        # (start, end) while the table shows a period, None for the most recent payments
+        self.period = None
         self.load_recent_payments()
+        on_event(self, PAYMENT_RECORDED, self.payment_recorded)
 
     def generate_summary(self):
         try:
@@ -107,36 +113,54 @@ class ReportTab(QWidget):
         try:
             with DBManager() as db:
                 payments = db.fetch_all("SELECT * FROM payments ORDER BY date DESC, id DESC LIMIT 50")
+                self.period = None
                 self.payments_table.setRowCount(len(payments))
                 for row, payment in enumerate(payments):
-                    for col, data in enumerate(payment):
-                        if col == 2:
-                            self.payments_table.setItem(row, col, QTableWidgetItem(f"KSh {data:,.2f}"))
-                        else:
-                            self.payments_table.setItem(row, col, QTableWidgetItem(str(data or "")))
+                    self._set_payment_row(row, payment)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load payments: {str(e)}")
 
+    def _set_payment_row(self, row, payment):
+        for col, data in enumerate(payment[:self.payments_table.columnCount()]):
+            if col == 2:
+                self.payments_table.setItem(row, col, QTableWidgetItem(f"KSh {data:,.2f}"))
+            else:
+                self.payments_table.setItem(row, col, QTableWidgetItem(str(data or "")))
+
+    def _payment_key(self, row):
+        # The (date, id) order both loads sort by, newest first
+        return (self.payments_table.item(row, 4).text(), int(self.payments_table.item(row, 0).text()))
+
+    def payment_recorded(self, payment):
+        """Add a new payment to the table at its date if it belongs in what is shown."""
+        if self.period and not self.period[0] <= payment['date'] <= self.period[1]:
+            return
+        key = (payment['date'], payment['id'])
+        keys = [self._payment_key(row) for row in range(self.payments_table.rowCount())]
+        newer = sum(1 for other in keys if other > key)
+        # A back-dated payment older than all 50 recent rows would not be listed by load_recent_payments either
+        if self.period is None and newer >= 50:
+            return
+        self.payments_table.insertRow(newer)
+        self._set_payment_row(newer, [payment[key] for key in ('id', 'student_id', 'amount', 'method', 'date', 'clerk_id', 'receipt_no')])
+        if self.period is None and len(keys) >= 50:
+            self.payments_table.removeRow(min(range(len(keys) + 1), key=self._payment_key))
+
     def load_payments_for_period(self, start_date, end_date):
         try:
             with DBManager() as db:
                 payments = db.fetch_all("SELECT * FROM payments WHERE date BETWEEN ? AND ? ORDER BY date DESC, id DESC", (start_date, end_date))
+                self.period = (start_date, end_date)
                 self.payments_table.setRowCount(len(payments))
                 for row, payment in enumerate(payments):
-                    for col, data in enumerate(payment):
-                        if col == 2:
-                            self.payments_table.setItem(row, col, QTableWidgetItem(f"KSh {data:,.2f}"))
-                        else:
-                            self.payments_table.setItem(row, col, QTableWidgetItem(str(data or "")))
+                    self._set_payment_row(row, payment)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load payments for period: {str(e)}")
 
     def _load_classes(self):
         try:
-            with DBManager() as db:
-                classes = db.fetch_all("SELECT id, name FROM classes ORDER BY name")
-                for cid, cname in classes:
-                    self.class_combo.addItem(cname, cid)
+            for class_info in reference_data.classes():
+                self.class_combo.addItem(class_info.name, class_info.id)
         except Exception:
             pass
 
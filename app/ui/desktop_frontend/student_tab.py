@@ -1,12 +1,13 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLineEdit, QPushButton, QFormLayout, QFileDialog, QDialog, QMessageBox, QLabel, QComboBox, QSpinBox
 from PyQt6.QtCore import Qt
-from ...core.student_manager import get_all_students, create_student, update_student, get_student, search_students, get_highest_admission_number
-from ...core.fee_manager import set_fee, get_fee, get_class_term_fee, get_food_requirements
-
-from ...core.payment_manager import get_payments_for_student, get_balance
-from ...core.config import BUS_FEES
+from ...core.student_manager import get_all_students, create_student, update_student, get_student, search_students, get_highest_admission_number, delete_student, get_student_profile
+from ...core.fee_manager import set_fee, get_fee, get_class_term_fee
+from ...core.config import BUS_FEES, PAYMENT_PAGE_SIZE
+from ...core.payment_manager import get_payment_history
 from ...core.fee_manager import get_bus_locations
-from ...core.db_manager import DBManager
+from ...core.events import STUDENT_CHANGED
+from ...core.reference_data import reference_data
+from .event_relay import on_event
 import logging
 
 logging.basicConfig(filename='app/logs/student.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -91,6 +92,7 @@ class StudentTab(QWidget):
         layout.addLayout(btn_layout)
         self.setLayout(layout)
         self.load_students()
+        on_event(self, STUDENT_CHANGED, self.student_changed)
 
     def load_students(self):
         try:
@@ -105,23 +107,66 @@ class StudentTab(QWidget):
                 row = row_index
                 row_index += 1
                 self.table.setRowCount(row_index)
-                # student structure: [id, admission_number, name, class_id, guardian_contact, profile_picture, bus_location, class_name]
-                self.table.setItem(row, 0, QTableWidgetItem(str(student[0])))  # ID
-                self.table.setItem(row, 1, QTableWidgetItem(str(student[1] or "")))  # Admission number
-                self.table.setItem(row, 2, QTableWidgetItem(str(student[2] or "")))  # Name
-                self.table.setItem(row, 3, QTableWidgetItem(str(student[7] or "")))  # Class name
-                self.table.setItem(row, 4, QTableWidgetItem(str(student[4] or "")))  # Guardian contact
-                self.table.setItem(row, 5, QTableWidgetItem(str(student[6] or "")))  # Bus location
+                self._set_student_row(row, student)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load students: {str(e)}")
 
+    def _set_student_row(self, row, student):
+        # student structure: [id, admission_number, name, class_id, guardian_contact, profile_picture, bus_location, class_name]
+        self.table.setItem(row, 0, QTableWidgetItem(str(student[0])))  # ID
+        self.table.setItem(row, 1, QTableWidgetItem(str(student[1] or "")))  # Admission number
+        self.table.setItem(row, 2, QTableWidgetItem(str(student[2] or "")))  # Name
+        class_item = QTableWidgetItem(str(student[7] or ""))  # Class name
+        # NULL classes sort first in SQL; keep the id so student_changed can tell them from a class called 'No Class'
+        class_item.setData(Qt.ItemDataRole.UserRole, student[3])
+        self.table.setItem(row, 3, class_item)
+        self.table.setItem(row, 4, QTableWidgetItem(str(student[4] or "")))  # Guardian contact
+        self.table.setItem(row, 5, QTableWidgetItem(str(student[6] or "")))  # Bus location
+
+    def _find_row(self, student_id):
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            if item and item.text() == str(student_id):
+                return row
+        return -1
+
+    def _matches_filters(self, student):
+        text = self.search.text().strip().lower()
+        class_id = self.class_filter.currentData()
+        if class_id and student['class_id'] != class_id:
+            return False
+        return not text or text in (student['name'] or '').lower() or text in (student['admission_number'] or '').lower()
+
+    @staticmethod
+    def _order_key(class_id, class_name, name):
+        # load_students' ORDER BY c.name, s.name, where students without a class (NULL) come first
+        return (class_id is not None, class_name if class_id is not None else '', name)
+
+    def _row_key(self, row):
+        class_item = self.table.item(row, 3)
+        return self._order_key(class_item.data(Qt.ItemDataRole.UserRole), class_item.text(), self.table.item(row, 2).text())
+
+    def student_changed(self, action, student, previous):
+        """Patch the one row a change touched, keeping the class-then-name order."""
+        row = self._find_row(previous['id']) if previous else -1
+        if row >= 0:
+            self.table.removeRow(row)
+        if student is None or not self._matches_filters(student):
+            return
+        key = self._order_key(student['class_id'], student['class_name'], student['name'])
+        row = 0
+        while row < self.table.rowCount() and self._row_key(row) <= key:
+            row += 1
+        self.table.insertRow(row)
+        values = [student[k] for k in ('id', 'admission_number', 'name', 'class_id', 'guardian_contact',
+                                       'profile_picture', 'bus_location', 'class_name')]
+        self._set_student_row(row, values)
+
     def _load_classes_filter(self):
         try:
-            with DBManager() as db:
-                classes = db.fetch_all("SELECT id, name FROM classes ORDER BY name")
-                self.class_filter.addItem("All Classes", None)
-                for cid, cname in classes:
-                    self.class_filter.addItem(cname, cid)
+            self.class_filter.addItem("All Classes", None)
+            for class_info in reference_data.classes():
+                self.class_filter.addItem(class_info.name, class_info.id)
             self.class_filter.currentIndexChanged.connect(self.load_students)
         except Exception:
             self.class_filter.addItem("All Classes", None)
@@ -149,6 +194,7 @@ class StudentTab(QWidget):
             student_id = int(self.table.item(selected, 0).text())
             from .payment_tab import PaymentTab
             dlg = QDialog(self)
+            dlg.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
             dlg.setWindowTitle("Record Payment")
             v = QVBoxLayout(dlg)
             pay_widget = PaymentTab(self.user)
@@ -171,7 +217,6 @@ class StudentTab(QWidget):
                 term_fee = get_class_term_fee(values['class_id'], 1)
                 total_fee = float(dialog.get_fee()) if dialog.get_fee() > 0 else (term_fee * 3)
                 set_fee(student_id, total_fee, dialog.get_bus_fee())
-                self.load_students()
                 QMessageBox.information(self, "Success", f"Student added successfully with admission number: {values.get('admission_number','')}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to add student: {str(e)}")
@@ -191,7 +236,6 @@ class StudentTab(QWidget):
                         del values['admission_number']
                     update_student(student_id, **values)
                     set_fee(student_id, dialog.get_fee(), dialog.get_bus_fee())
-                    self.load_students()
                     QMessageBox.information(self, "Success", "Student updated successfully")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to edit student: {str(e)}")
@@ -203,12 +247,11 @@ class StudentTab(QWidget):
         if selected >= 0:
             try:
                 student_id = int(self.table.item(selected, 0).text())
-                student = get_student(student_id)
-                payments = get_payments_for_student(student_id)
-                balance = get_balance(student_id)
-                total_fee = get_fee(student_id)
-                profile = StudentProfileDialog(student, payments, balance, total_fee)
-                profile.exec()
+                profile = get_student_profile(student_id)
+                if profile is None:
+                    QMessageBox.warning(self, "Warning", "Student no longer exists")
+                    return
+                StudentProfileDialog(profile).exec()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to view profile: {str(e)}")
         else:
@@ -224,9 +267,7 @@ class StudentTab(QWidget):
                                            f"Are you sure you want to delete student '{student_name}'?",
                                            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
                 if reply == QMessageBox.StandardButton.Yes:
-                    with DBManager() as db:
-                        db.execute("DELETE FROM students WHERE id = ?", (student_id,))
-                    self.load_students()
+                    delete_student(student_id)
                     QMessageBox.information(self, "Success", "Student deleted successfully")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to delete student: {str(e)}")
@@ -343,10 +384,8 @@ class StudentFormDialog(QDialog):
 
     def load_classes(self):
         try:
-            with DBManager() as db:
-                classes = db.fetch_all("SELECT id, name FROM classes ORDER BY name")
-                for class_id, class_name in classes:
-                    self.class_.addItem(class_name, class_id)
+            for class_info in reference_data.classes():
+                self.class_.addItem(class_info.name, class_info.id)
         except Exception as e:
             QMessageBox.warning(self, "Warning", f"Could not load classes: {e}")
 
@@ -410,10 +449,9 @@ class StudentFormDialog(QDialog):
     def get_bus_fee(self):
         # Prefer dynamic bus_locations table
         try:
-            with DBManager() as db:
-                row = db.fetch_one("SELECT fee_per_term FROM bus_locations WHERE name = ?", (self.bus_fee.currentText(),))
-                if row:
-                    return float(row[0])
+            fee = reference_data.bus_fee(self.bus_fee.currentText())
+            if fee is not None:
+                return fee
         except Exception:
             pass
         return BUS_FEES.get(self.bus_fee.currentText(), 0.0) if self.bus_fee.currentText() != "None" else 0.0
@@ -431,9 +469,10 @@ class StudentFormDialog(QDialog):
             return "ADM001"
 
 class StudentProfileDialog(QDialog):
-    def __init__(self, student, payments, balance, total_fee):
+    def __init__(self, profile):
         super().__init__()
-        self.setWindowTitle(f"Student Profile - {student[2] if len(student) > 2 else 'Unknown'}")
+        student = profile['student']
+        self.setWindowTitle(f"Student Profile - {student['name'] or 'Unknown'}")
         self.setGeometry(100, 100, 600, 500)
         self.setStyleSheet("""
             QDialog {
@@ -464,101 +503,97 @@ class StudentProfileDialog(QDialog):
         layout = QVBoxLayout()
         details_layout = QFormLayout()
         
-        # student structure: [id, admission_number, name, class_id, guardian_contact, profile_picture, bus_location]
-        details_layout.addRow("ID:", QLabel(str(student[0])))
-        details_layout.addRow("Admission No:", QLabel(student[1] or ""))
-        details_layout.addRow("Name:", QLabel(student[2] or ""))
-        
-        # Get class name
-        class_name = "Unknown"
-        if len(student) > 3 and student[3]:
-            try:
-                with DBManager() as db:
-                    class_result = db.fetch_one("SELECT name FROM classes WHERE id = ?", (student[3],))
-                    if class_result:
-                        class_name = class_result[0]
-            except:
-                pass
-        details_layout.addRow("Class:", QLabel(class_name))
-        
-        details_layout.addRow("Guardian:", QLabel(student[4] or ""))
-        if len(student) > 5 and student[5]:
-            details_layout.addRow("Picture:", QLabel(student[5]))
-        if len(student) > 6 and student[6]:
-            details_layout.addRow("Bus Location:", QLabel(student[6]))
+        details_layout.addRow("ID:", QLabel(str(student['id'])))
+        details_layout.addRow("Admission No:", QLabel(student['admission_number'] or ""))
+        details_layout.addRow("Name:", QLabel(student['name'] or ""))
+        details_layout.addRow("Class:", QLabel(student['class_name']))
+        details_layout.addRow("Guardian:", QLabel(student['guardian_contact'] or ""))
+        if student['profile_picture']:
+            details_layout.addRow("Picture:", QLabel(student['profile_picture']))
+        if student['bus_location']:
+            details_layout.addRow("Bus Location:", QLabel(student['bus_location']))
         
         layout.addLayout(details_layout)
         
+        fee = profile['fee']
         fee_layout = QFormLayout()
-        fee_layout.addRow("Total Fee:", QLabel(f"KSh {total_fee['total_fees']:,.2f}"))
-        fee_layout.addRow("Bus Fee:", QLabel(f"KSh {total_fee['bus_fee']:,.2f}"))
-        total_paid = total_fee['total_fees'] + total_fee['bus_fee'] - balance
-        fee_layout.addRow("Total Paid:", QLabel(f"KSh {total_paid:,.2f}"))
-        fee_layout.addRow("Balance:", QLabel(f"KSh {balance:,.2f}"))
+        fee_layout.addRow("Total Fee:", QLabel(f"KSh {fee['total_fees']:,.2f}"))
+        fee_layout.addRow("Bus Fee:", QLabel(f"KSh {fee['bus_fee']:,.2f}"))
+        if fee['boarding_fee']:
+            fee_layout.addRow("Boarding Fee:", QLabel(f"KSh {fee['boarding_fee']:,.2f}"))
+        fee_layout.addRow("Total Paid:", QLabel(f"KSh {profile['paid']:,.2f}"))
+        fee_layout.addRow("Balance:", QLabel(f"KSh {profile['balance']:,.2f}"))
         layout.addLayout(fee_layout)
         
         layout.addWidget(QLabel("Payment History:"))
-        payment_table = QTableWidget(len(payments), 5)
-        payment_table.setHorizontalHeaderLabels(["Amount", "Method", "Date", "Clerk ID", "Receipt No"])
-        for r, p in enumerate(payments):
-            payment_table.setItem(r, 0, QTableWidgetItem(f"KSh {p[2]:,.2f}"))  # amount
-            payment_table.setItem(r, 1, QTableWidgetItem(p[3] or ""))  # method
-            payment_table.setItem(r, 2, QTableWidgetItem(str(p[4]) if p[4] else ""))  # date
-            payment_table.setItem(r, 3, QTableWidgetItem(str(p[5]) if p[5] else ""))  # clerk_id
-            payment_table.setItem(r, 4, QTableWidgetItem(p[6] or ""))  # receipt_no
-        layout.addWidget(payment_table)
+        self.student_id = student['id']
+        self.more_payments = profile['more_payments']
+        self.payment_table = QTableWidget(0, 6)
+        self.payment_table.setHorizontalHeaderLabels(["Amount", "Method", "Date", "Clerk ID", "Receipt No", "Balance After"])
+        self.add_payments(profile['payments'])
+        # Older pages are fetched when the history is scrolled to the bottom
+        self.payment_table.verticalScrollBar().valueChanged.connect(self.history_scrolled)
+        layout.addWidget(self.payment_table)
 
         # Contributions section
-        try:
-            with DBManager() as db:
-                contribs = db.fetch_all("SELECT item, quantity, cash_equivalent FROM contributions WHERE student_id = ?", (student[0],))
-        except Exception:
-            contribs = []
+        contribs = profile['contributions']
         layout.addWidget(QLabel("In-kind Contributions:"))
         contrib_table = QTableWidget(len(contribs), 3)
         contrib_table.setHorizontalHeaderLabels(["Item", "Quantity", "Cash Equivalent"])
         for r, c in enumerate(contribs):
-            contrib_table.setItem(r, 0, QTableWidgetItem(str(c[0] or "")))
-            contrib_table.setItem(r, 1, QTableWidgetItem(str(c[1] or 0)))
-            contrib_table.setItem(r, 2, QTableWidgetItem(f"KSh {float(c[2] or 0):,.2f}"))
+            contrib_table.setItem(r, 0, QTableWidgetItem(str(c['item'] or "")))
+            contrib_table.setItem(r, 1, QTableWidgetItem(str(c['quantity'] or 0)))
+            contrib_table.setItem(r, 2, QTableWidgetItem(f"KSh {float(c['cash_equivalent'] or 0):,.2f}"))
         layout.addWidget(contrib_table)
 
         # Per-student food requirement vs brought status (requirements are set per class)
-        try:
-            per_item_totals = {"maize": 0.0, "beans": 0.0, "millet": 0.0}
-            for c in contribs:
-                item = (c[0] or "").strip().lower()
-                qty = float(c[1] or 0)
-                if item in per_item_totals:
-                    per_item_totals[item] += qty
-            # Fetch class per-student requirements
-            req = {"maize": 0.0, "beans": 0.0, "millet": 0.0}
-            if len(student) > 3 and student[3]:
-                fr = get_food_requirements(student[3])
-                # Interpret stored numbers as per-student quota for that class
-                req = {"maize": float(fr.get('maize_kg', 0.0)),
-                       "beans": float(fr.get('beans_kg', 0.0)),
-                       "millet": float(fr.get('millet_kg', 0.0))}
-
-            layout.addWidget(QLabel("Food Requirement and Status (per student):"))
-            status_table = QTableWidget(3, 4)
-            status_table.setHorizontalHeaderLabels(["Item", "Required (kg)", "Brought (kg)", "Remaining (kg)"])
-            items = ["maize", "beans", "millet"]
-            for r, it in enumerate(items):
-                required = float(req.get(it, 0.0))
-                brought = float(per_item_totals.get(it, 0.0))
-                remaining = max(0.0, required - brought)
-                status_table.setItem(r, 0, QTableWidgetItem(it.capitalize()))
-                status_table.setItem(r, 1, QTableWidgetItem(f"{required:g}"))
-                status_table.setItem(r, 2, QTableWidgetItem(f"{brought:g}"))
-                status_table.setItem(r, 3, QTableWidgetItem(f"{remaining:g}"))
-            layout.addWidget(status_table)
-        except Exception as e:
-            # Do not fail the profile if requirements are missing or table not present
-            logging.warning(f"Failed to compute food status for student {student[0]}: {e}")
+        per_item_totals = {"maize": 0.0, "beans": 0.0, "millet": 0.0}
+        for c in contribs:
+            item = (c['item'] or "").strip().lower()
+            if item in per_item_totals:
+                per_item_totals[item] += float(c['quantity'] or 0)
+        req = profile['food_requirements']
+
+        layout.addWidget(QLabel("Food Requirement and Status (per student):"))
+        status_table = QTableWidget(3, 4)
+        status_table.setHorizontalHeaderLabels(["Item", "Required (kg)", "Brought (kg)", "Remaining (kg)"])
+        for r, it in enumerate(["maize", "beans", "millet"]):
+            required = float(req[f"{it}_kg"])
+            brought = per_item_totals[it]
+            remaining = max(0.0, required - brought)
+            status_table.setItem(r, 0, QTableWidgetItem(it.capitalize()))
+            status_table.setItem(r, 1, QTableWidgetItem(f"{required:g}"))
+            status_table.setItem(r, 2, QTableWidgetItem(f"{brought:g}"))
+            status_table.setItem(r, 3, QTableWidgetItem(f"{remaining:g}"))
+        layout.addWidget(status_table)
         
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(self.accept)
         layout.addWidget(close_btn)
         
-        self.setLayout(layout)
\ No newline at end of file
+        self.setLayout(layout)
+
+    def add_payments(self, payments):
+        table = self.payment_table
+        for p in payments:
+            r = table.rowCount()
+            table.insertRow(r)
+            table.setItem(r, 0, QTableWidgetItem(f"KSh {p['amount']:,.2f}"))
+            table.setItem(r, 1, QTableWidgetItem(p['method'] or ""))
+            table.setItem(r, 2, QTableWidgetItem(str(p['date']) if p['date'] else ""))
+            table.setItem(r, 3, QTableWidgetItem(str(p['clerk_id']) if p['clerk_id'] else ""))
+            table.setItem(r, 4, QTableWidgetItem(p['receipt_no'] or ""))
+            table.setItem(r, 5, QTableWidgetItem(f"KSh {p['balance_after']:,.2f}"))
+        if payments:
+            self.oldest_payment = (payments[-1]['date'], payments[-1]['id'])
+
+    def history_scrolled(self, value):
+        if value < self.payment_table.verticalScrollBar().maximum() or not self.more_payments:
+            return
+        try:
+            payments = get_payment_history(self.student_id, before=self.oldest_payment, limit=PAYMENT_PAGE_SIZE + 1)
+            self.more_payments = len(payments) > PAYMENT_PAGE_SIZE
+            self.add_payments(payments[:PAYMENT_PAGE_SIZE])
+        except Exception as e:
+            self.more_payments = False
+            logging.error(f"Failed to load older payments for student {self.student_id}: {e}")
\ No newline at end of file
@@ -2,6 +2,8 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTa
 from PyQt6.QtCore import Qt
 from ...core.db_manager import DBManager
 from ...core.auth import Auth
+from ...core.audit_log import audit_event
+from ...core.events import publish, REFERENCE_CHANGED
 import logging
 import re
 
@@ -151,8 +153,9 @@ class UserManagementDialog(QDialog):
                               (username, email, hashed_password, role))
                     
                     # Log the action
-                    db.execute("INSERT INTO audit_logs (user_id, action) VALUES (?, ?)",
-                              (1, f"Created new user: {username} ({email}) with role {role}"))
+                    audit_event('user.created', 'user', db.cursor.lastrowid, f"Created new user: {username} ({email}) with role {role}",
+                                {'username': username, 'email': email, 'role': role}, critical=True)
+                publish(REFERENCE_CHANGED, kind='users')
                 
                 QMessageBox.information(dialog, "Success", f"User {username} created successfully!")
                 dialog.accept()
@@ -241,8 +244,9 @@ class UserManagementDialog(QDialog):
                                   (username, email, role, user_id))
                     
                     # Log the action
-                    db.execute("INSERT INTO audit_logs (user_id, action) VALUES (?, ?)",
-                              (1, f"Updated user: {username} ({email})"))
+                    audit_event('user.updated', 'user', user_id, f"Updated user: {username} ({email})",
+                                {'username': username, 'email': email, 'role': role}, critical=True)
+                publish(REFERENCE_CHANGED, kind='users')
                 
                 QMessageBox.information(dialog, "Success", f"User {username} updated successfully!")
                 dialog.accept()
@@ -280,8 +284,8 @@ class UserManagementDialog(QDialog):
                     db.execute("DELETE FROM users WHERE id = ?", (user_id,))
                     
                     # Log the action
-                    db.execute("INSERT INTO audit_logs (user_id, action) VALUES (?, ?)",
-                              (1, f"Deleted user: {username}"))
+                    audit_event('user.deleted', 'user', user_id, f"Deleted user: {username}", {'username': username}, critical=True)
+                publish(REFERENCE_CHANGED, kind='users')
                 
                 QMessageBox.information(self, "Success", f"User '{username}' deleted successfully!")
                 self.load_users()
@@ -1,6 +1,7 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QPushButton, QComboBox, QMessageBox, QFormLayout, QTableWidget, QTableWidgetItem
 from ...core.auth import Auth  # Use the Auth class instead
 from ...core.db_manager import DBManager
+from ...core.events import publish, REFERENCE_CHANGED
 import logging
 
 logging.basicConfig(filename='app/logs/user.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -108,6 +109,7 @@ class UserTab(QWidget):
                 if reply == QMessageBox.StandardButton.Yes:
                     with DBManager() as db:
                         db.execute("DELETE FROM users WHERE id = ?", (user_id,))
+                    publish(REFERENCE_CHANGED, kind='users')
                     self.load_users()
                     QMessageBox.information(self, "Success", "User deleted successfully")
             except Exception as e:
@@ -0,0 +1,59 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+import logging
+
+class Worker(QThread):
+    """Run fn(*args, **kwargs) off the UI thread and report the result through signals."""
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, fn, *args, parent=None, **kwargs):
+        super().__init__(parent)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            self.succeeded.emit(self.fn(*self.args, **self.kwargs))
+        except Exception as e:
+            logging.error(f"Background task {getattr(self.fn, '__name__', self.fn)} failed: {e}")
+            self.failed.emit(str(e))
+
+# Workers are kept alive here rather than parented to their owner: closing a
+# window (many delete on close) must not destroy a thread that is still running.
+_running = set()
+
+def run_in_background(owner, fn, *args, on_success=None, on_error=None, **kwargs):
+    """Start a Worker for a widget, listed in owner._workers until it finishes.
+
+    If the owner is destroyed first, the thread runs to the end but on_success
+    and on_error are no longer called.
+    """
+    worker = Worker(fn, *args, **kwargs)
+    callbacks = [(signal, slot) for signal, slot in ((worker.succeeded, on_success), (worker.failed, on_error)) if slot]
+    for signal, slot in callbacks:
+        signal.connect(slot)
+
+    def drop_callbacks():
+        for signal, slot in callbacks:
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass
+
+    def finished():
+        workers.discard(worker)
+        _running.discard(worker)
+        try:
+            owner.destroyed.disconnect(drop_callbacks)
+        except (TypeError, RuntimeError):
+            pass  # The owner is already gone
+        worker.deleteLater()
+
+    owner.destroyed.connect(drop_callbacks)
+    workers = owner.__dict__.setdefault('_workers', set())
+    workers.add(worker)
+    _running.add(worker)
+    worker.finished.connect(finished)
+    worker.start()
+    return worker
@@ -0,0 +1,33 @@
+"""Measure bcrypt hash/verify latency across cost factors.
+
+Usage: python benchmarks/bench_bcrypt.py [--rounds 10 11 12 13] [--repeat 5]
+
+Pick BCRYPT_ROUNDS so a verify stays around 0.25-0.5s on the school's slowest machine.
+"""
+import argparse
+import statistics
+import time
+from passlib.hash import bcrypt
+
+def bench(rounds, repeat, password="correct horse battery staple"):
+    hasher = bcrypt.using(rounds=rounds)
+    hashed = hasher.hash(password)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hasher.verify(password, hashed)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), min(samples), max(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="bcrypt verify latency per cost factor")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'cost':>4}  {'median ms':>10}  {'min ms':>8}  {'max ms':>8}")
+    for rounds in args.rounds:
+        median, low, high = bench(rounds, args.repeat)
+        print(f"{rounds:>4}  {median * 1000:>10.1f}  {low * 1000:>8.1f}  {high * 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Time the core manager functions against generated datasets of increasing size.
+
+Usage: python -m benchmarks.bench_core [--profiles small medium large] [--repeat 20]
+                                       [--out results.json] [--compare baseline.json] [--threshold 0.25]
+
+Each profile runs on a scratch copy of benchmarks.datagen's database, so
+payments and fee changes made while timing do not accumulate. Results
+(p50/p95 latency, throughput, peak Python heap) are written as JSON; pass a
+previous results file to --compare to flag regressions (exit code 1).
+"""
+import argparse
+import glob
+import logging
+import os
+import random
+import sys
+from datetime import date, timedelta
+from . import harness
+
+# Reports re-read whole tables, so they get fewer calls than the lookups
+HEAVY_REPEAT_DIVISOR = 5
+
+def cases(meta, rng):
+    """(name, heavy, fn) for every benchmarked call, with arguments drawn from rng."""
+    from app.core.payment_manager import record_payment, get_balance
+    from app.core.student_manager import search_students, get_all_students
+    from app.core.fee_manager import set_boarding_fee_for_class
+    from app.core.report_manager import generate_payment_summary, generate_student_balance_report, generate_class_report
+    from app.core.receipt_generator import generate_receipt
+    from app.core.reference_data import reference_data
+    from app.core.db_manager import DBManager
+    from .datagen import FIRST_NAMES, LAST_NAMES
+
+    students = meta['counts']['students']
+    class_ids = [c.id for c in reference_data.classes()]
+    with DBManager() as db:
+        payments = [tuple(row) for row in db.fetch_all("SELECT id, receipt_no FROM payments ORDER BY id DESC LIMIT 200")]
+    end = date.fromisoformat(meta['end'])
+    month_ago = (end - timedelta(days=30)).isoformat()
+    codes = iter(range(10 ** 9))
+
+    def pay():
+        record_payment(rng.randint(1, students), 500.0, "M-Pesa", end.isoformat(), 1, mpesa_code=f"BENCH{next(codes)}")
+
+    def receipt():
+        filename = generate_receipt(*rng.choice(payments))
+        if filename and os.path.exists(filename):
+            os.remove(filename)
+
+    return [
+        ('record_payment', False, pay),
+        ('get_balance', False, lambda: get_balance(rng.randint(1, students))),
+        ('search_students', False, lambda: search_students(rng.choice(FIRST_NAMES + LAST_NAMES))),
+        ('get_all_students', True, get_all_students),
+        ('set_boarding_fee_for_class', True, lambda: set_boarding_fee_for_class(rng.choice(class_ids), rng.choice([0.0, 15000.0]))),
+        ('generate_payment_summary', True, lambda: generate_payment_summary(month_ago, end.isoformat())),
+        ('generate_student_balance_report', True, generate_student_balance_report),
+        ('generate_class_report', True, lambda: generate_class_report(rng.choice(class_ids))),
+        ('generate_receipt', True, receipt),
+    ]
+
+def run(profile, repeat, seed=0, only=None):
+    results = {}
+    with harness.sandbox(profile, seed) as meta:
+        rng = random.Random(seed)
+        for name, heavy, fn in cases(meta, rng):
+            if only and name not in only:
+                continue
+            calls = max(3, repeat // HEAVY_REPEAT_DIVISOR) if heavy else repeat
+            results[name] = harness.measure(fn, calls)
+        for leftover in glob.glob(os.path.join('reports', '*.csv')):
+            os.remove(leftover)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the core manager functions")
+    harness.add_arguments(parser, ['small', 'medium'])
+    parser.add_argument("--repeat", type=int, default=20, help="calls per case (reports use a fifth, at least 3)")
+    parser.add_argument("--only", nargs="+", metavar="CASE", help="run only these cases")
+    args = parser.parse_args()
+
+    results = harness.new_results('core', repeat=args.repeat, seed=args.seed)
+    for profile in args.profiles:
+        results['results'][profile] = run(profile, args.repeat, args.seed, args.only)
+        harness.print_profile(profile, results['results'][profile])
+    return harness.finish(results, args)
+
+if __name__ == "__main__":
+    # The managers log every export and payment at INFO; keep the table readable
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Time the heavy Qt views to a populated table, under the offscreen platform.
+
+Usage: python -m benchmarks.bench_ui [--profiles small medium] [--repeat 10]
+                                     [--out results.json] [--compare baseline.json] [--threshold 0.25]
+
+Each case builds the widget against a scratch copy of a generated dataset
+(see benchmarks.datagen) and waits until its background loads have been
+delivered, so the time covers queries, table filling and the event-loop
+hops. Results use the same JSON layout as bench_core, plus the rows shown
+and the process's peak RSS per profile. Qt's own allocations are not seen
+by tracemalloc, so peak_kib covers the Python side only.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+from datetime import date, timedelta
+from . import harness
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ADMIN = {'id': 1, 'username': 'admin', 'role': 'admin'}
+
+def settle(widget):
+    """Run the event loop until every background load started by widget has delivered."""
+    from PyQt6.QtCore import QThread
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance()
+    app.processEvents()
+    while widget.__dict__.get('_workers'):
+        QThread.msleep(1)
+        app.processEvents()
+    app.processEvents()
+
+def dispose(widget):
+    from PyQt6.QtCore import QEvent
+    from PyQt6.QtWidgets import QApplication
+    widget.close()
+    widget.deleteLater()
+    QApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+
+def cases(meta, rng):
+    """(name, open) pairs; open() builds a populated widget and returns (widget, table)."""
+    from PyQt6.QtCore import QDate
+    from app.ui.desktop_frontend.admin_dashboard import AdminDashboard
+    from app.ui.desktop_frontend.student_tab import StudentTab, StudentProfileDialog
+    from app.ui.desktop_frontend.arrears_detail import ArrearsDetailDialog
+    from app.ui.desktop_frontend.activity_logs import ActivityLogsDialog
+    from app.core.student_manager import get_student_profile
+
+    students = meta['counts']['students']
+    end = date.fromisoformat(meta['end'])
+
+    def dashboard():
+        widget = AdminDashboard(ADMIN)
+        return widget, widget.class_arrears_table
+
+    def student_tab():
+        widget = StudentTab(ADMIN)
+        return widget, widget.table
+
+    def arrears_detail():
+        widget = ArrearsDetailDialog()
+        return widget, widget.students_table
+
+    def activity_logs():
+        # Open on the dataset's last month rather than the 30 days before today, so one load is timed
+        since = end - timedelta(days=30)
+        widget = ActivityLogsDialog(date_range=(QDate(since.year, since.month, since.day), QDate(end.year, end.month, end.day)))
+        return widget, widget.logs_table
+
+    def student_profile():
+        widget = StudentProfileDialog(get_student_profile(rng.randint(1, students), use_cache=False))
+        return widget, widget.payment_table
+
+    return [
+        ('AdminDashboard', dashboard),
+        ('StudentTab', student_tab),
+        ('ArrearsDetailDialog', arrears_detail),
+        ('ActivityLogsDialog', activity_logs),
+        ('StudentProfileDialog', student_profile),
+    ]
+
+def run(profile, repeat, seed=0, only=None):
+    results = {}
+    with harness.sandbox(profile, seed) as meta:
+        rng = random.Random(seed)
+        for name, open_view in cases(meta, rng):
+            if only and name not in only:
+                continue
+            shown = []
+
+            def populate():
+                widget, table = open_view()
+                settle(widget)
+                shown.append(table.rowCount())
+                dispose(widget)
+
+            results[name] = harness.measure(populate, repeat)
+            results[name]['rows'] = shown[-1]
+        if resource:
+            # ru_maxrss is KiB on Linux; it only grows, so later profiles include earlier ones
+            results['_process'] = {'peak_rss_mib': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Qt views to a populated table")
+    harness.add_arguments(parser, ['small', 'medium'])
+    parser.add_argument("--repeat", type=int, default=10, help="times each view is opened")
+    parser.add_argument("--only", nargs="+", metavar="VIEW", help="run only these views")
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    results = harness.new_results('ui', repeat=args.repeat, seed=args.seed, platform=app.platformName())
+    for profile in args.profiles:
+        cases = run(profile, args.repeat, args.seed, args.only)
+        results['results'][profile] = cases
+        harness.print_profile(profile, {k: v for k, v in cases.items() if not k.startswith('_')})
+        rss = f"peak RSS {cases['_process']['peak_rss_mib']} MiB; " if '_process' in cases else ""
+        print(f"  {rss}rows: " + ", ".join(f"{k} {v['rows']}" for k, v in cases.items() if 'rows' in v))
+    return harness.finish(results, args)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
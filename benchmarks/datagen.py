@@ -0,0 +1,260 @@
+"""Generate a deterministic synthetic school database for benchmarks.
+
+Usage: python -m benchmarks.datagen [--profile medium] [--seed 0] [--out PATH] [--force]
+
+The same profile and seed always give the same rows, so timings from two
+checkouts are comparable. Databases are written to benchmarks/data (never
+the app's own database) and reused until --force, or a schema change,
+rebuilds them. Benchmarks call dataset(profile) to get a ready file. An
+existing file outside benchmarks/data is only overwritten when it is itself a
+generated dataset.
+
+The schema holds one school per database, so larger profiles add class
+streams ("Grade 4 East") rather than schools. Fees are a single current
+total per student, so each student's payments cover part of that total
+and are spread over the profile's years of history.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+# Payments end here unless --end is given, so a profile always builds the same rows
+DEFAULT_END = date(2025, 11, 28)
+
+class Profile(NamedTuple):
+    name: str
+    streams: int  # classes per grade
+    students: int
+    years: int  # of payment and audit history
+    payments_per_term: int
+    contributions_per_student: int
+    audit_logs_per_student: int
+    clerks: int
+
+PROFILES = {
+    'small': Profile('small', 1, 200, 1, 2, 1, 3, 2),
+    'medium': Profile('medium', 2, 2000, 2, 2, 2, 5, 4),
+    'large': Profile('large', 3, 10000, 3, 3, 2, 8, 8),
+    'huge': Profile('huge', 4, 50000, 5, 3, 3, 10, 16),
+}
+
+GRADES = [f"Grade {n}" for n in range(1, 9)]
+STREAMS = ['', ' East', ' West', ' North', ' South', ' Central']
+TERM_FEES = [4500.0, 4800.0, 5100.0, 5400.0, 5700.0, 6000.0, 6500.0, 7000.0]
+BOARDING_FEE = 15000.0
+BUS_ROUTES = ['Kapsoit', 'Kericho Town', 'Litein', 'Roret', 'Sosiot', 'Kabianga', 'Ainamoi', 'Brooke']
+FIRST_NAMES = ['Kipchirchir', 'Chebet', 'Kiprono', 'Jepkoech', 'Kibet', 'Cherono', 'Langat', 'Chepkemoi',
+               'Brian', 'Faith', 'Kevin', 'Mercy', 'Dennis', 'Sharon', 'Collins', 'Winnie']
+LAST_NAMES = ['Koech', 'Rotich', 'Mutai', 'Kirui', 'Ngetich', 'Bett', 'Sang', 'Cheruiyot',
+              'Korir', 'Tanui', 'Kemboi', 'Rono']
+METHODS = [('M-Pesa', 55), ('Cash', 25), ('Bank Transfer', 15), ('Cheque', 5)]
+FOOD_ITEMS = ['Maize', 'Beans', 'Millet']
+
+def default_path(profile, seed=0):
+    return os.path.join(DATA_DIR, f"{profile}-s{seed}.db")
+
+def _timestamp(rng, start, end):
+    span = int((end - start).total_seconds())
+    return (start + timedelta(seconds=rng.randrange(span))).strftime('%Y-%m-%d %H:%M:%S')
+
+def _classes(db, profile):
+    """The eight default grades plus extra streams; returns [(class_id, grade index)]."""
+    names = [(grade + stream, g) for stream in STREAMS[:profile.streams] for g, grade in enumerate(GRADES)]
+    db.cursor.executemany("INSERT OR IGNORE INTO classes (name) VALUES (?)", [(name,) for name, _ in names])
+    ids = dict(db.fetch_all("SELECT name, id FROM classes"))
+    classes = [(ids[name], g) for name, g in names]
+    db.cursor.executemany("INSERT OR REPLACE INTO class_fees (class_id, term, amount) VALUES (?, ?, ?)",
+                          [(cid, term, TERM_FEES[g]) for cid, g in classes for term in (1, 2, 3)])
+    db.cursor.executemany(
+        "INSERT OR REPLACE INTO food_requirements (class_id, maize_kg, beans_kg, millet_kg) VALUES (?, ?, ?, ?)",
+        [(cid, 10.0 + g, 5.0 + g / 2, 2.0) for cid, g in classes])
+    return classes
+
+def _clerks(db, profile):
+    from app.core.auth import Auth
+    # One hash for every clerk: hashing per user would dominate generation time
+    password = Auth.hasher.hash("clerk123")
+    db.cursor.executemany(
+        "INSERT OR IGNORE INTO users (username, email, password, role) VALUES (?, ?, ?, 'clerk')",
+        [(f"clerk{n}", f"clerk{n}@example.com", password) for n in range(1, profile.clerks + 1)])
+    return [row[0] for row in db.fetch_all("SELECT id FROM users ORDER BY id")]
+
+def _students(db, rng, profile, classes):
+    routes = [(name, 900.0 + 150 * n) for n, name in enumerate(BUS_ROUTES)]
+    db.cursor.executemany("INSERT OR IGNORE INTO bus_locations (name, fee_per_term) VALUES (?, ?)", routes)
+    students, fees = [], []
+    for n in range(1, profile.students + 1):
+        class_id, grade = classes[rng.randrange(len(classes))]
+        route = routes[rng.randrange(len(routes))] if rng.random() < 0.3 else None
+        students.append((n, f"ADM{n:05d}", f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", class_id,
+                         f"07{rng.randrange(10 ** 8):08d}", route[0] if route else None))
+        fees.append((n, TERM_FEES[grade] * 3, route[1] * 3 if route else 0.0,
+                     BOARDING_FEE if rng.random() < 0.2 else 0.0))
+    db.cursor.executemany(
+        "INSERT INTO students (id, admission_number, name, class_id, guardian_contact, bus_location) VALUES (?, ?, ?, ?, ?, ?)",
+        students)
+    db.cursor.executemany("INSERT INTO fees (student_id, total_fees, bus_fee, boarding_fee) VALUES (?, ?, ?, ?)", fees)
+    return fees
+
+def _payments(db, rng, profile, fees, clerks, start, end):
+    """Each student pays 40-110% of their fee in installments spread over the history."""
+    weights = [w for _, w in METHODS]
+    days = (end - start).days
+    installments = profile.years * 3 * profile.payments_per_term
+    batch, payment_no = [], 0
+    for student_id, total_fees, bus_fee, boarding_fee in fees:
+        owed = total_fees + bus_fee + boarding_fee
+        amount = round(owed * rng.uniform(0.4, 1.1) / installments, -1)
+        for _ in range(installments):
+            payment_no += 1
+            method = rng.choices(METHODS, weights)[0][0]
+            code = f"{rng.randrange(36 ** 10):010X}"
+            paid_on = start + timedelta(days=rng.randrange(days + 1))
+            batch.append((student_id, amount, method, paid_on.isoformat(), rng.choice(clerks), f"{payment_no:08x}",
+                          code if method == 'Cheque' else None, code if method == 'Bank Transfer' else None,
+                          code if method == 'M-Pesa' else None))
+        if len(batch) >= 50000:
+            _insert_payments(db, batch)
+            batch = []
+    _insert_payments(db, batch)
+    return payment_no
+
+def _insert_payments(db, rows):
+    db.cursor.executemany(
+        "INSERT INTO payments (student_id, amount, method, date, clerk_id, receipt_no, transaction_code, bank_reference, mpesa_code, verified) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)", rows)
+
+def _contributions(db, rng, profile, rates):
+    rows = []
+    for student_id in range(1, profile.students + 1):
+        for _ in range(profile.contributions_per_student):
+            item = rng.choice(FOOD_ITEMS)
+            quantity = float(rng.randrange(5, 45, 5))
+            rows.append((student_id, item, quantity, quantity * rates.get(item.lower(), 0)))
+    db.cursor.executemany(
+        "INSERT INTO contributions (student_id, item, quantity, cash_equivalent) VALUES (?, ?, ?, ?)", rows)
+    return len(rows)
+
+def _audit_logs(db, rng, profile, clerks, start, end):
+    start, end = datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.max.time())
+    rows = []
+    for n in range(profile.students * profile.audit_logs_per_student):
+        user_id = rng.choice(clerks)
+        student_id = rng.randrange(1, profile.students + 1)
+        if n % 4 == 0:
+            rows.append((user_id, f"Login successful for user: clerk{user_id}", '127.0.0.1', 'Desktop App',
+                         _timestamp(rng, start, end), 'auth.login', 'user', str(user_id), None))
+        else:
+            rows.append((user_id, f"Updated student {student_id}", None, None, _timestamp(rng, start, end),
+                         'student.updated', 'student', str(student_id), json.dumps({'student_id': student_id})))
+    db.cursor.executemany(
+        "INSERT INTO audit_logs (user_id, action, ip_address, user_agent, timestamp, event_type, entity_type, entity_id, payload) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+def read_meta(path):
+    """What a generated database was built from: profile, seed, dates, schema version and row counts."""
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM benchmark_meta WHERE key = 'dataset'").fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+    except sqlite3.Error:
+        return None
+
+def build(profile, path=None, seed=0, end=DEFAULT_END):
+    """Write a fresh database for profile (a name or a Profile) to path and return the path.
+
+    Raises FileExistsError if path is outside DATA_DIR and holds anything other than
+    a generated dataset (files in DATA_DIR, even half-built ones, are always ours).
+    """
+    from app.core.initialize_db import init_db
+    from app.core.db_manager import DBManager
+    from app.core.migrations import SCHEMA_VERSION
+    from app.core.kpi_manager import rebuild_rollups
+    from app.core.aging_manager import refresh_arrears_aging
+    from app.core.config import DEFAULT_RATES
+
+    profile = PROFILES[profile] if isinstance(profile, str) else profile
+    path = os.path.abspath(path or default_path(profile.name, seed))
+    ours = os.path.commonpath([path, DATA_DIR]) == DATA_DIR
+    if not ours and os.path.exists(path) and read_meta(path) is None:
+        raise FileExistsError(f"{path} exists and is not a generated dataset (no benchmark_meta); not overwriting it")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    start = date(end.year - profile.years, end.month, 1)
+    started = time.perf_counter()
+    old_path = os.environ.get('SQLITE_PATH')
+    os.environ['SQLITE_PATH'] = path
+    try:
+        init_db()
+        with DBManager() as db:
+            classes = _classes(db, profile)
+            clerks = _clerks(db, profile)
+            fees = _students(db, rng, profile, classes)
+            counts = {
+                'classes': len(classes),
+                'students': len(fees),
+                'payments': _payments(db, rng, profile, fees, clerks, start, end),
+                'contributions': _contributions(db, rng, profile, DEFAULT_RATES),
+                'audit_logs': _audit_logs(db, rng, profile, clerks, start, end),
+            }
+            rebuild_rollups(db)
+            meta = {'profile': profile._asdict(), 'seed': seed, 'start': start.isoformat(), 'end': end.isoformat(),
+                    'schema_version': SCHEMA_VERSION, 'counts': counts}
+            db.execute("CREATE TABLE benchmark_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            db.execute("INSERT INTO benchmark_meta (key, value) VALUES ('dataset', ?)", (json.dumps(meta),))
+        refresh_arrears_aging(end)
+        with DBManager() as db:
+            db.execute("ANALYZE")
+    finally:
+        if old_path is None:
+            os.environ.pop('SQLITE_PATH', None)
+        else:
+            os.environ['SQLITE_PATH'] = old_path
+    print(f"Built {profile.name} dataset (seed {seed}) in {time.perf_counter() - started:.1f}s: {path}")
+    return path
+
+def dataset(profile, seed=0, end=DEFAULT_END):
+    """Path to the generated database for profile, building it when missing or stale."""
+    from app.core.migrations import SCHEMA_VERSION
+    name = profile if isinstance(profile, str) else profile.name
+    profile = PROFILES[profile] if isinstance(profile, str) else profile
+    path = default_path(name, seed)
+    meta = read_meta(path) if os.path.exists(path) else None
+    if (not meta or meta['profile'] != profile._asdict() or meta['seed'] != seed
+            or meta['end'] != end.isoformat() or meta['schema_version'] != SCHEMA_VERSION):
+        build(profile, path, seed, end)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic school database for benchmarks")
+    parser.add_argument("--profile", choices=PROFILES, default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--end", type=date.fromisoformat, default=DEFAULT_END, help="last payment date (YYYY-MM-DD)")
+    parser.add_argument("--out", help=f"database file (default {os.path.relpath(DATA_DIR)}/<profile>-s<seed>.db)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if an up-to-date file exists")
+    args = parser.parse_args()
+    if args.out or args.force:
+        try:
+            path = build(args.profile, args.out, args.seed, args.end)
+        except FileExistsError as e:
+            parser.error(str(e))
+    else:
+        path = dataset(args.profile, args.seed, args.end)
+    print(json.dumps(read_meta(path)['counts']))
+
+if __name__ == "__main__":
+    main()
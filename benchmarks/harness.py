@@ -0,0 +1,141 @@
+"""Shared pieces of the benchmark scripts: sandboxed datasets, timing, result files and baseline comparison."""
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from .datagen import dataset, read_meta
+
+RESULTS_FORMAT = 1
+
+@contextlib.contextmanager
+def sandbox(profile, seed=0):
+    """Run against a scratch copy of a generated dataset, from a scratch working directory.
+
+    Benchmarks that write (payments, fee changes, CSV reports under reports/)
+    leave the generated file and the checkout untouched. Yields the dataset's meta.
+    """
+    source = dataset(profile, seed)
+    old_cwd, old_path = os.getcwd(), os.environ.get('SQLITE_PATH')
+    with tempfile.TemporaryDirectory(prefix=f"bench-{profile}-") as scratch:
+        path = os.path.join(scratch, os.path.basename(source))
+        shutil.copyfile(source, path)
+        os.environ['SQLITE_PATH'] = path
+        os.chdir(scratch)
+        from app.core.student_manager import invalidate_student_profile
+        invalidate_student_profile()
+        try:
+            yield read_meta(path)
+        finally:
+            from app.core.audit_log import audit_sink
+            audit_sink.flush()
+            os.chdir(old_cwd)
+            if old_path is None:
+                os.environ.pop('SQLITE_PATH', None)
+            else:
+                os.environ['SQLITE_PATH'] = old_path
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def measure(fn, repeat, warmup=1):
+    """Time repeat calls of fn(), then one more under tracemalloc for the peak Python heap."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    total = sum(samples)
+    return {
+        'calls': repeat,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'mean_ms': round(total / repeat * 1000, 3),
+        'ops_per_sec': round(repeat / total, 1) if total else None,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+def new_results(benchmark, **settings):
+    return {
+        'format': RESULTS_FORMAT,
+        'benchmark': benchmark,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'settings': settings,
+        'results': {},
+    }
+
+def write_results(results, path=None):
+    path = path or os.path.join('reports', f"bench_{results['benchmark']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+def print_profile(profile, cases):
+    print(f"\n{profile}")
+    print(f"  {'case':<32} {'p50 ms':>10} {'p95 ms':>10} {'ops/s':>9} {'peak KiB':>10}")
+    for name, stats in cases.items():
+        print(f"  {name:<32} {stats['p50_ms']:>10.2f} {stats['p95_ms']:>10.2f} "
+              f"{stats['ops_per_sec'] or 0:>9.1f} {stats['peak_kib']:>10.1f}")
+
+def compare(results, baseline, threshold=0.25, min_delta_ms=0.5):
+    """Rows of (profile, case, baseline p50, current p50, ratio, regressed) for cases present in both.
+
+    A case regresses when its p50 grew by more than threshold (a fraction)
+    and by at least min_delta_ms, so sub-millisecond jitter is not flagged.
+    """
+    rows = []
+    for profile, cases in results['results'].items():
+        for name, stats in cases.items():
+            before = baseline.get('results', {}).get(profile, {}).get(name)
+            if not before or 'p50_ms' not in stats:
+                continue
+            old, new = before['p50_ms'], stats['p50_ms']
+            ratio = new / old if old else float('inf')
+            rows.append((profile, name, old, new, ratio, ratio > 1 + threshold and new - old >= min_delta_ms))
+    return rows
+
+def print_comparison(rows):
+    print(f"\n  {'profile':<8} {'case':<32} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    for profile, name, old, new, ratio, regressed in rows:
+        print(f"  {profile:<8} {name:<32} {old:>10.2f} {new:>10.2f} {ratio:>6.2f}x{'  REGRESSION' if regressed else ''}")
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"\n{regressions} regression(s) in {len(rows)} compared case(s)")
+    return regressions
+
+def add_arguments(parser, default_profiles):
+    from .datagen import PROFILES
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=default_profiles)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="results file (default reports/bench_<name>_<time>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag cases whose p50 regressed against this results file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown as a fraction (default 0.25)")
+
+def finish(results, args):
+    """Write the results and, with --compare, return a non-zero exit code on regressions."""
+    print(f"\nResults written to {write_results(results, args.out)}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        return 1 if print_comparison(compare(results, baseline, args.threshold)) else 0
+    return 0
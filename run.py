@@ -2,25 +2,30 @@
 """
 School Management System Launcher
 Run this file to start the application
+Run with --profile-startup [REPORT] to time a launch and sign-in without
+waiting for input and write a JSON report (see app/core/startup.py)
+Run with --profile-queries to record every database statement (see app/core/query_profiler.py)
 """
+import argparse
+import importlib.util
+import os
 import sys
+from datetime import datetime
 from pathlib import Path
 
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 def check_dependencies():
-    try:
-        import PyQt6
-        import passlib
-        import fpdf
-        from dotenv import load_dotenv
-        load_dotenv()
-        return True
-    except ImportError as e:
-        print(f"Missing dependency: {e}")
+    # find_spec locates a package without importing it, so this check costs nothing at launch
+    missing = [name for name in ('PyQt6', 'passlib', 'fpdf', 'dotenv') if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"Missing dependency: {', '.join(missing)}")
         print("Please install dependencies with: pip install -r requirements.txt")
         return False
+    from dotenv import load_dotenv
+    load_dotenv()
+    return True
 
 def ensure_directories():
     directories = ['app/data', 'app/logs', 'app/receipts', 'app/backups', 'reports']
@@ -73,16 +78,23 @@ def main():
 def launch_gui():
     print("\n🚀 Starting Desktop Application...")
     try:
+        from app.core.startup import startup_timer
+        startup_timer.start()
         from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtCore import QTimer
         from app.ui.desktop_frontend.login import LoginWindow
         from app.core.initialize_db import init_db
+        startup_timer.mark("imports")
         init_db()
+        startup_timer.mark("init_db")
         print("Database ready!")
         app = QApplication(sys.argv)
         app.setApplicationName("School Management System")
         app.setApplicationVersion("1.0")
         login_window = LoginWindow()
         login_window.show()
+        startup_timer.mark("login window")
+        QTimer.singleShot(0, lambda: startup_timer.report("Launch to login"))
         sys.exit(app.exec())
     except ImportError as e:
         print(f"❌ GUI Error: {e}")
@@ -90,6 +102,72 @@ def launch_gui():
     except Exception as e:
         print(f"❌ Application Error: {e}")
 
+def profile_startup(report_path=None):
+    """Launch, sign in as the first admin and open every tab, recording where the time goes."""
+    # Installed before anything else from the application is imported
+    from app.core.startup import StartupProfiler, startup_timer, summarize
+    profiler = StartupProfiler()
+    profiler.install()
+    try:
+        if not check_dependencies():
+            return False
+        startup_timer.mark("check_dependencies")
+        ensure_directories()
+        startup_timer.mark("ensure_directories")
+        from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtCore import QThread
+        from app.ui.desktop_frontend.login import LoginWindow
+        from app.core.initialize_db import init_db
+        startup_timer.mark("imports")
+        init_db()
+        startup_timer.mark("init_db")
+        app = QApplication(sys.argv[:1])
+        app.setApplicationName("School Management System")
+        login_window = LoginWindow()
+        login_window.show()
+        app.processEvents()
+        startup_timer.mark("login window")
+        profiler.widgets("LoginWindow", login_window)
+
+        # Sign in without the password check; bcrypt has its own benchmark (benchmarks/bench_bcrypt.py)
+        from app.core.db_manager import DBManager
+        with DBManager() as db:
+            user = db.fetch_one("SELECT * FROM users WHERE role = 'admin' ORDER BY id LIMIT 1")
+        if user is None:
+            print("❌ No admin user to sign in as")
+            return False
+        startup_timer.mark("find user")
+        from app.ui.desktop_frontend.main import MainWindow
+        main_window = MainWindow(dict(user))
+        main_window.show()
+        login_window.hide()
+        app.processEvents()
+        startup_timer.mark("first paint")
+        profiler.widgets("MainWindow", main_window, "main window")
+        first = main_window.tabs.currentWidget()
+        profiler.widgets(first.class_name, first.page, first.class_name)
+        # Every other page, built the way switching to its tab builds it
+        for index in range(main_window.tabs.count()):
+            tab = main_window.tabs.widget(index)
+            if tab.page is None:
+                main_window.tabs.setCurrentIndex(index)
+                profiler.widgets(tab.class_name, tab.page)
+                app.processEvents()
+                startup_timer.mark(f"{tab.class_name} paint")
+        # Background loads started by the pages (the dashboard's figures)
+        for thread in main_window.findChildren(QThread):
+            thread.wait()
+        app.processEvents()
+        startup_timer.mark("background loads")
+    finally:
+        profiler.uninstall()
+
+    report_path = report_path or os.path.join("reports", f"startup_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    report = profiler.write(report_path)
+    print("\n".join(summarize(report)))
+    print(f"Startup profile written to {report_path}")
+    return True
+
 def launch_cli():
     print("\n🚀 Starting Command Line Interface...")
     try:
@@ -116,4 +194,15 @@ def backup_database():
         print(f"❌ Backup failed: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="School Management System launcher")
+    parser.add_argument('--profile-startup', nargs='?', const='', metavar='REPORT',
+                        help="time a launch and sign-in and write a JSON report (default reports/startup_profile_<time>.json)")
+    parser.add_argument('--profile-queries', action='store_true',
+                        help="record database statements and log slow ones; summary: python -m app.scripts.query_profile summary")
+    args = parser.parse_args()
+    if args.profile_queries:
+        # Read when app.core.db_manager is first imported
+        os.environ['QUERY_PROFILE'] = '1'
+    if args.profile_startup is not None:
+        sys.exit(0 if profile_startup(args.profile_startup or None) else 1)
+    main()
@@ -13,13 +13,18 @@ sys.path.insert(0, str(project_root))
 logging.basicConfig(filename='app/logs/gui.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 try:
+    from app.core.startup import startup_timer
+    startup_timer.start()
     from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
     from app.ui.desktop_frontend.login import LoginWindow
     from app.core.initialize_db import init_db
+    startup_timer.mark("imports")
     
     print("Initializing database...")
     logging.info("Starting database initialization")
     init_db()
+    startup_timer.mark("init_db")
     print("Database ready!")
     logging.info("Database initialized successfully")
     
@@ -29,6 +34,8 @@ try:
     
     login_window = LoginWindow()
     login_window.show()
+    startup_timer.mark("login window")
+    QTimer.singleShot(0, lambda: startup_timer.report("Launch to login"))
     
     sys.exit(app.exec())
     